@@ -8,6 +8,7 @@ from sqlalchemy import pool
 from alembic import context
 from workout_api.contrib.models import BaseModel
 from workout_api.contrib.repository.models import *
+from workout_api.treinos.models import PREFIXO_PARTICAO
 config = context.config
 
 if config.config_file_name is not None:
@@ -15,11 +16,18 @@ if config.config_file_name is not None:
 
 target_metadata = BaseModel.metadata
 
+
+def include_name(name, type_, parent_names) -> bool:
+    # As partições mensais de treinos_series são criadas em tempo de execução, fora dos modelos
+    return not (type_ == "table" and name and name.startswith(PREFIXO_PARTICAO))
+
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -28,7 +36,7 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
     with context.begin_transaction():
         context.run_migrations()
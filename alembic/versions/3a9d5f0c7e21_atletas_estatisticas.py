@@ -0,0 +1,155 @@
+"""atletas_estatisticas
+
+Revision ID: 3a9d5f0c7e21
+Revises: e71a4c9b2d63
+Create Date: 2026-10-18 16:20:11.402517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9d5f0c7e21'
+down_revision: Union[str, Sequence[str], None] = 'e71a4c9b2d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cópia congelada do SQL de workout_api/estatisticas/models.py (a migração não pode mudar junto com o código)
+IMC = "(d.peso / (d.altura * d.altura))"
+COLUNAS_DELTA = "categoria_id, centro_treinamento_id, sexo, idade, peso, altura"
+EVENTOS = {
+    "insert": (f"SELECT {COLUNAS_DELTA}, 1 FROM novas", "NEW TABLE AS novas"),
+    "update": (
+        f"SELECT {COLUNAS_DELTA}, 1 FROM novas UNION ALL SELECT {COLUNAS_DELTA}, -1 FROM antigas",
+        "OLD TABLE AS antigas NEW TABLE AS novas",
+    ),
+    "delete": (f"SELECT {COLUNAS_DELTA}, -1 FROM antigas", "OLD TABLE AS antigas"),
+}
+TRAVA_CONSOLIDACAO = "hashtext('atletas_estatisticas')"
+
+
+def aplicar_delta(origem: str) -> list[str]:
+    return [
+        f"""
+        INSERT INTO atletas_resumo AS r (
+            categoria_id, centro_treinamento_id, sexo, faixa_imc,
+            quantidade, soma_idade, soma_peso, soma_altura, soma_imc
+        )
+        SELECT d.categoria_id, d.centro_treinamento_id, d.sexo,
+               CASE WHEN {IMC} < 18.5 THEN 0 WHEN {IMC} < 25.0 THEN 1 WHEN {IMC} < 30.0 THEN 2 ELSE 3 END,
+               sum(d.sinal), sum(d.sinal * d.idade), sum(d.sinal * d.peso),
+               sum(d.sinal * d.altura), sum(d.sinal * {IMC})
+        FROM {origem} AS d
+        GROUP BY 1, 2, 3, 4
+        HAVING sum(d.sinal) <> 0 OR sum(d.sinal * d.idade) <> 0
+            OR sum(d.sinal * d.peso) <> 0 OR sum(d.sinal * d.altura) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (categoria_id, centro_treinamento_id, sexo, faixa_imc) DO UPDATE SET
+            quantidade = r.quantidade + EXCLUDED.quantidade,
+            soma_idade = r.soma_idade + EXCLUDED.soma_idade,
+            soma_peso = r.soma_peso + EXCLUDED.soma_peso,
+            soma_altura = r.soma_altura + EXCLUDED.soma_altura,
+            soma_imc = r.soma_imc + EXCLUDED.soma_imc
+        """,
+        f"""
+        INSERT INTO atletas_histograma AS h (categoria_id, centro_treinamento_id, medida, faixa, quantidade)
+        SELECT d.categoria_id, d.centro_treinamento_id, m.medida, m.faixa, sum(d.sinal)
+        FROM {origem} AS d
+        CROSS JOIN LATERAL (VALUES
+            ('idade', round(d.idade / 1)::integer),
+            ('peso', round(d.peso / 0.5)::integer),
+            ('altura', round(d.altura / 0.01)::integer),
+            ('imc', round({IMC} / 0.1)::integer)
+        ) AS m (medida, faixa)
+        GROUP BY 1, 2, 3, 4
+        HAVING sum(d.sinal) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (categoria_id, centro_treinamento_id, medida, faixa) DO UPDATE SET
+            quantidade = h.quantidade + EXCLUDED.quantidade
+        """,
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('atletas_resumo',
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('centro_treinamento_id', sa.Integer(), nullable=False),
+    sa.Column('sexo', sa.String(length=1), nullable=False),
+    sa.Column('faixa_imc', sa.SmallInteger(), nullable=False),
+    sa.Column('quantidade', sa.BigInteger(), nullable=False),
+    sa.Column('soma_idade', sa.Float(), nullable=False),
+    sa.Column('soma_peso', sa.Float(), nullable=False),
+    sa.Column('soma_altura', sa.Float(), nullable=False),
+    sa.Column('soma_imc', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('categoria_id', 'centro_treinamento_id', 'sexo', 'faixa_imc')
+    )
+    op.create_table('atletas_histograma',
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('centro_treinamento_id', sa.Integer(), nullable=False),
+    sa.Column('medida', sa.String(length=10), nullable=False),
+    sa.Column('faixa', sa.Integer(), nullable=False),
+    sa.Column('quantidade', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('categoria_id', 'centro_treinamento_id', 'medida', 'faixa')
+    )
+    op.create_table('atletas_estatisticas_delta',
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('centro_treinamento_id', sa.Integer(), nullable=False),
+    sa.Column('sexo', sa.String(length=1), nullable=False),
+    sa.Column('idade', sa.Integer(), nullable=False),
+    sa.Column('peso', sa.Float(), nullable=False),
+    sa.Column('altura', sa.Float(), nullable=False),
+    sa.Column('sinal', sa.SmallInteger(), nullable=False)
+    )
+
+    for evento, (delta, _) in EVENTOS.items():
+        op.execute(f"""
+        CREATE OR REPLACE FUNCTION atletas_estatisticas_{evento}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO atletas_estatisticas_delta ({COLUNAS_DELTA}, sinal) {delta};
+            RETURN NULL;
+        END
+        $$
+        """)
+
+    # Carga inicial sem bloquear as escritas em atletas:
+    # 1. os gatilhos são criados e confirmados (o CREATE TRIGGER espera as escritas em andamento
+    #    terminarem e bloqueia as novas só até o commit; lock_timeout: com uma transação longa
+    #    aberta em atletas a migração falha em vez de enfileirar as escritas atrás dela);
+    # 2. um único comando, com um único snapshot, soma atletas ao resumo e apaga o delta visível
+    #    nesse snapshot (escritas já contadas na carga). O delta de escritas confirmadas depois
+    #    continua lá para a consolidação.
+    # A trava consultiva (de sessão) impede a consolidação dos workers entre os dois passos
+    op.execute(f"SELECT pg_advisory_lock({TRAVA_CONSOLIDACAO})")
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    for evento, (_, transicoes) in EVENTOS.items():
+        op.execute(f"""
+        CREATE TRIGGER atletas_estatisticas_{evento}
+        AFTER {evento.upper()} ON atletas
+        REFERENCING {transicoes}
+        FOR EACH STATEMENT EXECUTE PROCEDURE atletas_estatisticas_{evento}()
+        """)
+    with op.get_context().autocommit_block():
+        resumo, histograma = aplicar_delta("carga")
+        op.execute(f"""
+        WITH apagado AS (
+            DELETE FROM atletas_estatisticas_delta
+        ), carga AS (
+            SELECT {COLUNAS_DELTA}, 1 AS sinal FROM atletas
+        ), resumo AS ({resumo})
+        {histograma}
+        """)
+        op.execute(f"SELECT pg_advisory_unlock({TRAVA_CONSOLIDACAO})")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for evento in reversed(list(EVENTOS)):
+        op.execute(f"DROP TRIGGER IF EXISTS atletas_estatisticas_{evento} ON atletas")
+        op.execute(f"DROP FUNCTION IF EXISTS atletas_estatisticas_{evento}()")
+    op.drop_table('atletas_estatisticas_delta')
+    op.drop_table('atletas_histograma')
+    op.drop_table('atletas_resumo')
@@ -0,0 +1,41 @@
+"""atletas_fk_indexes
+
+Revision ID: 8c3f1a6e2b57
+Revises: 5b1e7c2d9a40
+Create Date: 2026-10-18 10:41:07.218344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3f1a6e2b57'
+down_revision: Union[str, Sequence[str], None] = '5b1e7c2d9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # O Postgres não indexa colunas de FK sozinho: sem estes índices, checar atletas vinculados
+    # (e a própria verificação da FK ao excluir categorias/centros) varre a tabela atletas inteira.
+    # CONCURRENTLY não bloqueia as escritas em atletas durante a construção (fora de transação)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_atletas_categoria_id'), 'atletas', ['categoria_id'], unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f('ix_atletas_centro_treinamento_id'), 'atletas', ['centro_treinamento_id'], unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_atletas_centro_treinamento_id'), table_name='atletas', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_atletas_categoria_id'), table_name='atletas', postgresql_concurrently=True)
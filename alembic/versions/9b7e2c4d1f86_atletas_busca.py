@@ -0,0 +1,52 @@
+"""atletas_busca
+
+Revision ID: 9b7e2c4d1f86
+Revises: 3a9d5f0c7e21
+Create Date: 2026-10-18 18:02:47.119354
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b7e2c4d1f86'
+down_revision: Union[str, Sequence[str], None] = '3a9d5f0c7e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No Postgres anterior ao 13 as extensões precisam de um superusuário
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() não é IMMUTABLE e não pode ir num índice: a função fixa o dicionário
+    op.execute(
+        "CREATE OR REPLACE FUNCTION normalizar_texto(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$"
+    )
+    # Índices com CONCURRENTLY, fora da transação: a construção (o GiST é demorado em tabelas
+    # grandes) não bloqueia as escritas em atletas. Se falhar, remova o índice INVALID e repita
+    with op.get_context().autocommit_block():
+        # Busca por nome: trigramas do nome normalizado (GiST atende %> e a ordenação por <->>)
+        op.create_index(
+            'ix_atletas_nome_trgm', 'atletas', [sa.text('normalizar_texto(nome) gist_trgm_ops')],
+            unique=False, postgresql_using='gist', postgresql_concurrently=True,
+        )
+        # Busca por prefixo do CPF: cpf LIKE '123%' ORDER BY cpf USING ~<~
+        op.create_index(
+            'ix_atletas_cpf_pattern', 'atletas', [sa.text('cpf varchar_pattern_ops')], unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_atletas_cpf_pattern', table_name='atletas', postgresql_concurrently=True)
+        op.drop_index('ix_atletas_nome_trgm', table_name='atletas', postgresql_concurrently=True)
+    op.execute("DROP FUNCTION IF EXISTS normalizar_texto(text)")
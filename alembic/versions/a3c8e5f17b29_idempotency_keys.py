@@ -0,0 +1,39 @@
+"""idempotency keys
+
+Revision ID: a3c8e5f17b29
+Revises: d6f1a8b3c502
+Create Date: 2026-10-18 22:05:37.214806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c8e5f17b29'
+down_revision: Union[str, Sequence[str], None] = 'd6f1a8b3c502'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_keys',
+    sa.Column('rota', sa.String(length=100), nullable=False),
+    sa.Column('chave', sa.String(length=255), nullable=False),
+    sa.Column('hash_corpo', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.SmallInteger(), nullable=False),
+    sa.Column('corpo', sa.LargeBinary(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('rota', 'chave')
+    )
+    op.create_index('ix_idempotency_keys_expira_em', 'idempotency_keys', ['expira_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idempotency_keys_expira_em', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
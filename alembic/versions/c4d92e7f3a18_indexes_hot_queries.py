@@ -0,0 +1,52 @@
+"""indexes_hot_queries
+
+Revision ID: c4d92e7f3a18
+Revises: 8c3f1a6e2b57
+Create Date: 2026-10-18 11:26:53.904172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d92e7f3a18'
+down_revision: Union[str, Sequence[str], None] = '8c3f1a6e2b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY não bloqueia as escritas durante a construção, mas não roda dentro
+    # de uma transação. Se falhar, o índice fica INVALID: remova-o antes de repetir a migração.
+    with op.get_context().autocommit_block():
+        # GET/PATCH/DELETE /{id} filtram pelo id público (UUID) em todas as tabelas
+        op.create_index(op.f('ix_categorias_id'), 'categorias', ['id'], unique=True, postgresql_concurrently=True)
+        op.create_index(
+            op.f('ix_centros_treinamento_id'), 'centros_treinamento', ['id'], unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(op.f('ix_atletas_id'), 'atletas', ['id'], unique=True, postgresql_concurrently=True)
+        # Paginação por chave: ORDER BY created_at, pk_id com (created_at, pk_id) > cursor
+        op.create_index(
+            'ix_atletas_created_at_pk_id', 'atletas', ['created_at', 'pk_id'], unique=False,
+            postgresql_concurrently=True,
+        )
+        # Filtro por prefixo do nome: lower(nome) LIKE 'x%' (varchar_pattern_ops vale para qualquer collation)
+        op.create_index(
+            'ix_atletas_nome_lower', 'atletas', [sa.text('lower(nome) varchar_pattern_ops')], unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_atletas_nome_lower', table_name='atletas', postgresql_concurrently=True)
+        op.drop_index('ix_atletas_created_at_pk_id', table_name='atletas', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_atletas_id'), table_name='atletas', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_centros_treinamento_id'), table_name='centros_treinamento', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_categorias_id'), table_name='categorias', postgresql_concurrently=True)
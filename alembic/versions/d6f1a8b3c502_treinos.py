@@ -0,0 +1,58 @@
+"""treinos
+
+Revision ID: d6f1a8b3c502
+Revises: 9b7e2c4d1f86
+Create Date: 2026-10-18 20:41:09.583120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f1a8b3c502'
+down_revision: Union[str, Sequence[str], None] = '9b7e2c4d1f86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _resumo(nome: str, periodo: str) -> None:
+    op.create_table(nome,
+    sa.Column('atleta_id', sa.Integer(), nullable=False),
+    sa.Column(periodo, sa.Date(), nullable=False),
+    sa.Column('exercicio', sa.String(length=50), nullable=False),
+    sa.Column('series', sa.Integer(), nullable=False),
+    sa.Column('repeticoes', sa.BigInteger(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.Column('carga_maxima', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['atleta_id'], ['atletas.pk_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('atleta_id', periodo, 'exercicio')
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Particionada por mês; as partições são criadas pela API na inicialização e pela manutenção
+    # (python -m workout_api.treinos.manutencao), não pela migração
+    op.create_table('treinos_series',
+    sa.Column('atleta_id', sa.Integer(), nullable=False),
+    sa.Column('realizado_em', sa.DateTime(), nullable=False),
+    sa.Column('exercicio', sa.String(length=50), nullable=False),
+    sa.Column('repeticoes', sa.Integer(), nullable=False),
+    sa.Column('carga', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['atleta_id'], ['atletas.pk_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('atleta_id', 'realizado_em', 'exercicio'),
+    postgresql_partition_by='RANGE (realizado_em)'
+    )
+    _resumo('treinos_diarios', 'dia')
+    _resumo('treinos_semanais', 'semana')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('treinos_semanais')
+    op.drop_table('treinos_diarios')
+    # Remove também todas as partições
+    op.drop_table('treinos_series')
@@ -0,0 +1,84 @@
+"""importacoes
+
+Revision ID: e71a4c9b2d63
+Revises: c4d92e7f3a18
+Create Date: 2026-10-18 14:05:32.781904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e71a4c9b2d63'
+down_revision: Union[str, Sequence[str], None] = 'c4d92e7f3a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('importacoes',
+    sa.Column('pk_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('formato', sa.String(length=10), nullable=False),
+    sa.Column('linhas_lidas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('linhas_validas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('linhas_importadas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('linhas_com_erro', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mensagem', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finalizado_em', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('pk_id')
+    )
+    op.create_index(op.f('ix_importacoes_id'), 'importacoes', ['id'], unique=True)
+    op.create_table('importacao_erros',
+    sa.Column('pk_id', sa.Integer(), nullable=False),
+    sa.Column('importacao_id', sa.Integer(), nullable=False),
+    sa.Column('linha', sa.Integer(), nullable=False),
+    sa.Column('cpf', sa.String(length=11), nullable=True),
+    sa.Column('campo', sa.String(length=50), nullable=True),
+    sa.Column('mensagem', sa.String(length=500), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['importacao_id'], ['importacoes.pk_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('pk_id')
+    )
+    op.create_index(op.f('ix_importacao_erros_id'), 'importacao_erros', ['id'], unique=True)
+    op.create_index('ix_importacao_erros_importacao_id_linha', 'importacao_erros', ['importacao_id', 'linha'], unique=False)
+    # UNLOGGED: a staging é descartável (é esvaziada ao fim de cada importação), então o
+    # COPY não precisa passar pelo WAL
+    op.create_table('atletas_importacao',
+    sa.Column('pk_id', sa.Integer(), nullable=False),
+    sa.Column('importacao_id', sa.Integer(), nullable=False),
+    sa.Column('linha', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('cpf', sa.String(length=11), nullable=False),
+    sa.Column('idade', sa.Integer(), nullable=False),
+    sa.Column('peso', sa.Float(), nullable=False),
+    sa.Column('altura', sa.Float(), nullable=False),
+    sa.Column('sexo', sa.String(length=1), nullable=False),
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('centro_treinamento_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('pk_id'),
+    prefixes=['UNLOGGED']
+    )
+    op.create_index(op.f('ix_atletas_importacao_id'), 'atletas_importacao', ['id'], unique=True)
+    op.create_index(
+        'ix_atletas_importacao_importacao_id_cpf_linha', 'atletas_importacao', ['importacao_id', 'cpf', 'linha'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_atletas_importacao_importacao_id_cpf_linha', table_name='atletas_importacao')
+    op.drop_index(op.f('ix_atletas_importacao_id'), table_name='atletas_importacao')
+    op.drop_table('atletas_importacao')
+    op.drop_index('ix_importacao_erros_importacao_id_linha', table_name='importacao_erros')
+    op.drop_index(op.f('ix_importacao_erros_id'), table_name='importacao_erros')
+    op.drop_table('importacao_erros')
+    op.drop_index(op.f('ix_importacoes_id'), table_name='importacoes')
+    op.drop_table('importacoes')
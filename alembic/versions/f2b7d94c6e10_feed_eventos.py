@@ -0,0 +1,38 @@
+"""feed eventos
+
+Revision ID: f2b7d94c6e10
+Revises: a3c8e5f17b29
+Create Date: 2026-10-18 23:12:48.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d94c6e10'
+down_revision: Union[str, Sequence[str], None] = 'a3c8e5f17b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('feed_eventos',
+    sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('tabela', sa.String(length=30), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('entidade_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('dados', sa.Text(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index('ix_feed_eventos_criado_em', 'feed_eventos', ['criado_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_feed_eventos_criado_em', table_name='feed_eventos')
+    op.drop_table('feed_eventos')
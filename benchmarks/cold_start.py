@@ -0,0 +1,192 @@
+"""
+Tempo de inicialização a frio da API, medido em processos novos (como um contêiner recém-criado).
+
+Para cada modo (padrão e LAZY_ROUTERS=true) e repetição:
+- importação: `python -X importtime -c "import workout_api.main"`, com o total e o tempo
+  próprio somado por pacote (sqlalchemy, fastapi, workout_api.atleta...);
+- primeira resposta: sobe `python -m workout_api --workers 1` e mede, a partir do spawn, quando
+  a porta passa a aceitar conexões (fim do lifespan) e quando a rota responde, além da latência
+  da segunda requisição, já com tudo carregado.
+
+Os tempos são medianas das repetições. O servidor usa o banco de DB_URL (já migrado ou criado).
+O resultado é salvo em JSON (padrão: benchmarks/resultados/<commit>-cold-start.json).
+
+Uso:
+    python -m benchmarks.cold_start [--repeticoes 5] [--rota /categorias/] [--modos padrao lazy]
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+RESULTADOS = Path(__file__).parent / "resultados"
+
+# Variáveis de ambiente de cada modo, somadas ao ambiente atual
+MODOS = {
+    "padrao": {"LAZY_ROUTERS": "false"},
+    "lazy": {"LAZY_ROUTERS": "true"},
+}
+
+_LINHA_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _ambiente(modo: str) -> dict:
+    return {**os.environ, **MODOS[modo]}
+
+
+def _pacote(modulo: str) -> str:
+    # Módulos da API agrupados por subpacote (workout_api.atleta), os demais pela raiz (sqlalchemy)
+    partes = modulo.split(".")
+    return ".".join(partes[:2]) if partes[0] == "workout_api" else partes[0]
+
+
+def medir_importacao(modo: str) -> dict:
+    """Total (ms) da importação de workout_api.main e tempo próprio (ms) por pacote."""
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import workout_api.main"],
+        env=_ambiente(modo), capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    por_pacote: dict[str, float] = defaultdict(float)
+    for linha in processo.stderr.splitlines():
+        casamento = _LINHA_IMPORTTIME.match(linha)
+        if not casamento:
+            continue
+        proprio, acumulado, _, modulo = casamento.groups()
+        por_pacote[_pacote(modulo)] += int(proprio) / 1000
+        if modulo == "workout_api.main":
+            total = int(acumulado) / 1000
+    return {"total_ms": total, "por_pacote_ms": dict(por_pacote)}
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _aguardar_porta(porta: int, processo: subprocess.Popen, limite: float) -> None:
+    while time.perf_counter() < limite:
+        if processo.poll() is not None:
+            erro = processo.stderr.read().decode(errors="replace")[-2000:] if processo.stderr else ""
+            raise RuntimeError(f"O servidor terminou com código {processo.returncode} antes de abrir a porta:\n{erro}")
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.005)
+    raise TimeoutError(f"A porta {porta} não abriu a tempo")
+
+
+def medir_primeira_resposta(modo: str, rota: str, timeout: float) -> dict:
+    """Tempos (ms) desde o spawn até a porta abrir e até a primeira resposta, e a latência da segunda."""
+    porta = _porta_livre()
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "workout_api", "--workers", "1", "--port", str(porta), "--host", "127.0.0.1",
+         "--log-level", "warning"],
+        env=_ambiente(modo), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        _aguardar_porta(porta, processo, inicio + timeout)
+        porta_aberta = time.perf_counter()
+        with httpx.Client(base_url=f"http://127.0.0.1:{porta}", timeout=timeout) as client:
+            resposta = client.get(rota)
+            primeira = time.perf_counter()
+            if resposta.status_code >= 500:
+                raise RuntimeError(f"GET {rota} respondeu {resposta.status_code}: {resposta.text[:200]}")
+            antes_segunda = time.perf_counter()
+            client.get(rota)
+            segunda = time.perf_counter()
+    finally:
+        processo.terminate()
+        processo.wait(timeout=timeout)
+    return {
+        "porta_ms": (porta_aberta - inicio) * 1000,
+        "primeira_resposta_ms": (primeira - inicio) * 1000,
+        "segunda_requisicao_ms": (segunda - antes_segunda) * 1000,
+    }
+
+
+def _mediana(medicoes: list[dict], chave: str) -> float:
+    return round(statistics.median(medicao[chave] for medicao in medicoes), 1)
+
+
+def medir_modo(modo: str, repeticoes: int, rota: str, timeout: float) -> dict:
+    importacoes = [medir_importacao(modo) for _ in range(repeticoes)]
+    respostas = [medir_primeira_resposta(modo, rota, timeout) for _ in range(repeticoes)]
+    pacotes = {pacote for importacao in importacoes for pacote in importacao["por_pacote_ms"]}
+    return {
+        "importacao_ms": _mediana(importacoes, "total_ms"),
+        "porta_ms": _mediana(respostas, "porta_ms"),
+        "primeira_resposta_ms": _mediana(respostas, "primeira_resposta_ms"),
+        "segunda_requisicao_ms": _mediana(respostas, "segunda_requisicao_ms"),
+        "por_pacote_ms": {
+            pacote: round(statistics.median(i["por_pacote_ms"].get(pacote, 0.0) for i in importacoes), 1)
+            for pacote in pacotes
+        },
+    }
+
+
+def imprimir(resultados: dict, top: int) -> None:
+    print(f"{'modo':<10}{'import ms':>12}{'porta ms':>12}{'1ª resposta ms':>17}{'2ª requisição ms':>19}")
+    for modo, resultado in resultados.items():
+        print(
+            f"{modo:<10}{resultado['importacao_ms']:>12.1f}{resultado['porta_ms']:>12.1f}"
+            f"{resultado['primeira_resposta_ms']:>17.1f}{resultado['segunda_requisicao_ms']:>19.1f}"
+        )
+    for modo, resultado in resultados.items():
+        print(f"\nPacotes mais caros na importação ({modo}, tempo próprio):")
+        mais_caros = sorted(resultado["por_pacote_ms"].items(), key=lambda item: item[1], reverse=True)[:top]
+        for pacote, ms in mais_caros:
+            print(f"  {pacote:<40}{ms:>8.1f} ms")
+
+
+def commit_atual() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sem-commit"
+
+
+def main(args: argparse.Namespace) -> None:
+    resultados = {}
+    for modo in args.modos:
+        print(f"Medindo o modo {modo} ({args.repeticoes} repetições)...")
+        resultados[modo] = medir_modo(modo, args.repeticoes, args.rota, args.timeout)
+    print()
+    imprimir(resultados, args.top)
+
+    commit = commit_atual()
+    saida: Optional[Path] = Path(args.saida) if args.saida else RESULTADOS / f"{commit}-cold-start.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps({
+        "commit": commit,
+        "data": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "parametros": {"repeticoes": args.repeticoes, "rota": args.rota},
+        "modos": resultados,
+    }, indent=2, ensure_ascii=False))
+    print(f"\nResultados salvos em {saida}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--rota", default="/categorias/", help="rota da primeira requisição")
+    parser.add_argument("--modos", nargs="+", choices=list(MODOS), default=list(MODOS))
+    parser.add_argument("--top", type=int, default=10, help="pacotes listados por tempo de importação")
+    parser.add_argument("--timeout", type=float, default=60.0, help="segundos esperando o servidor")
+    parser.add_argument("--saida", help="arquivo JSON de resultados")
+    main(parser.parse_args())
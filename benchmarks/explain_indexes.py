@@ -0,0 +1,99 @@
+"""
+Verifica com EXPLAIN que as consultas quentes da API usam os índices esperados.
+
+Roda contra o banco de DB_URL já migrado (alembic upgrade head). No Postgres, enable_seqscan
+é desligado na sessão: com tabelas pequenas o planejador preferiria varrer a tabela, e o que
+interessa aqui é provar que existe um índice utilizável para cada rota. No SQLite usa
+EXPLAIN QUERY PLAN (sem varchar_pattern_ops e pg_trgm, as buscas por prefixo do nome e a
+rota /atletas/search são puladas).
+
+Sai com código 1 se alguma consulta não usar o índice esperado.
+
+Uso:
+    python -m benchmarks.explain_indexes
+"""
+import asyncio
+import sys
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import exists, select
+from workout_api.atleta.busca import select_busca_cpf, select_busca_nome
+from workout_api.atleta.models import AtletaModel
+from workout_api.atleta.repository import aplicar_cursor, aplicar_filtros, codificar_cursor, select_atletas_flat
+from workout_api.categorias.models import CategoriaModel
+from workout_api.centro_treinamento.models import CentroTreinamentoModel
+from workout_api.configs.database import engine
+
+
+def _explain(consulta, dialect) -> str:
+    # Valores literais no SQL: o plano sai igual ao de uma consulta com os parâmetros já conhecidos
+    sql = str(consulta.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    return ("EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN ") + sql
+
+
+def _consultas() -> list[tuple[str, object, str, bool]]:
+    # (rota, consulta, índice esperado, só no Postgres)
+    id_ = uuid4()
+    cursor = codificar_cursor(datetime(2025, 1, 1), 1)
+    return [
+        ("GET /atletas/{id}", select_atletas_flat().where(AtletaModel.id == id_), "ix_atletas_id", False),
+        ("GET /categorias/{id}", select(CategoriaModel).filter_by(id=id_), "ix_categorias_id", False),
+        (
+            "GET /centros_treinamento/{id}",
+            select(CentroTreinamentoModel).filter_by(id=id_),
+            "ix_centros_treinamento_id",
+            False,
+        ),
+        (
+            "GET /atletas/?cursor=",
+            aplicar_cursor(select_atletas_flat(), cursor).limit(100),
+            "ix_atletas_created_at_pk_id",
+            False,
+        ),
+        (
+            "GET /atletas/?nome=",
+            aplicar_filtros(select_atletas_flat(), nome="jo").limit(100),
+            "ix_atletas_nome_lower",
+            True,
+        ),
+        ("GET /atletas/search?q= (nome)", select_busca_nome("joao", 20), "ix_atletas_nome_trgm", True),
+        ("GET /atletas/search?q= (CPF)", select_busca_cpf("123", 20, True), "ix_atletas_cpf_pattern", True),
+        (
+            "DELETE /categorias/{id} (atletas vinculados)",
+            select(exists().where(AtletaModel.categoria_id == 1)),
+            "ix_atletas_categoria_id",
+            False,
+        ),
+        (
+            "DELETE /centros_treinamento/{id} (atletas vinculados)",
+            select(exists().where(AtletaModel.centro_treinamento_id == 1)),
+            "ix_atletas_centro_treinamento_id",
+            False,
+        ),
+    ]
+
+
+async def main() -> int:
+    falhas = 0
+    postgres = engine.dialect.name == "postgresql"
+    async with engine.connect() as conn:
+        if postgres:
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+        for rota, consulta, indice, so_postgres in _consultas():
+            if so_postgres and not postgres:
+                print(f"PULADO  {rota}: {indice} só existe no Postgres")
+                continue
+            linhas = (await conn.exec_driver_sql(_explain(consulta, engine.dialect))).all()
+            plano = "\n".join(str(linha[-1]) for linha in linhas)
+            if indice in plano:
+                print(f"OK      {rota}: {indice}")
+            else:
+                falhas += 1
+                print(f"FALHOU  {rota}: esperado {indice}\n{plano}")
+    await engine.dispose()
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,496 @@
+"""
+Teste de carga das rotas de routers.api_router.
+
+Popula o banco de DB_URL com categorias, centros de treinamento e atletas (pelos modelos de
+contrib/repository/models.py) e dispara cada rota com concorrência configurável, medindo
+latência (p50/p95/p99), vazão e consultas SQL por requisição.
+
+Modos:
+- padrão: a aplicação roda no mesmo processo, via httpx.ASGITransport (sem rede);
+- --uvicorn: sobe um uvicorn no mesmo processo e usa HTTP de verdade (inclui o lifespan);
+- --url: usa um servidor já rodando (ex: make run). O servidor deve usar o mesmo banco de
+  DB_URL; as consultas por requisição vêm do cabeçalho Server-Timing da resposta.
+
+Banco: o Postgres do docker-compose (migrado com make run-migrations) ou SQLite via aiosqlite
+(DB_URL=sqlite+aiosqlite:///bench.db, com --criar-tabelas). Os dados semeados levam uma
+marca da execução no nome, então rodar de novo no mesmo banco não gera conflitos.
+
+O resultado é salvo em JSON (padrão: benchmarks/resultados/<commit>-<banco>.json) e pode ser
+comparado com uma execução anterior via --comparar.
+
+Uso:
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load [--atletas 1000] [--requisicoes 500] [--concorrencia 20]
+                              [--uvicorn | --url URL] [--rotas atletas] [--comparar base.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import event, insert
+from workout_api.configs.database import ENGINES, async_session, engine
+from workout_api.contrib.models import BaseModel
+from workout_api.contrib.repository.models import (
+    AtletaModel,
+    CategoriaModel,
+    CentroTreinamentoModel,
+    ImportacaoErroModel,
+    ImportacaoModel,
+)
+from workout_api.importacao import processamento as importacao
+from workout_api.importacao.processamento import COLUNAS_CSV
+from workout_api.main import app
+from workout_api.routers import api_router
+
+RESULTADOS = Path(__file__).parent / "resultados"
+
+
+# --- Contagem de consultas SQL (todas as engines: primário e réplicas) ---
+
+_consultas_executadas = 0
+
+
+def _contar_consulta(*args) -> None:
+    global _consultas_executadas
+    _consultas_executadas += 1
+
+
+for _engine in ENGINES.values():
+    event.listen(_engine.sync_engine, "before_cursor_execute", _contar_consulta)
+
+
+# --- Dados semeados ---
+
+@dataclass
+class Semente:
+    marca: str
+    categorias: list[tuple[uuid.UUID, str]] = field(default_factory=list)
+    centros: list[tuple[uuid.UUID, str]] = field(default_factory=list)
+    atletas: list[uuid.UUID] = field(default_factory=list)
+    # Registros sem vínculos, consumidos pelas rotas DELETE (um por requisição)
+    categorias_descartaveis: list[uuid.UUID] = field(default_factory=list)
+    centros_descartaveis: list[uuid.UUID] = field(default_factory=list)
+    atletas_descartaveis: list[uuid.UUID] = field(default_factory=list)
+    # Importação já concluída, com erros, para as rotas de consulta de importações
+    importacao: Optional[uuid.UUID] = None
+    cpfs: itertools.count = field(default_factory=itertools.count)
+
+    def novo_cpf(self) -> str:
+        return f"{next(self.cpfs) % 10**11:011d}"
+
+
+async def semear(categorias: int, centros: int, atletas: int, descartaveis: int) -> Semente:
+    semente = Semente(marca=uuid.uuid4().hex[:6])
+    semente.cpfs = itertools.count(random.randrange(10**10))
+    agora = datetime.utcnow()
+
+    async with async_session() as session: # type: ignore
+        async def inserir(model, linhas: list[dict]) -> list:
+            if not linhas:
+                return []
+            resultado = await session.execute(
+                insert(model).returning(model.pk_id, model.id, sort_by_parameter_order=True), linhas
+            )
+            return resultado.all()
+
+        def referencia(tipo: str, indice: int, extra: dict) -> dict:
+            return {"id": uuid.uuid4(), "nome": f"Bench {semente.marca} {tipo} {indice}", **extra}
+
+        centro_extra = {"endereco": "Rua do Benchmark, 1", "proprietario": "Benchmark"}
+        linhas_categorias = [referencia("cat", indice, {}) for indice in range(categorias + descartaveis)]
+        linhas_centros = [referencia("ct", indice, centro_extra) for indice in range(centros + descartaveis)]
+        pk_categorias = await inserir(CategoriaModel, linhas_categorias)
+        pk_centros = await inserir(CentroTreinamentoModel, linhas_centros)
+
+        semente.categorias = [(linha["id"], linha["nome"]) for linha in linhas_categorias[:categorias]]
+        semente.centros = [(linha["id"], linha["nome"]) for linha in linhas_centros[:centros]]
+        semente.categorias_descartaveis = [linha["id"] for linha in linhas_categorias[categorias:]]
+        semente.centros_descartaveis = [linha["id"] for linha in linhas_centros[centros:]]
+
+        linhas_atletas = [
+            {
+                "id": uuid.uuid4(),
+                "nome": f"Atleta {semente.marca} {indice}",
+                "cpf": semente.novo_cpf(),
+                "idade": 18 + indice % 40,
+                "peso": 55.0 + indice % 45,
+                "altura": 1.50 + (indice % 50) / 100,
+                "sexo": "MF"[indice % 2],
+                "created_at": agora,
+                "categoria_id": pk_categorias[indice % categorias].pk_id,
+                "centro_treinamento_id": pk_centros[indice % centros].pk_id,
+            }
+            for indice in range(atletas + descartaveis)
+        ]
+        # Em lotes, para ficar abaixo do limite de parâmetros por comando
+        for inicio in range(0, len(linhas_atletas), 1000):
+            await inserir(AtletaModel, linhas_atletas[inicio:inicio + 1000])
+
+        semente.importacao = uuid.uuid4()
+        (importacao,) = await inserir(ImportacaoModel, [{
+            "id": semente.importacao, "status": "concluida", "formato": "csv", "created_at": agora,
+            "finalizado_em": agora, "linhas_lidas": 500, "linhas_com_erro": 500,
+        }])
+        await inserir(ImportacaoErroModel, [
+            {"id": uuid.uuid4(), "importacao_id": importacao.pk_id, "linha": linha, "campo": "idade", "mensagem": "Erro"}
+            for linha in range(1, 501)
+        ])
+        await session.commit()
+
+    semente.atletas = [linha["id"] for linha in linhas_atletas[:atletas]]
+    semente.atletas_descartaveis = [linha["id"] for linha in linhas_atletas[atletas:]]
+    return semente
+
+
+# --- Cenários: como montar uma requisição para cada rota ---
+
+@dataclass
+class Cenario:
+    rotulo: str
+    metodo: str
+    rota: str # caminho da rota em api_router, ex: /atletas/{id}
+    requisicao: Callable[[int], dict] # índice da requisição -> argumentos de httpx.request
+    status_esperado: int = 200
+
+
+def cenarios(semente: Semente) -> list[Cenario]:
+    def categoria(indice: int) -> tuple[uuid.UUID, str]:
+        return semente.categorias[indice % len(semente.categorias)]
+
+    def centro(indice: int) -> tuple[uuid.UUID, str]:
+        return semente.centros[indice % len(semente.centros)]
+
+    def atleta(indice: int) -> uuid.UUID:
+        return semente.atletas[indice % len(semente.atletas)]
+
+    def novo_atleta(indice: int) -> dict:
+        return {
+            "nome": f"Novo {semente.marca} {indice}",
+            "cpf": semente.novo_cpf(),
+            "idade": 30,
+            "peso": 75.0,
+            "altura": 1.75,
+            "sexo": "M",
+            "categoria": {"nome": categoria(indice)[1]},
+            "centro_treinamento": {"nome": centro(indice)[1]},
+        }
+
+    def arquivo_csv(indice: int) -> bytes:
+        linhas = [",".join(COLUNAS_CSV)]
+        for j in range(100):
+            atleta_ = novo_atleta(indice * 100 + j)
+            linhas.append(",".join([
+                atleta_["nome"], atleta_["cpf"], "30", "75.0", "1.75", "M",
+                atleta_["categoria"]["nome"], atleta_["centro_treinamento"]["nome"],
+            ]))
+        return "\n".join(linhas).encode()
+
+    def series_treino(indice: int, quantidade: int) -> list[dict]:
+        # Instantes distintos por requisição (séries repetidas seriam ignoradas na gravação)
+        return [
+            {
+                "atleta_id": str(atleta(indice * quantidade + j)), "exercicio": ("Agachamento", "Supino", "Remada")[j % 3],
+                "repeticoes": 8 + j % 5, "carga": 40.0 + j % 60,
+                "realizado_em": (agora - timedelta(seconds=indice * quantidade + j)).isoformat(),
+            }
+            for j in range(quantidade)
+        ]
+
+    agora = datetime.utcnow()
+    unico = itertools.count()
+    return [
+        Cenario("POST /atletas/", "POST", "/atletas/", lambda i: {"json": novo_atleta(i)}, 201),
+        Cenario(
+            "POST /atletas/ (lote de 100)", "POST", "/atletas/",
+            lambda i: {"json": [novo_atleta(i * 100 + j) for j in range(100)]}, 201,
+        ),
+        Cenario("GET /atletas/", "GET", "/atletas/", lambda i: {}),
+        Cenario(
+            "GET /atletas/?nome=", "GET", "/atletas/",
+            lambda i: {"params": {"nome": f"Atleta {semente.marca} {i % 10}"}},
+        ),
+        Cenario(
+            "GET /atletas/?categoria=", "GET", "/atletas/",
+            lambda i: {"params": {"categoria": categoria(i)[1], "limit": 50}},
+        ),
+        # Nome com erro de digitação (busca por similaridade) e prefixo de CPF
+        Cenario(
+            "GET /atletas/search?q= (nome)", "GET", "/atletas/search",
+            lambda i: {"params": {"q": f"atelta {semente.marca} {i % 1000}"}},
+        ),
+        Cenario(
+            "GET /atletas/search?q= (CPF)", "GET", "/atletas/search",
+            lambda i: {"params": {"q": f"{i % 100:02d}"}},
+        ),
+        Cenario("GET /atletas/stats", "GET", "/atletas/stats", lambda i: {}),
+        Cenario("GET /categorias/stats", "GET", "/categorias/stats", lambda i: {}),
+        Cenario("GET /centros_treinamento/stats", "GET", "/centros_treinamento/stats", lambda i: {}),
+        # Exportação completa: o tempo cresce com --atletas, compare execuções com o mesmo tamanho
+        Cenario("GET /atletas/exportar (CSV)", "GET", "/atletas/exportar", lambda i: {}),
+        Cenario(
+            "GET /atletas/exportar (NDJSON gzip)", "GET", "/atletas/exportar",
+            lambda i: {"params": {"formato": "ndjson", "compressao": "gzip"}},
+        ),
+        Cenario("GET /atletas/{id}", "GET", "/atletas/{id}", lambda i: {"url": f"/atletas/{atleta(i)}"}),
+        # Chave quente: todas as requisições pedem o mesmo atleta (coalescência das leituras por id)
+        Cenario("GET /atletas/{id} (mesmo atleta)", "GET", "/atletas/{id}", lambda i: {"url": f"/atletas/{atleta(0)}"}),
+        # Placar com 200 atletas: uma requisição em vez de 200 GET /atletas/{id}
+        Cenario(
+            "POST /atletas/batch (200 ids)", "POST", "/atletas/batch",
+            lambda i: {"json": {"ids": [str(atleta(i * 200 + j)) for j in range(200)]}},
+        ),
+        Cenario(
+            "PATCH /atletas/{id}", "PATCH", "/atletas/{id}",
+            lambda i: {"url": f"/atletas/{atleta(i)}", "json": {"idade": 20 + i % 30, "categoria": {"nome": categoria(i)[1]}}},
+        ),
+        Cenario(
+            "DELETE /atletas/{id}", "DELETE", "/atletas/{id}",
+            lambda i: {"url": f"/atletas/{semente.atletas_descartaveis.pop()}"}, 204,
+        ),
+        Cenario(
+            "POST /categorias/", "POST", "/categorias/",
+            lambda i: {"json": {"nome": f"Nova {semente.marca} cat {next(unico)}"}}, 201,
+        ),
+        Cenario("GET /categorias/", "GET", "/categorias/", lambda i: {}),
+        Cenario("GET /categorias/{id}", "GET", "/categorias/{id}", lambda i: {"url": f"/categorias/{categoria(i)[0]}"}),
+        Cenario(
+            "DELETE /categorias/{id}", "DELETE", "/categorias/{id}",
+            lambda i: {"url": f"/categorias/{semente.categorias_descartaveis.pop()}"}, 204,
+        ),
+        Cenario(
+            "POST /centros_treinamento/", "POST", "/centros_treinamento/",
+            lambda i: {"json": {"nome": f"Novo {semente.marca} ct {next(unico)}", "endereco": "Rua", "proprietario": "Bench"}},
+            201,
+        ),
+        Cenario("GET /centros_treinamento/", "GET", "/centros_treinamento/", lambda i: {}),
+        Cenario(
+            "GET /centros_treinamento/{id}", "GET", "/centros_treinamento/{id}",
+            lambda i: {"url": f"/centros_treinamento/{centro(i)[0]}"},
+        ),
+        Cenario(
+            "DELETE /centros_treinamento/{id}", "DELETE", "/centros_treinamento/{id}",
+            lambda i: {"url": f"/centros_treinamento/{semente.centros_descartaveis.pop()}"}, 204,
+        ),
+        # Mede o recebimento do arquivo (202); o processamento segue em segundo plano
+        Cenario(
+            "POST /importacoes/atletas (CSV, 100 linhas)", "POST", "/importacoes/atletas",
+            lambda i: {"content": arquivo_csv(i), "headers": {"content-type": "text/csv"}}, 202,
+        ),
+        Cenario("GET /importacoes/{id}", "GET", "/importacoes/{id}", lambda i: {"url": f"/importacoes/{semente.importacao}"}),
+        Cenario(
+            "POST /treinos/series (lote de 1000)", "POST", "/treinos/series",
+            lambda i: {"json": series_treino(i, 1000)}, 201,
+        ),
+        Cenario(
+            "GET /treinos/atletas/{id}/series", "GET", "/treinos/atletas/{id}/series",
+            lambda i: {"url": f"/treinos/atletas/{atleta(i)}/series"},
+        ),
+        Cenario(
+            "GET /treinos/atletas/{id}/resumo", "GET", "/treinos/atletas/{id}/resumo",
+            lambda i: {"url": f"/treinos/atletas/{atleta(i)}/resumo", "params": {"periodo": "dia"}},
+        ),
+        Cenario(
+            "GET /importacoes/{id}/erros", "GET", "/importacoes/{id}/erros",
+            lambda i: {"url": f"/importacoes/{semente.importacao}/erros"},
+        ),
+    ]
+
+
+def rotas_sem_cenario(lista: list[Cenario]) -> list[str]:
+    cobertas = {(cenario.metodo, cenario.rota) for cenario in lista}
+    faltando = []
+    for rota in api_router.routes:
+        if not isinstance(rota, APIRoute):
+            continue
+        for metodo in sorted(rota.methods):
+            if (metodo, rota.path) not in cobertas:
+                faltando.append(f"{metodo} {rota.path}")
+    return faltando
+
+
+# --- Execução e medição ---
+
+def percentil(valores: list[float], p: float) -> float:
+    # Nearest-rank: o menor valor com pelo menos p% das amostras abaixo ou iguais
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+async def medir(
+    client: httpx.AsyncClient, cenario: Cenario, requisicoes: int, concorrencia: int, contar_consultas: bool
+) -> dict:
+    latencias: list[float] = []
+    erros: dict[str, int] = {}
+    consultas_informadas: list[int] = []
+    indices = iter(range(requisicoes))
+
+    async def trabalhador() -> None:
+        for indice in indices:
+            argumentos = {"url": cenario.rota, **cenario.requisicao(indice)}
+            inicio = time.perf_counter()
+            resposta = await client.request(cenario.metodo, **argumentos)
+            latencias.append(time.perf_counter() - inicio)
+            consultas = _consultas_server_timing(resposta)
+            if consultas is not None:
+                consultas_informadas.append(consultas)
+            if resposta.status_code != cenario.status_esperado:
+                chave = str(resposta.status_code)
+                if chave not in erros:
+                    print(f"  {cenario.rotulo}: status {chave}: {resposta.text[:200]}")
+                erros[chave] = erros.get(chave, 0) + 1
+
+    consultas_antes = _consultas_executadas
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+    consultas = _consultas_executadas - consultas_antes
+    if len(consultas_informadas) == requisicoes:
+        # O próprio servidor informou (Server-Timing): vale também no modo --url
+        consultas, contar_consultas = sum(consultas_informadas), True
+
+    return {
+        "rota": cenario.rotulo,
+        "requisicoes": requisicoes,
+        "erros": erros,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+        "req_por_s": round(requisicoes / duracao, 1),
+        "consultas_por_requisicao": round(consultas / requisicoes, 2) if contar_consultas else None,
+    }
+
+
+def _consultas_server_timing(resposta: httpx.Response) -> Optional[int]:
+    # Server-Timing: db;dur=1.23;desc="3 consultas", pool;dur=0.01, app;dur=4.56
+    encontrado = re.search(r'db;[^,]*desc="(\d+) consultas"', resposta.headers.get("server-timing", ""))
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def commit_atual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def imprimir(resultados: list[dict], base: Optional[dict]) -> None:
+    anteriores = {linha["rota"]: linha for linha in (base or {}).get("rotas", [])}
+    print(f"{'rota':<36} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'SQL/req':>8} {'erros':>6}")
+    for linha in resultados:
+        consultas = linha["consultas_por_requisicao"]
+        texto = (
+            f"{linha['rota']:<36} {linha['p50_ms']:>9.2f} {linha['p95_ms']:>9.2f} {linha['p99_ms']:>9.2f} "
+            f"{linha['req_por_s']:>9.1f} {'-' if consultas is None else consultas:>8} {sum(linha['erros'].values()):>6}"
+        )
+        anterior = anteriores.get(linha["rota"])
+        if anterior:
+            variacao = (linha["p95_ms"] - anterior["p95_ms"]) / anterior["p95_ms"] * 100 if anterior["p95_ms"] else 0.0
+            texto += f"   p95 {variacao:+.0f}% vs base"
+        print(texto)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.criar_tabelas:
+        async with engine.begin() as conn:
+            await conn.run_sync(BaseModel.metadata.create_all)
+
+    lote_extra = args.requisicoes + args.aquecimento
+    print(f"Semeando {args.categorias} categorias, {args.centros} centros e {args.atletas} atletas...")
+    semente = await semear(args.categorias, args.centros, args.atletas, descartaveis=lote_extra)
+
+    lista = [cenario for cenario in cenarios(semente) if not args.rotas or any(r in cenario.rotulo for r in args.rotas)]
+    for rota in rotas_sem_cenario(cenarios(semente)):
+        print(f"Aviso: a rota {rota} não tem cenário e ficou fora da medição")
+
+    servidor = tarefa_servidor = None
+    base_url = args.url or "http://bench"
+    if args.uvicorn:
+        import uvicorn
+
+        servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.porta, log_level="warning"))
+        tarefa_servidor = asyncio.create_task(servidor.serve())
+        while not servidor.started:
+            await asyncio.sleep(0.05)
+        base_url = f"http://127.0.0.1:{args.porta}"
+
+    if args.url or args.uvicorn:
+        transporte = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.concorrencia))
+        modo = "url" if args.url else "uvicorn"
+    else:
+        transporte = httpx.ASGITransport(app=app) # type: ignore
+        modo = "asgi"
+
+    resultados = []
+    try:
+        async with httpx.AsyncClient(transport=transporte, base_url=base_url, timeout=60.0) as client:
+            for cenario in lista:
+                if args.aquecimento:
+                    await medir(client, cenario, args.aquecimento, 1, contar_consultas=False)
+                resultados.append(
+                    await medir(client, cenario, args.requisicoes, args.concorrencia, contar_consultas=not args.url)
+                )
+    finally:
+        if servidor is not None:
+            servidor.should_exit = True
+            await tarefa_servidor # type: ignore
+        # No modo asgi não há lifespan: encerra as importações disparadas pelos cenários
+        await importacao.encerrar()
+        for engine_ in ENGINES.values():
+            await engine_.dispose()
+
+    base = json.loads(Path(args.comparar).read_text()) if args.comparar else None
+    imprimir(resultados, base)
+
+    commit = commit_atual()
+    saida = Path(args.saida) if args.saida else RESULTADOS / f"{commit}-{engine.dialect.name}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps({
+        "commit": commit,
+        "data": datetime.utcnow().isoformat(),
+        "banco": engine.dialect.name,
+        "modo": modo,
+        "parametros": {
+            "categorias": args.categorias,
+            "centros": args.centros,
+            "atletas": args.atletas,
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+            "aquecimento": args.aquecimento,
+        },
+        "rotas": resultados,
+    }, indent=2, ensure_ascii=False))
+    print(f"Resultados salvos em {saida}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categorias", type=int, default=10)
+    parser.add_argument("--centros", type=int, default=10)
+    parser.add_argument("--atletas", type=int, default=1000)
+    parser.add_argument("--requisicoes", type=int, default=500, help="requisições medidas por rota")
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--aquecimento", type=int, default=10, help="requisições descartadas antes de medir")
+    parser.add_argument("--rotas", nargs="*", help="mede só os cenários cujo rótulo contém um destes textos")
+    servidor_grupo = parser.add_mutually_exclusive_group()
+    servidor_grupo.add_argument("--uvicorn", action="store_true", help="sobe um uvicorn local e usa HTTP")
+    servidor_grupo.add_argument("--url", help="servidor já rodando, ex: http://localhost:8000")
+    parser.add_argument("--porta", type=int, default=8765, help="porta do --uvicorn")
+    parser.add_argument("--criar-tabelas", action="store_true", help="cria as tabelas (útil no SQLite)")
+    parser.add_argument("--saida", help="arquivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar o p95")
+    asyncio.run(main(parser.parse_args()))
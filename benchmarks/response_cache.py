@@ -0,0 +1,281 @@
+"""
+Verifica o RedisBackend e o ResponseCache contra um servidor RESP falso, local, no mesmo processo.
+
+O servidor falso implementa só o que o backend usa (AUTH, SELECT, GET, MGET, SET PX e INCR), com
+expiração e erros no formato do Redis; não precisa de Redis instalado. Verificações:
+- protocolo: GET/SET/MGET/INCR, valores binários, expiração do PX, AUTH e SELECT pela URL,
+  resposta de erro (-ERR) como RedisErro;
+- cache: falta, acerto, invalidação por tag, resposta gerada durante uma escrita nunca servida,
+  faltas simultâneas gerando uma vez só (single-flight) e servidor fora do ar (segue sem cache);
+- barramento: com backend compartilhado só o commit deste processo incrementa a geração, não os
+  eventos vindos de outros workers nem o RESET da reconexão.
+
+Ao final mede a latência de um acerto no cache (p50/p99) sobre o servidor falso.
+Sai com código 1 se alguma verificação falhar.
+
+Uso:
+    python -m benchmarks.response_cache [--acertos 2000]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Optional
+
+from fastapi import Response
+from workout_api.contrib.changes import RESET, ChangeBus, ChangeEvent
+from workout_api.contrib.response_cache import RedisBackend, RedisErro, ResponseCache
+
+
+class RedisFalso:
+    """Servidor RESP2 mínimo em memória, com uma base de chaves por SELECT e senha opcional."""
+
+    def __init__(self, senha: Optional[str] = None) -> None:
+        self.senha = senha
+        self.bases: dict[int, dict[bytes, tuple[Optional[float], bytes]]] = {}
+        self.comandos: list[bytes] = []
+        self._servidor: Optional[asyncio.base_events.Server] = None
+        self._conexoes: set[asyncio.Task] = set()
+        self.porta = 0
+
+    async def iniciar(self) -> None:
+        self._servidor = await asyncio.start_server(self._atender, "127.0.0.1", 0)
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+
+    async def parar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+            self._servidor = None
+        # Encerra as conexões ainda abertas antes de o loop terminar
+        for tarefa in self._conexoes:
+            tarefa.cancel()
+        await asyncio.gather(*self._conexoes, return_exceptions=True)
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        base, autenticado = 0, self.senha is None
+        tarefa = asyncio.current_task()
+        self._conexoes.add(tarefa) # type: ignore
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    return
+                args = []
+                for _ in range(int(linha[1:-2])):
+                    tamanho = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(tamanho + 2))[:-2])
+                comando = args[0].upper()
+                self.comandos.append(comando)
+                if comando == b"AUTH":
+                    autenticado = args[1].decode() == self.senha
+                    writer.write(b"+OK\r\n" if autenticado else b"-WRONGPASS invalid password\r\n")
+                elif not autenticado:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif comando == b"SELECT":
+                    base = int(args[1])
+                    writer.write(b"+OK\r\n")
+                else:
+                    writer.write(self._executar(self.bases.setdefault(base, {}), comando, args[1:]))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._conexoes.discard(tarefa) # type: ignore
+            writer.close()
+
+    @staticmethod
+    def _valor(dados: dict, chave: bytes) -> Optional[bytes]:
+        item = dados.get(chave)
+        if item is None:
+            return None
+        expira_em, valor = item
+        if expira_em is not None and expira_em <= time.monotonic():
+            del dados[chave]
+            return None
+        return valor
+
+    @staticmethod
+    def _bulk(valor: Optional[bytes]) -> bytes:
+        return b"$-1\r\n" if valor is None else b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+    def _executar(self, dados: dict, comando: bytes, args: list[bytes]) -> bytes:
+        if comando == b"GET":
+            return self._bulk(self._valor(dados, args[0]))
+        if comando == b"MGET":
+            return b"*%d\r\n" % len(args) + b"".join(self._bulk(self._valor(dados, chave)) for chave in args)
+        if comando == b"SET":
+            expira_em = None
+            if len(args) == 4 and args[2].upper() == b"PX":
+                expira_em = time.monotonic() + int(args[3]) / 1000
+            dados[args[0]] = (expira_em, args[1])
+            return b"+OK\r\n"
+        if comando == b"INCR":
+            atual = self._valor(dados, args[0])
+            if atual is not None and not atual.lstrip(b"-").isdigit():
+                return b"-ERR value is not an integer or out of range\r\n"
+            novo = int(atual or 0) + 1
+            dados[args[0]] = (None, str(novo).encode())
+            return b":%d\r\n" % novo
+        return b"-ERR unknown command '%s'\r\n" % comando
+
+
+class Verificacoes:
+    def __init__(self) -> None:
+        self.falhas = 0
+
+    def checar(self, descricao: str, condicao: bool, detalhe: object = "") -> None:
+        if condicao:
+            print(f"OK      {descricao}")
+        else:
+            self.falhas += 1
+            print(f"FALHOU  {descricao} {detalhe}")
+
+
+def _resposta(corpo: bytes, **headers: str) -> Response:
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+
+async def verificar_protocolo(v: Verificacoes) -> None:
+    servidor = RedisFalso(senha="s3nh@")
+    await servidor.iniciar()
+    backend = RedisBackend(f"redis://:s3nh%40@127.0.0.1:{servidor.porta}/2", timeout=1.0)
+    try:
+        await backend.set("a", b"\x00bin\r\nario", 60)
+        v.checar("SET/GET com valor binário", await backend.get("a") == b"\x00bin\r\nario")
+        v.checar("GET de chave inexistente", await backend.get("nada") is None)
+        v.checar("MGET", await backend.get_many(["a", "nada"]) == [b"\x00bin\r\nario", None])
+        v.checar("INCR", [await backend.incr("n"), await backend.incr("n")] == [1, 2])
+        v.checar("AUTH e SELECT pela URL", servidor.comandos[:2] == [b"AUTH", b"SELECT"] and 2 in servidor.bases)
+        await backend.set("curta", b"x", 0.05)
+        await asyncio.sleep(0.1)
+        v.checar("expiração do SET PX", await backend.get("curta") is None)
+        try:
+            await backend.incr("a")
+            v.checar("erro do servidor vira RedisErro", False, "nenhuma exceção")
+        except RedisErro:
+            v.checar("erro do servidor vira RedisErro", True)
+        v.checar("comandos seguintes após o erro", await backend.get("n") == b"2")
+    finally:
+        await backend.close()
+        await servidor.parar()
+
+
+async def verificar_cache(v: Verificacoes) -> None:
+    servidor = RedisFalso()
+    await servidor.iniciar()
+    backend = RedisBackend(f"redis://127.0.0.1:{servidor.porta}", timeout=1.0)
+    cache = ResponseCache(backend, ttl=60, prefixo="verificacao")
+    geradas = 0
+
+    async def gerar() -> Response:
+        nonlocal geradas
+        geradas += 1
+        return _resposta(b'{"n":%d}' % geradas, **{"X-Next-Cursor": "c1"})
+
+    try:
+        primeira = await cache.responder("atletas", {"limit": 10}, ("atletas",), gerar)
+        segunda = await cache.responder("atletas", {"limit": 10}, ("atletas",), gerar)
+        v.checar("falta gera, acerto serve o corpo guardado", (geradas, segunda.body) == (1, primeira.body))
+        v.checar("cabeçalhos guardados com o corpo", segunda.headers.get("x-next-cursor") == "c1")
+        extra = await cache.responder("atletas", {"limit": 10}, ("atletas",), gerar, headers={"ETag": '"e"'})
+        v.checar("cabeçalhos da requisição acrescentados", extra.headers.get("etag") == '"e"')
+
+        await cache.invalidar("atletas")
+        terceira = await cache.responder("atletas", {"limit": 10}, ("atletas",), gerar)
+        v.checar("invalidação da tag gera de novo", geradas == 2 and terceira.body == b'{"n":2}')
+
+        async def gerar_durante_escrita() -> Response:
+            # A escrita termina (e incrementa a geração) enquanto a resposta é gerada
+            await cache.invalidar("atletas")
+            return await gerar()
+
+        await cache.responder("atletas", {"limit": 20}, ("atletas",), gerar_durante_escrita)
+        depois = await cache.responder("atletas", {"limit": 20}, ("atletas",), gerar)
+        v.checar("resposta gerada durante uma escrita não é servida", depois.body == b'{"n":4}')
+
+        async def gerar_lenta() -> Response:
+            await asyncio.sleep(0.05)
+            return await gerar()
+
+        antes = geradas
+        await asyncio.gather(*(cache.responder("atletas", {"limit": 30}, ("atletas",), gerar_lenta) for _ in range(20)))
+        v.checar("faltas simultâneas geram uma vez (single-flight)", geradas == antes + 1, geradas - antes)
+
+        await servidor.parar()
+        await backend.close()
+        antes = geradas
+        fora = await cache.responder("atletas", {"limit": 10}, ("atletas",), gerar)
+        v.checar("servidor fora do ar: responde sem cache", fora.status_code == 200 and geradas == antes + 1)
+    finally:
+        await backend.close()
+        await servidor.parar()
+
+
+async def verificar_barramento(v: Verificacoes) -> None:
+    servidor = RedisFalso()
+    await servidor.iniciar()
+    backend = RedisBackend(f"redis://127.0.0.1:{servidor.porta}", timeout=1.0)
+    cache = ResponseCache(backend, ttl=60, prefixo="barramento")
+    barramento = ChangeBus()
+
+    async def invalidar(event: ChangeEvent) -> None:
+        await cache.invalidar(event.table)
+
+    barramento.subscribe(invalidar, local_only=backend.compartilhado)
+    try:
+        await barramento.dispatch(ChangeEvent("atletas", "insert"), local=True)
+        # O mesmo evento chegando pelo NOTIFY nos outros workers, e o RESET de uma reconexão
+        await barramento.dispatch(ChangeEvent("atletas", "insert"))
+        await barramento.dispatch(RESET)
+        v.checar(
+            "backend compartilhado: um INCR por escrita",
+            await backend.get("barramento:tag:atletas") == b"1" and servidor.comandos.count(b"INCR") == 1,
+            servidor.comandos,
+        )
+    finally:
+        await backend.close()
+        await servidor.parar()
+
+
+async def medir_acertos(acertos: int) -> None:
+    servidor = RedisFalso()
+    await servidor.iniciar()
+    backend = RedisBackend(f"redis://127.0.0.1:{servidor.porta}", timeout=1.0)
+    cache = ResponseCache(backend, ttl=60, prefixo="medicao")
+    corpo = b'{"status":"success","data":[' + b",".join([b'{"nome":"Atleta"}'] * 100) + b"]}"
+
+    async def gerar() -> Response:
+        return _resposta(corpo)
+
+    try:
+        await cache.responder("atletas", {"limit": 100}, ("atletas", "categorias"), gerar)
+        tempos = []
+        for _ in range(acertos):
+            inicio = time.perf_counter()
+            await cache.responder("atletas", {"limit": 100}, ("atletas", "categorias"), gerar)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+        print(
+            f"acerto no cache ({len(corpo)} bytes, servidor falso): "
+            f"p50 {statistics.median(tempos):.3f} ms, p99 {tempos[int(len(tempos) * 0.99) - 1]:.3f} ms"
+        )
+    finally:
+        await backend.close()
+        await servidor.parar()
+
+
+async def main(acertos: int) -> int:
+    v = Verificacoes()
+    await verificar_protocolo(v)
+    await verificar_cache(v)
+    await verificar_barramento(v)
+    await medir_acertos(acertos)
+    return 1 if v.falhas else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--acertos", type=int, default=2000, help="Acertos medidos no cache")
+    argumentos = parser.parse_args()
+    sys.exit(asyncio.run(main(argumentos.acertos)))
@@ -0,0 +1,113 @@
+"""
+Microbenchmark da serialização do envelope StandardResponseSuccess.
+
+Compara, para 1, 100 e 10.000 atletas:
+
+- atual: AtletaOut.model_validate por linha + revalidação/serialização pelo response_model do
+  FastAPI (serialize_response) + JSONResponse (json.dumps);
+- validado uma vez: AtletaOut.model_validate por linha + success_response (pydantic-core to_json);
+- linhas confiáveis: dicts no formato de AtletaOut vindos do banco + success_response.
+
+Uso:
+    python -m benchmarks.serialization [--tamanhos 1 100 10000] [--segundos 1.0]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from workout_api.atleta.schemas import AtletaOut
+from workout_api.responses.standard_responses import StandardResponseSuccess, success_response
+
+
+def _linhas(quantidade: int) -> list[dict]:
+    agora = datetime.utcnow()
+    return [
+        {
+            "id": uuid4(),
+            "created_at": agora,
+            "nome": f"Atleta {indice}",
+            "cpf": f"{indice:011d}",
+            "idade": 20 + indice % 30,
+            "peso": 60.0 + indice % 40,
+            "altura": 1.50 + (indice % 50) / 100,
+            "sexo": "MF"[indice % 2],
+            "categoria": {"nome": "Scale"},
+            "centro_treinamento": {"nome": "CT King"},
+        }
+        for indice in range(quantidade)
+    ]
+
+
+def _objetos_orm(linhas: list[dict]) -> list[SimpleNamespace]:
+    # Imita AtletaModel: atributos simples e relacionamentos como objetos
+    return [
+        SimpleNamespace(
+            **{chave: valor for chave, valor in linha.items() if chave not in ("categoria", "centro_treinamento")},
+            categoria=SimpleNamespace(**linha["categoria"]),
+            centro_treinamento=SimpleNamespace(**linha["centro_treinamento"]),
+        )
+        for linha in linhas
+    ]
+
+
+RESPONSE_FIELD = create_model_field(
+    name="Response_query_all_athletes", type_=StandardResponseSuccess[list[AtletaOut]], mode="serialization"
+)
+
+
+async def caminho_atual(objetos: list) -> bytes:
+    resposta = StandardResponseSuccess.create(data=[AtletaOut.model_validate(objeto) for objeto in objetos])
+    conteudo = await serialize_response(field=RESPONSE_FIELD, response_content=resposta)
+    return JSONResponse(conteudo).body
+
+
+async def caminho_validado_uma_vez(objetos: list) -> bytes:
+    return success_response([AtletaOut.model_validate(objeto) for objeto in objetos]).body
+
+
+async def caminho_linhas_confiaveis(linhas: list[dict]) -> bytes:
+    return success_response(linhas).body
+
+
+async def _medir(funcao, entrada, segundos: float) -> float:
+    # Repete até somar o tempo mínimo e devolve a média por chamada em milissegundos
+    await funcao(entrada)
+    repeticoes, inicio = 0, time.perf_counter()
+    while True:
+        await funcao(entrada)
+        repeticoes += 1
+        decorrido = time.perf_counter() - inicio
+        if decorrido >= segundos:
+            return decorrido / repeticoes * 1000
+
+
+async def main(tamanhos: list[int], segundos: float) -> None:
+    print(f"{'atletas':>8} {'atual (ms)':>12} {'validado 1x (ms)':>17} {'confiável (ms)':>15} {'ganho':>7}")
+    for quantidade in tamanhos:
+        linhas = _linhas(quantidade)
+        objetos = _objetos_orm(linhas)
+
+        # Os três caminhos precisam produzir o mesmo JSON
+        esperado = json.loads(await caminho_atual(objetos))
+        assert json.loads(await caminho_validado_uma_vez(objetos)) == esperado
+        assert json.loads(await caminho_linhas_confiaveis(linhas)) == esperado
+
+        atual = await _medir(caminho_atual, objetos, segundos)
+        validado = await _medir(caminho_validado_uma_vez, objetos, segundos)
+        confiavel = await _medir(caminho_linhas_confiaveis, linhas, segundos)
+        print(f"{quantidade:>8} {atual:>12.3f} {validado:>17.3f} {confiavel:>15.3f} {atual / confiavel:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--segundos", type=float, default=1.0, help="tempo mínimo de medição por caminho")
+    args = parser.parse_args()
+    asyncio.run(main(args.tamanhos, args.segundos))
@@ -0,0 +1,60 @@
+"""
+Servidor de produção da API.
+
+Sobe o uvicorn com N workers (processos), usando uvloop e httptools quando instalados. O
+processo principal só supervisiona: reinicia um worker que morrer e, no SIGTERM/SIGINT, repassa
+o sinal a todos. Cada worker para de aceitar conexões, espera as requisições em andamento por
+até SERVER_TIMEOUT_GRACEFUL_SHUTDOWN segundos e roda o desligamento do lifespan, que fecha os
+pools de conexões. Os padrões vêm de Settings (variáveis de ambiente ou .env).
+
+Uso:
+    python -m workout_api [--host 0.0.0.0] [--port 8000] [--workers 4] [--log-level info]
+"""
+import argparse
+import importlib.util
+from typing import Optional
+
+import uvicorn
+from workout_api.configs.settings import settings
+
+APP = "workout_api.main:app"
+
+
+def _instalado(modulo: str) -> bool:
+    return importlib.util.find_spec(modulo) is not None
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m workout_api", description="Servidor de produção da Workout API.")
+    parser.add_argument("--host", default=settings.SERVER_HOST, help="endereço de escuta (SERVER_HOST)")
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT, help="porta (SERVER_PORT)")
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS,
+        help="quantidade de processos (SERVER_WORKERS, padrão: número de CPUs)",
+    )
+    parser.add_argument(
+        "--log-level", default="info", choices=["critical", "error", "warning", "info", "debug", "trace"],
+    )
+    args = parser.parse_args(argv)
+
+    loop = "uvloop" if _instalado("uvloop") else "asyncio"
+    http = "httptools" if _instalado("httptools") else "h11"
+    print(f"Workout API em http://{args.host}:{args.port} com {args.workers} worker(s) (loop {loop}, http {http})")
+
+    # A aplicação vai como texto: cada worker a importa no próprio processo (engines e pools por worker)
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        lifespan="on",
+        log_level=args.log_level,
+        timeout_graceful_shutdown=settings.SERVER_TIMEOUT_GRACEFUL_SHUTDOWN,
+        timeout_keep_alive=settings.SERVER_TIMEOUT_KEEP_ALIVE,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.atleta.models import AtletaModel
+from workout_api.atleta.repository import select_atletas_flat
+from workout_api.contrib.changes import ChangeEvent, change_bus
+
+# Busca de atletas por nome (sem acentos, tolerante a erros de digitação) ou prefixo do CPF.
+#
+# No Postgres a busca usa o pg_trgm: similaridade por palavra (%>) entre o termo e o nome
+# normalizado, ordenada pela distância (<->>) direto do índice GiST, que entrega os N mais
+# próximos sem ordenar todos os candidatos. Nos outros bancos (SQLite nos testes) um índice de
+# trigramas em memória faz a mesma conta.
+
+# Similaridade mínima, a mesma do padrão do pg_trgm (pg_trgm.word_similarity_threshold)
+LIMIAR_SIMILARIDADE = 0.6
+
+# Atletas alterados acumulados entre duas buscas acima dos quais o índice é recarregado inteiro
+MAXIMO_PENDENTES = 5000
+
+
+def normalizar(texto: str) -> str:
+    # Equivalente em Python de normalizar_texto() no banco: sem acentos e em minúsculas
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere)).lower()
+
+
+def trigramas(texto: str) -> set[str]:
+    """Trigramas como os do pg_trgm: por palavra, com dois espaços antes e um depois."""
+    resultado: set[str] = set()
+    for palavra in re.findall(r"[^\W_]+", normalizar(texto)):
+        palavra = f"  {palavra} "
+        resultado.update(palavra[indice:indice + 3] for indice in range(len(palavra) - 2))
+    return resultado
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido trigrama -> atletas, em memória, para a busca fora do Postgres.
+
+    A similaridade é a fração dos trigramas do termo presentes no nome (aproximação da
+    word_similarity do pg_trgm). Os eventos com os pk_id alterados (cadastro, atualização e
+    remoção pela API) atualizam só esses atletas na próxima busca; um evento sem ids (importação,
+    reset) recarrega a tabela. Serve aos testes e ao desenvolvimento, não a produção.
+    """
+
+    def __init__(self) -> None:
+        self._por_trigrama: dict[str, set[int]] = defaultdict(set)
+        self._por_atleta: dict[int, set[str]] = {}
+        self._pendentes: set[int] = set()
+        self._geracao = 0
+        self._geracao_carregada = -1
+        self._lock = asyncio.Lock()
+
+    def invalidar(self) -> None:
+        self._geracao += 1
+
+    def alterados(self, ids) -> None:
+        self._pendentes.update(ids)
+        if len(self._pendentes) > MAXIMO_PENDENTES:
+            self._pendentes.clear()
+            self.invalidar()
+
+    def _indexar(self, pk_id: int, nome: str) -> None:
+        self._por_atleta[pk_id] = trigramas(nome)
+        for trigrama in self._por_atleta[pk_id]:
+            self._por_trigrama[trigrama].add(pk_id)
+
+    def _remover(self, pk_id: int) -> None:
+        for trigrama in self._por_atleta.pop(pk_id, ()):
+            self._por_trigrama[trigrama].discard(pk_id)
+
+    async def _garantir(self, session: AsyncSession) -> None:
+        # Com uma atualização em andamento a busca espera por ela no lock
+        if self._geracao_carregada == self._geracao and not self._pendentes and not self._lock.locked():
+            return
+        async with self._lock:
+            geracao = self._geracao
+            if self._geracao_carregada != geracao:
+                # As alterações anteriores à carga já estão nela
+                self._pendentes.clear()
+                por_trigrama: dict[str, set[int]] = defaultdict(set)
+                por_atleta: dict[int, set[str]] = {}
+                for pk_id, nome in (await session.execute(select(AtletaModel.pk_id, AtletaModel.nome))).all():
+                    por_atleta[pk_id] = trigramas(nome)
+                    for trigrama in por_atleta[pk_id]:
+                        por_trigrama[trigrama].add(pk_id)
+                self._por_trigrama, self._por_atleta = por_trigrama, por_atleta
+                # Uma escrita durante a carga mantém o índice inválido para a próxima busca
+                self._geracao_carregada = geracao
+            if self._pendentes:
+                pendentes, self._pendentes = self._pendentes, set()
+                try:
+                    nomes = dict((await session.execute(
+                        select(AtletaModel.pk_id, AtletaModel.nome).where(AtletaModel.pk_id.in_(pendentes))
+                    )).all())
+                except BaseException:
+                    self._pendentes |= pendentes
+                    raise
+                # Os que não voltaram foram removidos
+                for pk_id in pendentes:
+                    self._remover(pk_id)
+                    if pk_id in nomes:
+                        self._indexar(pk_id, nomes[pk_id])
+
+    async def buscar(self, session: AsyncSession, termo: str, limite: int) -> list[tuple[int, float]]:
+        """(pk_id, similaridade) dos atletas mais parecidos com o termo, do mais para o menos."""
+        await self._garantir(session)
+        do_termo = trigramas(termo)
+        if not do_termo:
+            return []
+        contagem: Counter = Counter()
+        for trigrama in do_termo:
+            contagem.update(self._por_trigrama.get(trigrama, ()))
+        minimo = math.ceil(LIMIAR_SIMILARIDADE * len(do_termo))
+        candidatos = ((pk_id, comuns / len(do_termo)) for pk_id, comuns in contagem.items() if comuns >= minimo)
+        return heapq.nlargest(limite, candidatos, key=lambda candidato: (candidato[1], -candidato[0]))
+
+
+indice_trigramas = IndiceTrigramas()
+
+
+def _invalidar_por_evento(event: ChangeEvent) -> None:
+    if event.table == "atletas" and event.ids:
+        indice_trigramas.alterados(event.ids)
+    elif event.table in ("atletas", "*"):
+        indice_trigramas.invalidar()
+
+
+change_bus.subscribe(_invalidar_por_evento)
+
+
+def select_busca_cpf(termo: str, limite: int, postgres: bool):
+    """Atletas cujo CPF começa com termo, em ordem de CPF."""
+    # No Postgres a ordem é a do operador do índice ix_atletas_cpf_pattern (varchar_pattern_ops),
+    # que então entrega os primeiros CPFs sem ordenar os candidatos; com só dígitos ela é igual
+    # à de qualquer collation
+    ordem = text("atletas.cpf USING ~<~") if postgres else AtletaModel.cpf
+    return (
+        select_atletas_flat()
+        .where(AtletaModel.cpf.startswith(termo, autoescape=True))
+        .order_by(ordem)
+        .limit(limite)
+    )
+
+
+def select_busca_nome(termo: str, limite: int):
+    """Busca por nome no Postgres, com a distância (0 a 1) ao termo na coluna distancia."""
+    # Coluna indexada à esquerda dos operadores, como no índice ix_atletas_nome_trgm
+    nome_normalizado = func.normalizar_texto(AtletaModel.nome)
+    termo_normalizado = func.normalizar_texto(termo)
+    distancia = nome_normalizado.op("<->>", return_type=AtletaModel.peso.type)(termo_normalizado)
+    return (
+        select_atletas_flat()
+        .add_columns(distancia.label("distancia"))
+        .where(nome_normalizado.op("%>")(termo_normalizado))
+        .order_by(distancia)
+        .limit(limite)
+    )
+
+
+async def buscar_atletas(session: AsyncSession, termo: str, limite: int) -> list[tuple[Any, float]]:
+    """Linhas de select_atletas_flat() com a relevância (0 a 1), da mais para a menos relevante."""
+    termo = termo.strip()
+    postgres = session.bind.dialect.name == "postgresql"
+
+    if termo.isdigit():
+        stmt = select_busca_cpf(termo, limite, postgres)
+        return [(linha, 1.0) for linha in (await session.execute(stmt)).all()]
+
+    if postgres:
+        stmt = select_busca_nome(termo, limite)
+        return [(linha, round(1 - linha.distancia, 3)) for linha in (await session.execute(stmt)).all()]
+
+    encontrados = await indice_trigramas.buscar(session, termo, limite)
+    if not encontrados:
+        return []
+    linhas = {
+        linha.pk_id: linha
+        for linha in (await session.execute(
+            select_atletas_flat().where(AtletaModel.pk_id.in_([pk_id for pk_id, _ in encontrados]))
+        )).all()
+    }
+    return [(linhas[pk_id], round(similaridade, 3)) for pk_id, similaridade in encontrados if pk_id in linhas]
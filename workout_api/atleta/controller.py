@@ -1,19 +1,67 @@
+import logging
 from datetime import datetime
 from fastapi import HTTPException
 from uuid import uuid4
-from fastapi import APIRouter, Body, status
+from fastapi import APIRouter, Body, Header, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import UUID4
+from workout_api.atleta.busca import buscar_atletas
+from workout_api.atleta.exportacao import FORMATOS, FormatoIndisponivel, exportar, verificar_disponibilidade
 from workout_api.atleta.models import AtletaModel
-from workout_api.atleta.schemas import AtletaIn, AtletaOut, AtletaUpdate
+from workout_api.atleta.repository import (
+    CursorInvalido,
+    aplicar_cursor,
+    aplicar_filtros,
+    codificar_cursor,
+    colunas_atleta_flat,
+    linha_para_atleta,
+    select_atletas_exportacao,
+    select_atletas_flat,
+    select_atletas_por_chaves,
+)
+from workout_api.atleta.schemas import AtletaBuscaOut, AtletaIn, AtletaLoteIn, AtletaLoteOut, AtletaOut, AtletaUpdate
 from workout_api.categorias.models import CategoriaModel
 from workout_api.centro_treinamento.models import CentroTreinamentoModel
-from workout_api.contrib.dependencies import DatabaseDependency
+from workout_api.configs.database import async_session, read_session
+from workout_api.configs.settings import settings
+from workout_api.contrib.changes import ChangeEvent, commit_and_publish
+from workout_api.contrib.coalescing import request_coalescer
+from workout_api.contrib.dependencies import DatabaseDependency, ReadDatabaseDependency
+from workout_api.contrib.http_cache import cabecalhos_cache, etags_recebidos, table_versions
+from workout_api.contrib.idempotency import idempotency_store
+from workout_api.contrib.reference_cache import categorias_cache, centros_treinamento_cache
+from workout_api.contrib.response_cache import response_cache
+from workout_api.feed.repository import registrar_eventos
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-from workout_api.responses.standard_responses import StandardResponseSuccess, StandardResponseError 
-import pytz
-from typing import Union, List # Importando Union e List para aceitar um ou múltiplos atletas
+from pydantic_core import to_json
+from workout_api.responses.standard_responses import StandardJSONResponse, StandardResponseSuccess, StandardResponseError, success_response
+from typing import Literal, Optional, Union, List # Importando Union e List para aceitar um ou múltiplos atletas
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo de cada lote de parâmetros enviados em uma única consulta IN (...)
+# (o asyncpg limita uma instrução a 32767 parâmetros)
+TAMANHO_LOTE_CONSULTA = 5000
+
+
+def _em_lotes(valores: list, tamanho: int = TAMANHO_LOTE_CONSULTA):
+    # Divide uma lista em fatias para não estourar o limite de parâmetros do driver
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+
+async def _cpfs_existentes(db_session, cpfs: list[str]) -> set[str]:
+    # Uma única consulta IN (...) por lote em vez de um SELECT por atleta
+    existentes: set[str] = set()
+    for lote in _em_lotes(cpfs):
+        existentes.update((await db_session.execute(
+            select(AtletaModel.cpf).where(AtletaModel.cpf.in_(lote))
+        )).scalars().all())
+    return existentes
+
 
 # Criando um novo atleta ou múltiplos atletas
 @router.post(
@@ -21,109 +69,203 @@ router = APIRouter()
      summary="Criando um novo atleta ou múltiplos atletas",
      status_code=status.HTTP_201_CREATED,
      # A resposta pode ser um único AtletaOut ou uma lista de AtletaOut
-     response_model=StandardResponseSuccess[Union[AtletaOut, List[AtletaOut]]] 
+     response_model=StandardResponseSuccess[Union[AtletaOut, List[AtletaOut]]],
+     description=(
+        "Com o cabeçalho Idempotency-Key, a repetição da requisição (mesma chave e mesmo corpo) "
+        f"nas próximas {settings.IDEMPOTENCY_TTL_HOURS} horas recebe a resposta da primeira, com "
+        "Idempotent-Replayed: true, sem cadastrar de novo. Repetições simultâneas esperam a primeira."
+     ),
 )
 async def post(
+    request: Request,
     db_session: DatabaseDependency,
     # Aceita um único objeto AtletaIn ou uma lista de objetos AtletaIn
-    atleta_data_input: Union[AtletaIn, List[AtletaIn]] = Body(...) 
+    atleta_data_input: Union[AtletaIn, List[AtletaIn]] = Body(...),
+    idempotency_key: Optional[str] = Header(None, description="Chave única da operação, repetida pelo cliente nas novas tentativas"),
 ):
-    # Lista para armazenar os atletas criados com sucesso
-    created_athletes_out = []
-    
-    # Normaliza a entrada para sempre ser uma lista para facilitar a iteração
-    if not isinstance(atleta_data_input, list):
-        atleta_data_input = [atleta_data_input]
-
-    for atleta_in in atleta_data_input:
-        # Verificando se já existe um atleta com o CPF duplicado
-        atleta_existente = (await db_session.execute(
-            select(AtletaModel).filter_by(cpf=atleta_in.cpf)
-        )).scalars().first()
-
-        if atleta_existente:
-            # Levanta um erro se o CPF já existe, interrompendo o processamento do lote
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Já existe um atleta cadastrado com o CPF '{atleta_in.cpf}'. Não foi possível processar o lote."
-            )
+    # O corpo já foi lido pelo FastAPI para validar a entrada: request.body() não lê de novo.
+    # Com a chave, a rota roda em outra sessão, na transação que grava a resposta
+    return await idempotency_store.responder(
+        "POST /atletas/", idempotency_key, await request.body(), db_session,
+        lambda session: _criar_atletas(session, atleta_data_input),
+    )
 
-        # Verificando se a categoria existe
-        categoria_nome = atleta_in.categoria.nome.strip()
-        categoria = (await db_session.execute(
-            select(CategoriaModel).filter_by(nome=categoria_nome))
-        ).scalars().first()
 
-        if not categoria:
-            # Levanta um erro se a categoria não for encontrada
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"A categoria '{categoria_nome}' não foi encontrada para o atleta com CPF '{atleta_in.cpf}'. Não foi possível processar o lote."
-            )
+async def _criar_atletas(db_session, atleta_data_input: Union[AtletaIn, List[AtletaIn]]) -> StandardJSONResponse:
+    # Guardando o formato original da entrada para devolver a resposta no mesmo formato
+    entrada_unica = not isinstance(atleta_data_input, list)
+
+    # Normaliza a entrada para sempre ser uma lista para facilitar o processamento em lote
+    atletas_in: List[AtletaIn] = [atleta_data_input] if entrada_unica else atleta_data_input # type: ignore
+
+    if not atletas_in:
+        return success_response([], status_code=status.HTTP_201_CREATED)
+
+    # Verificando CPFs duplicados dentro do próprio lote e já cadastrados no banco
+    cpfs = [atleta_in.cpf for atleta_in in atletas_in]
+    cpfs_vistos: set[str] = set()
+    cpfs_repetidos_no_lote: list[str] = []
+    for cpf in cpfs:
+        if cpf in cpfs_vistos and cpf not in cpfs_repetidos_no_lote:
+            cpfs_repetidos_no_lote.append(cpf)
+        cpfs_vistos.add(cpf)
+
+    cpfs_ja_cadastrados = await _cpfs_existentes(db_session, list(cpfs_vistos))
 
-        # Verificando se o centro de treinamento existe
+    if cpfs_ja_cadastrados or cpfs_repetidos_no_lote:
+        # Reporta todos os CPFs em conflito de uma vez, sem processar nenhum atleta do lote
+        cpfs_em_conflito = [cpf for cpf in dict.fromkeys(cpfs) if cpf in cpfs_ja_cadastrados or cpf in cpfs_repetidos_no_lote]
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": (
+                    f"Já existe atleta cadastrado ou repetido no lote com o(s) CPF(s) "
+                    f"{', '.join(repr(cpf) for cpf in cpfs_em_conflito)}. Não foi possível processar o lote."
+                ),
+                "details": {
+                    "cpfs_ja_cadastrados": [cpf for cpf in cpfs_em_conflito if cpf in cpfs_ja_cadastrados],
+                    "cpfs_repetidos_no_lote": cpfs_repetidos_no_lote,
+                },
+            },
+        )
+
+    # Resolvendo todas as categorias e centros de treinamento pelo cache de referência
+    categorias = await categorias_cache.pk_ids_por_nome(
+        {atleta_in.categoria.nome.strip() for atleta_in in atletas_in}, db_session
+    )
+    centros_treinamento = await centros_treinamento_cache.pk_ids_por_nome(
+        {atleta_in.centro_treinamento.nome.strip() for atleta_in in atletas_in}, db_session
+    )
+
+    erros_referencia = []
+    for atleta_in in atletas_in:
+        categoria_nome = atleta_in.categoria.nome.strip()
+        if categoria_nome not in categorias:
+            erros_referencia.append({
+                "cpf": atleta_in.cpf,
+                "campo": "categoria",
+                "message": f"A categoria '{categoria_nome}' não foi encontrada para o atleta com CPF '{atleta_in.cpf}'.",
+            })
         centro_treinamento_nome = atleta_in.centro_treinamento.nome.strip()
-        centro_treinamento = (await db_session.execute(
-            select(CentroTreinamentoModel).filter_by(nome=centro_treinamento_nome))
-        ).scalars().first()
+        if centro_treinamento_nome not in centros_treinamento:
+            erros_referencia.append({
+                "cpf": atleta_in.cpf,
+                "campo": "centro_treinamento",
+                "message": f"O centro de treinamento '{centro_treinamento_nome}' não foi encontrado para o atleta com CPF '{atleta_in.cpf}'.",
+            })
 
-        if not centro_treinamento:
-            # Levanta um erro se o centro de treinamento não for encontrado
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"O centro de treinamento '{centro_treinamento_nome}' não foi encontrado para o atleta com CPF '{atleta_in.cpf}'. Não foi possível processar o lote."
-            )
-        
-        try:
-            # Obtendo a hora atual em UTC para gravação no banco de dados
-            hora_utc = datetime.utcnow()
-            
-            # Criando o objeto AtletaOut com um novo ID e a data de criação
-            atleta_out = AtletaOut(
-                id=uuid4(), 
-                created_at= hora_utc,
-                **atleta_in.model_dump()
-            )
-            # Criando o AtletaModel para persistência no banco de dados
-            atleta_model = AtletaModel(**atleta_out.model_dump(exclude={'categoria', 'centro_treinamento'}))
-
-            # Atribuindo os IDs das categorias e centros de treinamento
-            atleta_model.categoria_id = categoria.pk_id
-            atleta_model.centro_treinamento_id = centro_treinamento.pk_id
-
-            # Adicionando o modelo do atleta à sessão do banco de dados
-            db_session.add(atleta_model)
-            
-            # Adicionando o objeto de saída do atleta à lista de retorno
-            created_athletes_out.append(atleta_out) 
-
-        except Exception as e:
-            # Captura erros inesperados durante a criação de um atleta no lote
-            print(f"Erro ao criar atleta com CPF {atleta_in.cpf}: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Erro ao criar o atleta com CPF '{atleta_in.cpf}'. Por favor, tente novamente. Detalhes: {e}"
-            )
-    
-    # Commitando todos os atletas adicionados na sessão de uma vez (transação)
-    await db_session.commit()
-    
-    # Refrescando os modelos para carregar os relacionamentos para o retorno completo
-    final_athletes_out = []
-    for atleta_out_item in created_athletes_out:
-        atleta_model_from_db = (await db_session.execute(select(AtletaModel).filter_by(id=atleta_out_item.id))).scalars().first()
-        if atleta_model_from_db:
-            await db_session.refresh(atleta_model_from_db)
-            final_athletes_out.append(AtletaOut.model_validate(atleta_model_from_db))
+    if erros_referencia:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "message": (
+                    f"{len(erros_referencia)} referência(s) inválida(s) de categoria ou centro de treinamento. "
+                    f"Não foi possível processar o lote."
+                ),
+                "details": {"erros": erros_referencia},
+            },
+        )
+
+    # Obtendo a hora atual em UTC para gravação no banco de dados
+    hora_utc = datetime.utcnow()
+
+    # Montando as linhas já com as chaves estrangeiras resolvidas
+    linhas = [
+        {
+            "id": uuid4(),
+            "created_at": hora_utc,
+            **atleta_in.model_dump(exclude={'categoria', 'centro_treinamento'}),
+            "categoria_id": categorias[atleta_in.categoria.nome.strip()],
+            "centro_treinamento_id": centros_treinamento[atleta_in.centro_treinamento.nome.strip()],
+        }
+        for atleta_in in atletas_in
+    ]
 
+    try:
+        # INSERT ... VALUES (...), (...) RETURNING em lotes (insertmanyvalues do SQLAlchemy). No
+        # Postgres/asyncpg um lote de 20 atletas vira um único INSERT, ordenado pelo pk_id; o SQLite
+        # não garante a ordem do RETURNING e executa um INSERT por linha
+        resultado = await db_session.execute(
+            insert(AtletaModel).returning(
+                AtletaModel.pk_id,
+                AtletaModel.id,
+                AtletaModel.created_at,
+                AtletaModel.nome,
+                AtletaModel.cpf,
+                AtletaModel.idade,
+                AtletaModel.peso,
+                AtletaModel.altura,
+                AtletaModel.sexo,
+                AtletaModel.categoria_id,
+                AtletaModel.centro_treinamento_id,
+                sort_by_parameter_order=True,
+            ),
+            linhas,
+        )
+        atletas_inseridos = resultado.mappings().all()
+
+        # Montando a resposta diretamente das linhas retornadas, sem reconsultar o banco
+        # (as linhas já têm o formato de AtletaOut, então são serializadas sem nova validação)
+        nomes_categorias = {pk_id: nome for nome, pk_id in categorias.items()}
+        nomes_centros_treinamento = {pk_id: nome for nome, pk_id in centros_treinamento.items()}
+        final_athletes_out = [
+            {
+                **{chave: valor for chave, valor in linha.items() if chave not in ('pk_id', 'categoria_id', 'centro_treinamento_id')},
+                "categoria": {"nome": nomes_categorias[linha["categoria_id"]]},
+                "centro_treinamento": {"nome": nomes_centros_treinamento[linha["centro_treinamento_id"]]},
+            }
+            for linha in atletas_inseridos
+        ]
+
+        # Commitando todos os atletas do lote de uma vez (transação), com os eventos do feed, e avisando os workers
+        await registrar_eventos(db_session, "atletas", "insert", [(atleta["id"], atleta) for atleta in final_athletes_out])
+        await commit_and_publish(
+            db_session, ChangeEvent(table="atletas", op="insert", ids=tuple(linha["pk_id"] for linha in atletas_inseridos))
+        )
+    except IntegrityError:
+        # Um CPF pode ter sido cadastrado por outra requisição entre a verificação e o INSERT
+        await db_session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Um ou mais CPFs do lote foram cadastrados por outra requisição. Não foi possível processar o lote."
+        )
+    except Exception:
+        # Captura erros inesperados durante a criação do lote. O texto da exceção (SQL, nomes de
+        # constraints) fica só no log do servidor, com o traceback
+        await db_session.rollback()
+        logger.exception("Erro ao criar lote de atletas")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao criar o lote de atletas. Por favor, tente novamente."
+        )
 
     # Retornando o schema de sucesso padronizado
     # Se a entrada original foi um único atleta, retorna um único atleta.
     # Se a entrada original foi uma lista, retorna a lista de atletas.
-    if len(final_athletes_out) == 1 and not isinstance(Body(...), list): # Verifica o tipo original da entrada
-        return StandardResponseSuccess.create(data=final_athletes_out[0])
+    if entrada_unica:
+        return success_response(final_athletes_out[0], status_code=status.HTTP_201_CREATED)
     else:
-        return StandardResponseSuccess.create(data=final_athletes_out)
+        return success_response(final_athletes_out, status_code=status.HTTP_201_CREATED)
+
+# Tamanho padrão e máximo de uma página da listagem de atletas
+LIMITE_PADRAO_PAGINA = 100
+LIMITE_MAXIMO_PAGINA = 1000
+# Tamanho padrão e máximo do resultado da busca
+LIMITE_PADRAO_BUSCA = 20
+LIMITE_MAXIMO_BUSCA = 100
+# Quantidade máxima de ids ou CPFs em uma consulta em lote
+LIMITE_MAXIMO_LOTE = 500
+# Quantidade de linhas lidas do cursor do servidor a cada ida ao banco no modo streaming
+TAMANHO_LOTE_STREAMING = 500
+
+
+async def _stream_atletas_ndjson(stmt):
+    # Sessão própria: a sessão da dependência é fechada antes do corpo da resposta ser enviado
+    async with read_session() as session:
+        resultado = await session.stream(stmt.execution_options(yield_per=TAMANHO_LOTE_STREAMING))
+        async for linhas in resultado.partitions():
+            yield b"".join(to_json(linha_para_atleta(linha)) + b"\n" for linha in linhas)
+
 
 # Listando todos os atletas
 @router.get(
@@ -131,14 +273,176 @@ async def post(
      summary="Consultando todos os atletas",
      status_code=status.HTTP_200_OK,
     response_model=StandardResponseSuccess[list[AtletaOut]], 
+    description=(
+        "Lista os atletas paginados por cursor em ordem de criação. O cursor da próxima página "
+        "é devolvido no cabeçalho X-Next-Cursor. Com stream=true, todos os atletas a partir do "
+        "cursor são enviados como NDJSON (um atleta por linha), ignorando o limit."
+    ),
 )
-async def query_all_athletes(db_session: DatabaseDependency,) -> StandardResponseSuccess[list[AtletaOut]]: 
-    # Consultando todos os atletas no banco de dados
-    atletas_models: list[AtletaModel] = (await db_session.execute(select(AtletaModel))).scalars().all() # type: ignore
+async def query_all_athletes(
+    limit: int = Query(LIMITE_PADRAO_PAGINA, ge=1, le=LIMITE_MAXIMO_PAGINA, description="Quantidade máxima de atletas na página"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido em X-Next-Cursor pela página anterior"),
+    nome: Optional[str] = Query(None, description="Prefixo do nome do atleta (sem diferenciar maiúsculas)"),
+    cpf: Optional[str] = Query(None, description="CPF do atleta"),
+    categoria: Optional[str] = Query(None, description="Nome da categoria"),
+    centro_treinamento: Optional[str] = Query(None, description="Nome do centro de treinamento"),
+    stream: bool = Query(False, description="Envia todos os atletas como NDJSON em streaming"),
+): 
+    try:
+        stmt = aplicar_cursor(
+            aplicar_filtros(select_atletas_flat(), nome, cpf, categoria, centro_treinamento), cursor
+        )
+    except CursorInvalido:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cursor de paginação inválido: '{cursor}'.",
+        )
 
+    if stream:
+        return StreamingResponse(_stream_atletas_ndjson(stmt), media_type="application/x-ndjson")
 
-    # Mapeando modelos SQLAlchemy para schemas Pydantic e retornando no formato padronizado
-    return StandardResponseSuccess.create(data=[AtletaOut.model_validate(atleta) for atleta in atletas_models])
+    # A resposta traz os nomes de categoria e centro, então depende das três tabelas
+    tabelas = ("atletas", "categorias", "centros_treinamento")
+
+    async def gerar() -> StandardJSONResponse:
+        # Buscando uma linha a mais para saber se existe próxima página (na réplica, salvo logo após uma escrita)
+        async with response_cache.sessao(tabelas) as db_session:
+            linhas = (await db_session.execute(stmt.limit(limit + 1))).all()
+
+        headers = {}
+        if len(linhas) > limit:
+            linhas = linhas[:limit]
+            headers["X-Next-Cursor"] = codificar_cursor(linhas[-1].created_at, linhas[-1].pk_id)
+
+        # Linhas do banco já no formato de AtletaOut, serializadas uma única vez no envelope padronizado
+        return success_response([linha_para_atleta(linha) for linha in linhas], headers=headers)
+
+    # Página já serializada no cache de respostas, pelos parâmetros normalizados da consulta
+    params = {
+        "limit": limit,
+        "cursor": cursor,
+        "nome": nome.strip().lower() if nome else None,
+        "cpf": cpf.strip() if cpf else None,
+        "categoria": categoria.strip() if categoria else None,
+        "centro_treinamento": centro_treinamento.strip() if centro_treinamento else None,
+    }
+    return await response_cache.responder("atletas", params, tabelas, gerar) # type: ignore
+
+
+# Exportando todos os atletas em um arquivo (declarada antes de /{id} para não ser lida como um ID)
+@router.get(
+    "/exportar",
+     summary="Exportando os atletas em CSV, NDJSON, Parquet ou Arrow",
+     status_code=status.HTTP_200_OK,
+     response_class=StreamingResponse,
+     description=(
+        "Envia todos os atletas (com os filtros da listagem) em um único arquivo, em streaming e "
+        "com memória constante no servidor. No Postgres o CSV sai direto do COPY TO STDOUT. "
+        "Com compressao=gzip ou zstd o arquivo é comprimido durante o envio (Content-Encoding). "
+        "Parquet e Arrow precisam do pyarrow e zstd do zstandard instalados no servidor."
+     ),
+)
+async def export_athletes(
+    formato: Literal["csv", "ndjson", "parquet", "arrow"] = Query("csv", description="Formato do arquivo"),
+    compressao: Optional[Literal["gzip", "zstd"]] = Query(None, description="Compressão aplicada durante o envio"),
+    nome: Optional[str] = Query(None, description="Prefixo do nome do atleta (sem diferenciar maiúsculas)"),
+    cpf: Optional[str] = Query(None, description="CPF do atleta"),
+    categoria: Optional[str] = Query(None, description="Nome da categoria"),
+    centro_treinamento: Optional[str] = Query(None, description="Nome do centro de treinamento"),
+) -> StreamingResponse:
+    try:
+        verificar_disponibilidade(formato, compressao)
+    except FormatoIndisponivel as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    stmt = aplicar_cursor(aplicar_filtros(select_atletas_exportacao(), nome, cpf, categoria, centro_treinamento), None)
+
+    headers = {"Content-Disposition": f'attachment; filename="atletas.{formato}"'}
+    if compressao:
+        headers["Content-Encoding"] = compressao
+    return StreamingResponse(exportar(stmt, formato, compressao), media_type=FORMATOS[formato], headers=headers)
+
+
+# Buscando atletas por nome ou CPF (declarada antes de /{id} para não ser lida como um ID)
+@router.get(
+    "/search",
+     summary="Buscando atletas por nome ou CPF",
+     status_code=status.HTTP_200_OK,
+    response_model=StandardResponseSuccess[list[AtletaBuscaOut]],
+    description=(
+        "Busca atletas pelo nome, sem diferenciar acentos e maiúsculas e tolerando erros de "
+        "digitação, ou pelo prefixo do CPF quando o termo tem só dígitos. Os atletas vêm do mais "
+        "para o menos relevante, até o limit."
+    ),
+)
+async def search_athletes(
+    q: str = Query(..., min_length=2, max_length=50, description="Nome (ou parte dele) ou prefixo do CPF"),
+    limit: int = Query(LIMITE_PADRAO_BUSCA, ge=1, le=LIMITE_MAXIMO_BUSCA, description="Quantidade máxima de atletas"),
+) -> StandardJSONResponse:
+    termo = q.strip()
+    if len(termo) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O termo de busca precisa de pelo menos 2 caracteres.",
+        )
+
+    tabelas = ("atletas", "categorias", "centros_treinamento")
+
+    async def gerar() -> StandardJSONResponse:
+        async with response_cache.sessao(tabelas) as db_session:
+            encontrados = await buscar_atletas(db_session, termo, limit)
+        return success_response([
+            {**linha_para_atleta(linha), "relevancia": relevancia} for linha, relevancia in encontrados
+        ])
+
+    return await response_cache.responder( # type: ignore
+        "atletas_busca", {"q": termo.lower(), "limit": limit}, tabelas, gerar
+    )
+
+
+# Consultando vários atletas de uma vez pelos ids ou CPFs
+@router.post(
+    "/batch",
+     summary="Consultando vários atletas pelos IDs ou CPFs",
+     status_code=status.HTTP_200_OK,
+    response_model=StandardResponseSuccess[list[AtletaLoteOut]],
+    description=(
+        f"Recebe até {LIMITE_MAXIMO_LOTE} ids ou CPFs (um dos dois) e devolve um item por chave, na "
+        "ordem do pedido, com encontrado=false para as que não existem. Todos os atletas vêm de "
+        "uma única consulta."
+    ),
+)
+async def query_athletes_batch(
+    db_session: ReadDatabaseDependency,
+    lote: AtletaLoteIn = Body(...),
+) -> StandardJSONResponse:
+    if (lote.ids is None) == (lote.cpfs is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe a lista de ids ou a de cpfs (apenas uma delas).",
+        )
+    if lote.ids is not None:
+        coluna, chaves = AtletaModel.id, lote.ids
+    else:
+        coluna, chaves = AtletaModel.cpf, [cpf.strip() for cpf in lote.cpfs] # type: ignore
+    if len(chaves) > LIMITE_MAXIMO_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No máximo {LIMITE_MAXIMO_LOTE} atletas por consulta (recebidos {len(chaves)}).",
+        )
+
+    # Chaves repetidas vão uma vez só para o banco, mas aparecem em todas as posições da resposta
+    unicas = list(dict.fromkeys(chaves))
+    encontrados = {}
+    if unicas:
+        postgres = db_session.bind.dialect.name == "postgresql"
+        for linha in (await db_session.execute(select_atletas_por_chaves(coluna, unicas, postgres))).all():
+            encontrados[getattr(linha, coluna.key)] = linha_para_atleta(linha)
+
+    return success_response([
+        {"chave": str(chave), "encontrado": chave in encontrados, "atleta": encontrados.get(chave)}
+        for chave in chaves
+    ])
 
 
 # Listando atletas pelo id
@@ -148,21 +452,59 @@ async def query_all_athletes(db_session: DatabaseDependency,) -> StandardRespons
      status_code=status.HTTP_200_OK,
      response_model=StandardResponseSuccess[AtletaOut],
 )
-async def query_athlete_by_id(id: UUID4, db_session: DatabaseDependency,) -> StandardResponseSuccess[AtletaOut]:
-    # Buscando o atleta pelo ID
-    atleta_model: AtletaModel = ( 
-        await db_session.execute(select(AtletaModel).filter_by(id=id))
-    ).scalars().first() # type: ignore
+async def query_athlete_by_id(id: UUID4, request: Request) -> StandardJSONResponse:
+    # O token da tabela é lido antes da consulta: uma alteração no meio do caminho gera um ETag já vencido
+    token = table_versions.token("atletas")
+    recebidos = etags_recebidos(request)
+    # Nenhum atleta mudou desde o ETag do cliente: 304 sem consultar o banco
+    for etag in recebidos:
+        if etag != "*" and etag.partition("-")[2] == token:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos_cache(request, f'"{etag}"')) # type: ignore
 
+    async def consultar() -> StandardJSONResponse:
+        # Sessão própria, não a da requisição: a consulta é compartilhada com as requisições
+        # simultâneas pelo mesmo atleta, e só ela pega uma conexão do pool.
+        # Sempre no primário: o token já foi trocado pela escrita, e uma réplica atrasada
+        # devolveria a linha antiga sob o token novo (304 para ela até a próxima escrita)
+        async with async_session() as session: # type: ignore
+            # Buscando o atleta pelo ID, já com os nomes de categoria e centro no mesmo JOIN
+            atleta = (await session.execute(select_atletas_flat().where(AtletaModel.id == id))).first()
+
+        # Verificando se o atleta foi encontrado
+        if not atleta:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Atleta não encontrado no identificador: {id}",
+            )
+        # Retornando no formato padronizado; a versão do atleta vai no ETag para o If-Match do PATCH
+        return success_response(linha_para_atleta(atleta), headers=cabecalhos_cache(request, _etag(atleta.version, token)))
+
+    resposta = await request_coalescer.responder("atletas", (id, token), consultar)
+    # If-None-Match: * só vale para um atleta que existe (senão a consulta já levantou o 404)
+    if "*" in recebidos:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos_cache(request, resposta.headers["etag"])) # type: ignore
+    return resposta # type: ignore
+
+def _etag(version: int, token: str) -> str:
+    # "<versão do atleta>-<versão da tabela>": a versão serve ao If-Match, o token ao If-None-Match
+    return f'"{version}-{token}"'
+
+
+def _versoes_if_match(if_match: Optional[str]) -> Optional[list[int]]:
+    # None quando não há pré-condição ("*" ou cabeçalho ausente); lista vazia quando nenhuma versão pode casar
+    if if_match is None:
+        return None
+    versoes = []
+    for etag in if_match.split(","):
+        etag = etag.strip()
+        if etag == "*":
+            return None
+        versao = etag[1:-1].partition("-")[0]
+        # ETags fracas (W/"...") e valores malformados nunca casam na comparação forte
+        if len(etag) >= 2 and etag.startswith('"') and etag.endswith('"') and versao.isdigit():
+            versoes.append(int(versao))
+    return versoes
 
-    # Verificando se o atleta foi encontrado
-    if not atleta_model:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Atleta não encontrado no identificador: {id}",
-        )
-    # Mapeando modelo SQLAlchemy para schema Pydantic e retornando no formato padronizado
-    return StandardResponseSuccess.create(data=AtletaOut.model_validate(atleta_model))
 
 # Atualizando informações do atleta pelo id
 @router.patch(
@@ -170,66 +512,117 @@ async def query_athlete_by_id(id: UUID4, db_session: DatabaseDependency,) -> Sta
      summary="Atualizando informações de um atleta pelo ID",
      status_code=status.HTTP_200_OK,
      response_model=StandardResponseSuccess[AtletaOut],
+     description=(
+        "Atualiza o atleta em uma única instrução UPDATE ... RETURNING. Envie o ETag recebido "
+        "no GET (ou em um PATCH anterior) no cabeçalho If-Match para que a atualização falhe com "
+        "412 se outra pessoa tiver alterado o atleta nesse meio tempo."
+     ),
 )
-async def patch_athlete(id: UUID4, db_session: DatabaseDependency, atleta_up: AtletaUpdate = Body(...)) -> StandardResponseSuccess[AtletaOut]:
-    # Buscando o atleta pelo ID
-    atleta: AtletaModel = ( 
-        await db_session.execute(select(AtletaModel).filter_by(id=id))
-    ).scalars().first()  
+async def patch_athlete(
+    id: UUID4,
+    db_session: DatabaseDependency,
+    atleta_up: AtletaUpdate = Body(...),
+    if_match: Optional[str] = Header(None, description="ETag (versão) esperado do atleta"),
+) -> StandardJSONResponse:
+    atleta_update_data = atleta_up.model_dump(exclude_unset=True)
+    versoes_esperadas = _versoes_if_match(if_match)
 
-    # Verificando se o atleta foi encontrado
-    if not atleta:
+    # Campos simples; valores nulos são ignorados porque as colunas não aceitam NULL
+    valores: dict = {
+        key: value for key, value in atleta_update_data.items()
+        if key not in ("categoria", "centro_treinamento") and value is not None
+    }
+
+    categoria_nome = None
+    if atleta_update_data.get("categoria"):
+        categoria_nome = (atleta_update_data["categoria"].get("nome") or "").strip()
+        if not categoria_nome:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nome da categoria não fornecido para atualização."
+            )
+
+    ct_nome = None
+    if atleta_update_data.get("centro_treinamento"):
+        ct_nome = (atleta_update_data["centro_treinamento"].get("nome") or "").strip()
+        if not ct_nome:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nome do centro de treinamento não fornecido para atualização."
+            )
+
+    # Um único UPDATE ... RETURNING: os nomes de categoria e centro são resolvidos em subconsultas
+    # no próprio SQL e o RETURNING já traz a linha completa, em uma única ida ao banco
+    if categoria_nome:
+        valores["categoria_id"] = (
+            select(CategoriaModel.pk_id).where(CategoriaModel.nome == categoria_nome).scalar_subquery()
+        )
+    if ct_nome:
+        valores["centro_treinamento_id"] = (
+            select(CentroTreinamentoModel.pk_id).where(CentroTreinamentoModel.nome == ct_nome).scalar_subquery()
+        )
+    valores["version"] = AtletaModel.version + 1
+
+    stmt = update(AtletaModel).where(AtletaModel.id == id)
+    if versoes_esperadas is not None:
+        stmt = stmt.where(AtletaModel.version.in_(versoes_esperadas))
+    stmt = (
+        stmt.values(**valores)
+        .returning(*colunas_atleta_flat(correlacionado=True))
+        .execution_options(synchronize_session=False)
+    )
+
+    try:
+        atleta = (await db_session.execute(stmt)).first()
+    except IntegrityError:
+        # Categoria ou centro inexistente: a subconsulta devolve NULL e a coluna não aceita NULL
+        atleta = None
+
+    if atleta is None:
+        # Nenhuma linha atualizada: descobrindo o motivo (só no caminho de erro)
+        await db_session.rollback()
+        versao_atual = (await db_session.execute(
+            select(AtletaModel.version).where(AtletaModel.id == id)
+        )).scalar_one_or_none()
+
+        if versao_atual is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Atleta não encontrado no identificador: {id}",
+            )
+        if versoes_esperadas is not None and versao_atual not in versoes_esperadas:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=(
+                    f"O atleta foi alterado por outra requisição (versão atual {versao_atual}). "
+                    f"Consulte-o novamente e reenvie a atualização."
+                ),
+            )
+        # Pela sessão da requisição, que já tem uma conexão (uma segunda esgotaria o pool sob carga)
+        if categoria_nome and await categorias_cache.pk_id_por_nome(categoria_nome, db_session) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A categoria '{categoria_nome}' não foi encontrada para atualização."
+            )
+        if ct_nome and await centros_treinamento_cache.pk_id_por_nome(ct_nome, db_session) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"O centro de treinamento '{ct_nome}' não foi encontrado para atualização."
+            )
+        # Categoria e centro existem: a referência mudou entre o UPDATE e esta verificação
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Atleta não encontrado no identificador: {id}",
+            status_code=status.HTTP_409_CONFLICT,
+            detail="O atleta não pôde ser atualizado por uma alteração simultânea. Tente novamente.",
         )
-    
-    atleta_update_data = atleta_up.model_dump(exclude_unset=True)
 
-    for key, value in atleta_update_data.items():
-        if key == "categoria" and value:
-            categoria_nome = value.get("nome")
-            if categoria_nome:
-                categoria = (await db_session.execute(
-                    select(CategoriaModel).filter_by(nome=categoria_nome))
-                ).scalars().first()
-                if not categoria:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"A categoria '{categoria_nome}' não foi encontrada para atualização."
-                    )
-                atleta.categoria = categoria
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Nome da categoria não fornecido para atualização."
-                )
-
-        elif key == "centro_treinamento" and value:
-            ct_nome = value.get("nome")
-            if ct_nome:
-                centro_treinamento = (await db_session.execute(
-                    select(CentroTreinamentoModel).filter_by(nome=ct_nome))
-                ).scalars().first()
-                if not centro_treinamento:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"O centro de treinamento '{ct_nome}' não foi encontrado para atualização."
-                    )
-                atleta.centro_treinamento = centro_treinamento
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Nome do centro de treinamento não fornecido para atualização."
-                )
-        else:
-            setattr(atleta, key, value)
-
-    await db_session.commit()
-    await db_session.refresh(atleta)
-
-    # Retornando a instância atualizada mapeada para o schema de saída no formato padronizado
-    return StandardResponseSuccess.create(data=AtletaOut.model_validate(atleta))
+    atleta_out = linha_para_atleta(atleta)
+    await registrar_eventos(db_session, "atletas", "update", [(id, atleta_out)])
+    await commit_and_publish(db_session, ChangeEvent(table="atletas", op="update", ids=(atleta.pk_id,)))
+
+    # Retornando a linha atualizada no formato padronizado, com a nova versão no ETag
+    return success_response(
+        atleta_out, headers={"ETag": _etag(atleta.version, table_versions.token("atletas"))}
+    )
 
 # Deletando atleta pelo id
 @router.delete(
@@ -251,14 +644,16 @@ async def delete_athlete(id: UUID4, db_session: DatabaseDependency,) -> None:
             detail=f"Atleta não encontrado no identificador: {id}",
         )
     
+    pk_id = atleta.pk_id
     try:
         # Deletando o atleta do banco de dados
         await db_session.delete(atleta)
-        # Persistindo as mudanças
-        await db_session.commit()
-    except Exception as e:
+        await registrar_eventos(db_session, "atletas", "delete", [(id, None)])
+        # Persistindo as mudanças e avisando os workers
+        await commit_and_publish(db_session, ChangeEvent(table="atletas", op="delete", ids=(pk_id,)))
+    except Exception:
         # Em caso de qualquer outro erro inesperado durante a deleção
-        print(f"Erro ao deletar atleta: {e}")
+        logger.exception("Erro ao deletar o atleta %s", id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ocorreu um erro interno ao tentar deletar o atleta."
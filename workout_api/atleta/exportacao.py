@@ -0,0 +1,294 @@
+import asyncio
+import csv
+import importlib.util
+import io
+import zlib
+from contextlib import suppress
+from typing import AsyncIterator, Callable, Optional, Sequence
+
+from pydantic_core import to_json
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.configs.database import read_session
+
+# Dependências opcionais: só os formatos parquet/arrow e a compressão zstd precisam delas.
+# O pyarrow só é importado na primeira exportação que o usa (sozinho pesa dezenas de ms no boot)
+PYARROW_INSTALADO = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Exportação de atletas em streaming, com memória constante: as linhas saem de um cursor do
+# servidor (ou do COPY TO STDOUT no Postgres) em lotes e cada lote é codificado e comprimido
+# antes de o próximo ser lido.
+
+# Linhas lidas do cursor do servidor a cada ida ao banco
+TAMANHO_LOTE_EXPORTACAO = 1000
+# Linhas por grupo (row group) do Parquet: grupos pequenos demais estragam a leitura colunar
+LINHAS_POR_GRUPO_PARQUET = 50_000
+# Pedaços do COPY esperando para serem enviados ao cliente (contrapressão do cliente lento)
+PEDACOS_EM_ESPERA_COPY = 8
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+COLUNAS_EXPORTACAO = (
+    "id", "created_at", "nome", "cpf", "idade", "peso", "altura", "sexo", "categoria", "centro_treinamento",
+)
+
+
+class FormatoIndisponivel(RuntimeError):
+    """O formato ou a compressão pedidos dependem de um pacote opcional que não está instalado."""
+
+
+def verificar_disponibilidade(formato: str, compressao: Optional[str]) -> None:
+    if formato in ("parquet", "arrow") and not PYARROW_INSTALADO:
+        raise FormatoIndisponivel(f"O formato '{formato}' precisa do pacote pyarrow instalado no servidor.")
+    if compressao == "zstd" and zstandard is None:
+        raise FormatoIndisponivel("A compressão 'zstd' precisa do pacote zstandard instalado no servidor.")
+
+
+class _CodificadorCsv:
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        # lineterminator "\n", como no COPY ... CSV: as duas origens geram o mesmo arquivo
+        self._escritor = csv.writer(self._buffer, lineterminator="\n")
+
+    def _retirar(self) -> bytes:
+        dados = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return dados
+
+    def inicio(self) -> bytes:
+        self._escritor.writerow(COLUNAS_EXPORTACAO)
+        return self._retirar()
+
+    def lote(self, linhas: Sequence) -> bytes:
+        self._escritor.writerows(linhas)
+        return self._retirar()
+
+    def fim(self) -> bytes:
+        return b""
+
+
+class _CodificadorNdjson:
+    def inicio(self) -> bytes:
+        return b""
+
+    def lote(self, linhas: Sequence) -> bytes:
+        return b"".join(to_json(dict(zip(COLUNAS_EXPORTACAO, linha))) + b"\n" for linha in linhas)
+
+    def fim(self) -> bytes:
+        return b""
+
+
+class _SaidaIncremental:
+    """
+    Arquivo só de escrita para o pyarrow que entrega os bytes à medida que são escritos.
+
+    tell() conta tudo o que já foi escrito, não só o que está guardado: o Parquet grava no
+    rodapé as posições dos grupos de linhas.
+    """
+
+    def __init__(self) -> None:
+        self._pedacos: list[bytes] = []
+        self._posicao = 0
+        self.closed = False
+
+    def write(self, dados) -> int:
+        self._pedacos.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def retirar(self) -> bytes:
+        dados = b"".join(self._pedacos)
+        self._pedacos.clear()
+        return dados
+
+
+def _schema_arrow():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("nome", pa.string()),
+        ("cpf", pa.string()),
+        ("idade", pa.int32()),
+        ("peso", pa.float64()),
+        ("altura", pa.float64()),
+        ("sexo", pa.string()),
+        ("categoria", pa.string()),
+        ("centro_treinamento", pa.string()),
+    ])
+
+
+def _lote_arrow(schema, linhas: Sequence):
+    import pyarrow as pa
+
+    colunas = [list(coluna) for coluna in zip(*linhas)]
+    colunas[0] = [str(id_) for id_ in colunas[0]]
+    return pa.record_batch(colunas, schema=schema)
+
+
+class _CodificadorArrow:
+    """Arrow IPC em streaming: cada lote do cursor vira um record batch."""
+
+    def __init__(self) -> None:
+        import pyarrow as pa
+
+        self._schema = _schema_arrow()
+        self._saida = _SaidaIncremental()
+        self._escritor = pa.ipc.new_stream(self._saida, self._schema)
+
+    def inicio(self) -> bytes:
+        return self._saida.retirar()
+
+    def lote(self, linhas: Sequence) -> bytes:
+        self._escritor.write_batch(_lote_arrow(self._schema, linhas))
+        return self._saida.retirar()
+
+    def fim(self) -> bytes:
+        self._escritor.close()
+        return self._saida.retirar()
+
+
+class _CodificadorParquet:
+    """Parquet com um grupo de linhas a cada LINHAS_POR_GRUPO_PARQUET (memória limitada a um grupo)."""
+
+    def __init__(self) -> None:
+        import pyarrow.parquet as pq
+
+        self._schema = _schema_arrow()
+        self._saida = _SaidaIncremental()
+        self._escritor = pq.ParquetWriter(self._saida, self._schema)
+        self._pendentes: list = []
+        self._linhas_pendentes = 0
+
+    def _gravar_grupo(self) -> None:
+        import pyarrow as pa
+
+        if self._pendentes:
+            self._escritor.write_table(pa.Table.from_batches(self._pendentes, schema=self._schema))
+            self._pendentes = []
+            self._linhas_pendentes = 0
+
+    def inicio(self) -> bytes:
+        return self._saida.retirar()
+
+    def lote(self, linhas: Sequence) -> bytes:
+        self._pendentes.append(_lote_arrow(self._schema, linhas))
+        self._linhas_pendentes += len(linhas)
+        if self._linhas_pendentes >= LINHAS_POR_GRUPO_PARQUET:
+            self._gravar_grupo()
+        return self._saida.retirar()
+
+    def fim(self) -> bytes:
+        self._gravar_grupo()
+        self._escritor.close()
+        return self._saida.retirar()
+
+
+CODIFICADORES: dict[str, Callable] = {
+    "csv": _CodificadorCsv,
+    "ndjson": _CodificadorNdjson,
+    "parquet": _CodificadorParquet,
+    "arrow": _CodificadorArrow,
+}
+
+
+def _compressor(compressao: Optional[str]) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    # (comprimir, finalizar) de um compressor incremental; sem compressão, os bytes passam direto
+    if compressao == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+    if compressao == "zstd":
+        compressor = zstandard.ZstdCompressor().compressobj()
+        return compressor.compress, compressor.flush
+    return (lambda dados: dados), (lambda: b"")
+
+
+async def _linhas_cursor(session: AsyncSession, stmt: Select) -> AsyncIterator[Sequence]:
+    resultado = await session.stream(stmt.execution_options(yield_per=TAMANHO_LOTE_EXPORTACAO))
+    async for linhas in resultado.partitions():
+        yield [tuple(linha) for linha in linhas]
+
+
+async def _copy_csv(session: AsyncSession, stmt: Select) -> AsyncIterator[bytes]:
+    """
+    CSV gerado pelo próprio Postgres com COPY (SELECT ...) TO STDOUT, sem passar linha a linha
+    pelo Python. O asyncpg entrega os pedaços a um callback; a fila limitada faz o COPY esperar
+    quando o cliente lê mais devagar que o banco produz.
+    """
+    fila: asyncio.Queue = asyncio.Queue(maxsize=PEDACOS_EM_ESPERA_COPY)
+    conexao = await session.connection()
+    bruta = await conexao.get_raw_connection()
+    compilado = stmt.compile(dialect=conexao.dialect)
+    parametros = [compilado.params[nome] for nome in compilado.positiontup or ()]
+
+    async def enviar(dados) -> None:
+        await fila.put(bytes(dados))
+
+    async def copiar() -> None:
+        try:
+            await bruta.driver_connection.copy_from_query( # type: ignore
+                compilado.string, *parametros, output=enviar, format="csv", header=True
+            )
+        finally:
+            await fila.put(None)
+
+    tarefa = asyncio.create_task(copiar())
+    try:
+        while (pedaco := await fila.get()) is not None:
+            yield pedaco
+        # Propaga um erro do COPY (o fim da fila também é colocado quando ele falha)
+        await tarefa
+    finally:
+        # Cliente desconectou no meio: interrompe o COPY antes de devolver a conexão
+        tarefa.cancel()
+        with suppress(asyncio.CancelledError):
+            await tarefa
+
+
+async def exportar(stmt: Select, formato: str, compressao: Optional[str]) -> AsyncIterator[bytes]:
+    """Corpo da resposta de exportação: bytes do arquivo, já comprimidos se pedido."""
+    comprimir, finalizar = _compressor(compressao)
+
+    # Sessão própria: a sessão da dependência é fechada antes do corpo da resposta ser enviado
+    async with read_session() as session:
+        conexao = await session.connection()
+        if formato == "csv" and conexao.dialect.driver == "asyncpg":
+            async for pedaco in _copy_csv(session, stmt):
+                if dados := comprimir(pedaco):
+                    yield dados
+        else:
+            codificador = CODIFICADORES[formato]()
+            if dados := comprimir(codificador.inicio()):
+                yield dados
+            async for linhas in _linhas_cursor(session, stmt):
+                if dados := comprimir(codificador.lote(linhas)):
+                    yield dados
+            if dados := comprimir(codificador.fim()):
+                yield dados
+
+    if dados := finalizar():
+        yield dados
@@ -1,10 +1,30 @@
 import datetime
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Float
+from sqlalchemy import DDL, DateTime, ForeignKey, Index, Integer, String, Float, event, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from workout_api.contrib.models import BaseModel
 
 class AtletaModel(BaseModel):
     __tablename__ ='atletas'
+    __table_args__ = (
+        # Ordem da paginação por chave (aplicar_cursor)
+        Index('ix_atletas_created_at_pk_id', 'created_at', 'pk_id'),
+        # Busca por prefixo do nome sem diferenciar maiúsculas (lower(nome) LIKE 'x%')
+        Index(
+            'ix_atletas_nome_lower',
+            func.lower(literal_column('nome')).label('nome_lower'),
+            postgresql_ops={'nome_lower': 'varchar_pattern_ops'},
+        ),
+        # Busca (GET /atletas/search), só no Postgres: trigramas do nome sem acentos e em
+        # minúsculas (GiST: atende o operador %> e a ordenação por distância <->>, top-N sem sort)
+        Index(
+            'ix_atletas_nome_trgm',
+            func.normalizar_texto(literal_column('nome')).label('nome_normalizado'),
+            postgresql_using='gist',
+            postgresql_ops={'nome_normalizado': 'gist_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+        # Prefixo do CPF (cpf LIKE '123%'), também na ordem do operador ~<~ do varchar_pattern_ops
+        Index('ix_atletas_cpf_pattern', 'cpf', postgresql_ops={'cpf': 'varchar_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
 
     pk_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     nome: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -14,9 +34,23 @@ class AtletaModel(BaseModel):
     altura: Mapped[float] = mapped_column(Float, nullable=False)
     sexo: Mapped[str] = mapped_column(String(1), nullable=False)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+    # Incrementada a cada atualização; exposta como ETag para controle de concorrência otimista
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default='1')
 
     categoria: Mapped['CategoriaModel'] = relationship(back_populates='atletas', lazy='selectin') 
-    categoria_id: Mapped[int] = mapped_column(ForeignKey('categorias.pk_id'), nullable=False)
+    categoria_id: Mapped[int] = mapped_column(ForeignKey('categorias.pk_id'), nullable=False, index=True)
 
     centro_treinamento: Mapped['CentroTreinamentoModel'] = relationship(back_populates='atletas', lazy='selectin')
-    centro_treinamento_id: Mapped[int] = mapped_column(ForeignKey('centros_treinamento.pk_id'), nullable=False)
\ No newline at end of file
+    centro_treinamento_id: Mapped[int] = mapped_column(ForeignKey('centros_treinamento.pk_id'), nullable=False, index=True)
+
+
+# Extensões e função da busca, antes da tabela no create_all (em produção vêm da migração).
+# unaccent() não é IMMUTABLE e não pode ir num índice: normalizar_texto() fixa o dicionário
+for _comando in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE OR REPLACE FUNCTION normalizar_texto(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$",
+):
+    event.listen(AtletaModel.__table__, 'before_create', DDL(_comando).execute_if(dialect='postgresql'))
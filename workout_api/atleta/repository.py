@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import Select, any_, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from workout_api.atleta.models import AtletaModel
+from workout_api.categorias.models import CategoriaModel
+from workout_api.centro_treinamento.models import CentroTreinamentoModel
+
+
+class CursorInvalido(ValueError):
+    """O cursor de paginação recebido não pôde ser decodificado."""
+
+
+def colunas_atleta_flat(correlacionado: bool = False) -> tuple:
+    """
+    Colunas de AtletaOut com os nomes de categoria e centro de treinamento.
+
+    Por padrão os nomes vêm das tabelas no JOIN; com correlacionado=True vêm de subconsultas
+    correlacionadas, que podem ser usadas no RETURNING de um UPDATE em atletas.
+    """
+    if correlacionado:
+        categoria_nome = (
+            select(CategoriaModel.nome).where(CategoriaModel.pk_id == AtletaModel.categoria_id).scalar_subquery()
+        )
+        centro_treinamento_nome = (
+            select(CentroTreinamentoModel.nome)
+            .where(CentroTreinamentoModel.pk_id == AtletaModel.centro_treinamento_id)
+            .scalar_subquery()
+        )
+    else:
+        categoria_nome = CategoriaModel.nome
+        centro_treinamento_nome = CentroTreinamentoModel.nome
+
+    return (
+        AtletaModel.pk_id,
+        AtletaModel.id,
+        AtletaModel.created_at,
+        AtletaModel.nome,
+        AtletaModel.cpf,
+        AtletaModel.idade,
+        AtletaModel.peso,
+        AtletaModel.altura,
+        AtletaModel.sexo,
+        AtletaModel.version,
+        categoria_nome.label('categoria_nome'),
+        centro_treinamento_nome.label('centro_treinamento_nome'),
+    )
+
+
+def select_atletas_flat() -> Select:
+    # Linhas "achatadas" (sem objetos ORM) com os nomes de categoria e centro resolvidos em SQL
+    return (
+        select(*colunas_atleta_flat())
+        .join(CategoriaModel, CategoriaModel.pk_id == AtletaModel.categoria_id)
+        .join(CentroTreinamentoModel, CentroTreinamentoModel.pk_id == AtletaModel.centro_treinamento_id)
+    )
+
+
+def select_atletas_por_chaves(coluna: Any, valores: list, postgres: bool) -> Select:
+    """
+    select_atletas_flat() filtrado por uma lista de ids ou CPFs.
+
+    No Postgres a lista vai como um único parâmetro de array (coluna = ANY($1)): o texto da
+    consulta é o mesmo para qualquer quantidade e o prepared statement é reaproveitado. Nos
+    demais bancos vira um IN (...).
+    """
+    if postgres:
+        return select_atletas_flat().where(coluna == any_(literal(valores, ARRAY(coluna.type))))
+    return select_atletas_flat().where(coluna.in_(valores))
+
+
+def select_atletas_exportacao() -> Select:
+    """
+    Colunas da exportação, já na ordem do arquivo, com os nomes de categoria e centro no JOIN.
+
+    Os rótulos viram os nomes das colunas (inclusive no cabeçalho do COPY ... CSV HEADER).
+    """
+    return (
+        select(
+            AtletaModel.id,
+            AtletaModel.created_at,
+            AtletaModel.nome,
+            AtletaModel.cpf,
+            AtletaModel.idade,
+            AtletaModel.peso,
+            AtletaModel.altura,
+            AtletaModel.sexo,
+            CategoriaModel.nome.label('categoria'),
+            CentroTreinamentoModel.nome.label('centro_treinamento'),
+        )
+        .join(CategoriaModel, CategoriaModel.pk_id == AtletaModel.categoria_id)
+        .join(CentroTreinamentoModel, CentroTreinamentoModel.pk_id == AtletaModel.centro_treinamento_id)
+    )
+
+
+def linha_para_atleta(linha: Any) -> dict:
+    # Converte uma linha com colunas_atleta_flat() no formato de AtletaOut
+    return {
+        "id": linha.id,
+        "created_at": linha.created_at,
+        "nome": linha.nome,
+        "cpf": linha.cpf,
+        "idade": linha.idade,
+        "peso": linha.peso,
+        "altura": linha.altura,
+        "sexo": linha.sexo,
+        "categoria": {"nome": linha.categoria_nome},
+        "centro_treinamento": {"nome": linha.centro_treinamento_nome},
+    }
+
+
+def aplicar_filtros(
+    stmt: Select,
+    nome: Optional[str] = None,
+    cpf: Optional[str] = None,
+    categoria: Optional[str] = None,
+    centro_treinamento: Optional[str] = None,
+) -> Select:
+    # Os filtros assumem que categorias e centros_treinamento já estão no JOIN do select
+    if nome:
+        # Prefixo sem diferenciar maiúsculas/minúsculas
+        stmt = stmt.where(func.lower(AtletaModel.nome).startswith(nome.strip().lower(), autoescape=True))
+    if cpf:
+        stmt = stmt.where(AtletaModel.cpf == cpf.strip())
+    if categoria:
+        stmt = stmt.where(CategoriaModel.nome == categoria.strip())
+    if centro_treinamento:
+        stmt = stmt.where(CentroTreinamentoModel.nome == centro_treinamento.strip())
+    return stmt
+
+
+def aplicar_cursor(stmt: Select, cursor: Optional[str]) -> Select:
+    # Paginação por chave (keyset) em (created_at, pk_id): custo constante em qualquer página
+    stmt = stmt.order_by(AtletaModel.created_at, AtletaModel.pk_id)
+    if cursor:
+        created_at, pk_id = decodificar_cursor(cursor)
+        stmt = stmt.where(tuple_(AtletaModel.created_at, AtletaModel.pk_id) > (created_at, pk_id))
+    return stmt
+
+
+def codificar_cursor(created_at: datetime, pk_id: int) -> str:
+    conteudo = json.dumps([created_at.isoformat(), pk_id]).encode()
+    return base64.urlsafe_b64encode(conteudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        conteudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, pk_id = json.loads(conteudo)
+        return datetime.fromisoformat(created_at), int(pk_id)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(cursor) from e
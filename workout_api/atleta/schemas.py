@@ -1,5 +1,5 @@
 from typing_extensions import Annotated, Optional
-from pydantic import Field, PositiveFloat
+from pydantic import UUID4, Field, PositiveFloat
 from workout_api.categorias.schemas import CategoriaIn
 from workout_api.centro_treinamento.schemas import CentroTreinamentoAtleta
 from workout_api.contrib.schemas import BaseSchema, OutMixin
@@ -19,6 +19,18 @@ class AtletaIn(Atleta):
 class AtletaOut(Atleta, OutMixin):
     pass
 
+class AtletaBuscaOut(AtletaOut):
+    relevancia: Annotated[float, Field(description='Relevância do atleta para o termo buscado, de 0 a 1', example=0.83)] # type: ignore
+
+class AtletaLoteIn(BaseSchema):
+    ids: Annotated[Optional[list[UUID4]], Field(None, description='IDs dos atletas, na ordem da resposta')] # type: ignore
+    cpfs: Annotated[Optional[list[Annotated[str, Field(max_length=11)]]], Field(None, description='CPFs dos atletas, na ordem da resposta', example=['12345678901'])] # type: ignore
+
+class AtletaLoteOut(BaseSchema):
+    chave: Annotated[str, Field(description='ID ou CPF pedido', example='12345678901')] # type: ignore
+    encontrado: Annotated[bool, Field(description='Se existe um atleta com esse ID ou CPF')] # type: ignore
+    atleta: Annotated[Optional[AtletaOut], Field(None, description='Atleta encontrado (nulo quando não encontrado)')] # type: ignore
+
 class AtletaUpdate(BaseSchema):
       idade: Annotated[Optional[int], Field(None, description='Idade do atleta', example=25)] # type: ignore
       peso: Annotated[Optional[PositiveFloat], Field(None, description='Peso do atleta em kg', example=70.5)] # type: ignore
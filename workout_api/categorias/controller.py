@@ -1,13 +1,22 @@
+import logging
 from uuid import uuid4
-from fastapi import APIRouter, Body, status, HTTPException
+from fastapi import APIRouter, Body, Request, status, HTTPException
 from pydantic import UUID4
 from workout_api.atleta.models import AtletaModel 
 from workout_api.categorias.schemas import CategoriaIn, CategoriaOut
 from workout_api.categorias.models import CategoriaModel
+from workout_api.contrib.changes import ChangeEvent, commit_and_publish
 from workout_api.contrib.dependencies import DatabaseDependency
+from workout_api.contrib.http_cache import cabecalhos_cache, nao_modificado, table_versions
+from workout_api.contrib.reference_cache import categorias_cache
+from workout_api.contrib.response_cache import response_cache
+from workout_api.feed.repository import registrar_eventos
+from sqlalchemy import delete, exists, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-from workout_api.responses.standard_responses import StandardResponseSuccess, StandardResponseError 
+from workout_api.responses.standard_responses import StandardJSONResponse, StandardResponseSuccess, StandardResponseError, success_response 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Criando uma nova categoria
 @router.post(
@@ -19,7 +28,7 @@ router = APIRouter()
 async def post(
     db_session: DatabaseDependency,
     categoria_in: CategoriaIn = Body(...)
-) -> StandardResponseSuccess[CategoriaOut]: # Definindo o tipo de retorno da função
+) -> StandardJSONResponse: # Definindo o tipo de retorno da função
     
     # Verificando se já existe uma categoria com o mesmo nome
     categoria_existente = (await db_session.execute(
@@ -39,13 +48,14 @@ async def post(
 
     # Adicionando a categoria ao banco de dados
     db_session.add(categoria_model)
-    # Persistindo as mudanças
-    await db_session.commit()
+    await registrar_eventos(db_session, "categorias", "insert", [(categoria_out.id, categoria_out)])
+    # Persistindo as mudanças e invalidando o cache de categorias em todos os workers
+    await commit_and_publish(db_session, ChangeEvent(table="categorias", op="insert"))
     # Atualizando o objeto do modelo para incluir dados gerados pelo banco (ex: pk_id)
     await db_session.refresh(categoria_model)
 
     # Retornando a categoria criada no formato de sucesso padronizado
-    return StandardResponseSuccess.create(data=CategoriaOut.model_validate(categoria_model))
+    return success_response(CategoriaOut.model_validate(categoria_model), status_code=status.HTTP_201_CREATED)
 
 
 # Consultando todas as categorias
@@ -55,12 +65,22 @@ async def post(
      status_code=status.HTTP_200_OK,
     response_model=StandardResponseSuccess[list[CategoriaOut]], # Definindo o modelo de resposta padronizado para uma lista
 )
-async def query_all_categories(db_session: DatabaseDependency,) -> StandardResponseSuccess[list[CategoriaOut]]: # Definindo o tipo de retorno da função
-    # Consultando todas as categorias no banco de dados
-    categorias_models: list[CategoriaModel] = (await db_session.execute(select(CategoriaModel))).scalars().all() # type: ignore
+async def query_all_categories(request: Request) -> StandardJSONResponse: # Definindo o tipo de retorno da função
+    # ETag da versão atual da tabela: se o cliente já tem essa versão, responde 304 sem serializar
+    etag = f'"{table_versions.token("categorias")}"'
+    if resposta := nao_modificado(request, etag):
+        return resposta # type: ignore
 
-    # Mapeando modelos SQLAlchemy para schemas Pydantic e retornando no formato padronizado
-    return StandardResponseSuccess.create(data=[CategoriaOut.model_validate(categoria) for categoria in categorias_models])
+    async def gerar() -> StandardJSONResponse:
+        # Consultando todas as categorias (servidas pelo cache de referência)
+        categorias_out = await categorias_cache.todos()
+        # Retornando no formato padronizado
+        return success_response(categorias_out)
+
+    # Corpo já serializado no cache de respostas, compartilhado entre as réplicas
+    return await response_cache.responder( # type: ignore
+        "categorias", {}, ("categorias",), gerar, headers=cabecalhos_cache(request, etag)
+    )
 
 
 # Consultando uma categoria pelo ID
@@ -70,21 +90,27 @@ async def query_all_categories(db_session: DatabaseDependency,) -> StandardRespo
      status_code=status.HTTP_200_OK,
      response_model=StandardResponseSuccess[CategoriaOut], # Definindo o modelo de resposta padronizado
 )
-async def query_category_by_id(id: UUID4, db_session: DatabaseDependency,) -> StandardResponseSuccess[CategoriaOut]: # Definindo o tipo de retorno da função
-    # Buscando a categoria pelo ID
-    categoria_model: CategoriaModel = (
-        await db_session.execute(select(CategoriaModel).filter_by(id=id))
-    ).scalars().first() # type: ignore
+async def query_category_by_id(id: UUID4, request: Request) -> StandardJSONResponse: # Definindo o tipo de retorno da função
+    etag = f'"{table_versions.token("categorias")}"'
+    if resposta := nao_modificado(request, etag, curinga=False):
+        return resposta # type: ignore
+
+    # Buscando a categoria pelo ID no cache de referência
+    categoria_out = await categorias_cache.por_id(id)
 
     # Verificando se a categoria foi encontrada
-    if not categoria_model:
+    if not categoria_out:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Categoria não encontrada: {id}",
         )
 
+    # If-None-Match: * só depois de confirmar que o ID existe (senão já levantou o 404)
+    if resposta := nao_modificado(request, etag):
+        return resposta # type: ignore
+
     # Retornando a categoria encontrada no formato de sucesso padronizado
-    return StandardResponseSuccess.create(data=CategoriaOut.model_validate(categoria_model))
+    return success_response(categoria_out, headers=cabecalhos_cache(request, etag))
 
 
 # Deletando uma categoria pelo ID
@@ -94,42 +120,60 @@ async def query_category_by_id(id: UUID4, db_session: DatabaseDependency,) -> St
      status_code=status.HTTP_204_NO_CONTENT
 )
 async def delete_category(id: UUID4, db_session: DatabaseDependency,) -> None: # Definindo o tipo de retorno da função (None para 204)
-    # Buscando a categoria pelo ID
-    categoria: CategoriaModel = ( 
-        await db_session.execute(select(CategoriaModel).filter_by(id=id))
-    ).scalars().first() # type: ignore
+    # Um único DELETE protegido: a categoria só é removida se nenhum atleta estiver vinculado a ela.
+    # A FK de atletas.categoria_id ainda barra um atleta inserido ao mesmo tempo por outra transação.
+    stmt = (
+        delete(CategoriaModel)
+        .where(CategoriaModel.id == id, ~exists().where(AtletaModel.categoria_id == CategoriaModel.pk_id))
+        .returning(CategoriaModel.pk_id)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        removido = (await db_session.execute(stmt)).scalar_one_or_none()
+    except IntegrityError:
+        removido = None
 
-    # Verificando se a categoria foi encontrada
-    if not categoria:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Categoria não encontrada no identificador: {id}",
-        )
-    
-    # Verificando atletas vinculados antes de deletar
-    atletas_vinculados = (await db_session.execute(
-        select(AtletaModel).filter_by(categoria_id=categoria.pk_id)
-    )).scalars().all()
+    if removido is None:
+        # Nada foi removido: descobrindo o motivo (só no caminho de erro)
+        await db_session.rollback()
+        categoria = (await db_session.execute(
+            select(CategoriaModel.pk_id, CategoriaModel.nome).filter_by(id=id)
+        )).first()
+
+        # Verificando se a categoria foi encontrada
+        if not categoria:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Categoria não encontrada no identificador: {id}",
+            )
 
-    if atletas_vinculados:
+        # Contando os atletas vinculados no banco, sem carregá-los
+        atletas_vinculados = (await db_session.execute(
+            select(func.count()).select_from(AtletaModel).filter_by(categoria_id=categoria.pk_id)
+        )).scalar_one()
+
+        if not atletas_vinculados:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A categoria recebeu atletas durante a exclusão. Por favor, tente novamente."
+            )
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, 
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
-                f"Não é possível excluir a categoria '{categoria.nome}' pois {len(atletas_vinculados)} "
+                f"Não é possível excluir a categoria '{categoria.nome}' pois {atletas_vinculados} "
                 f"atleta(s) estão atualmente vinculado(s) a ela. Por favor, mova o(s) atleta(s) para "
                 f"outra categoria antes de tentar excluir esta."
             )
         )
     
     try:
-        # Deletando a categoria do banco de dados
-        await db_session.delete(categoria)
-        # Persistindo as mudanças
-        await db_session.commit()
-    except Exception as e:
+        await registrar_eventos(db_session, "categorias", "delete", [(id, None)])
+        # Persistindo as mudanças e invalidando o cache de categorias em todos os workers
+        await commit_and_publish(db_session, ChangeEvent(table="categorias", op="delete"))
+    except Exception:
         # Em caso de qualquer outro erro inesperado durante a deleção
-        print(f'Erro ao excluir a categoria: {e}') # Para depuração no console do servidor
+        logger.exception("Erro ao excluir a categoria %s", id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ocorreu um erro interno ao tentar deletar a categoria." # Mensagem genérica para o cliente
-        )
\ No newline at end of file
+        )
@@ -1,14 +1,23 @@
+import logging
 from uuid import uuid4
-from fastapi import APIRouter, Body, status, HTTPException
+from fastapi import APIRouter, Body, Request, status, HTTPException
 from pydantic import UUID4
 from workout_api.atleta.models import AtletaModel # Importando o modelo de Atleta para a verificação de deleção
 from workout_api.centro_treinamento.schemas import CentroTreinamentoIn, CentroTreinamentoOut
 from workout_api.centro_treinamento.models import CentroTreinamentoModel
+from workout_api.contrib.changes import ChangeEvent, commit_and_publish
 from workout_api.contrib.dependencies import DatabaseDependency
+from workout_api.contrib.http_cache import cabecalhos_cache, nao_modificado, table_versions
+from workout_api.contrib.reference_cache import centros_treinamento_cache
+from workout_api.contrib.response_cache import response_cache
+from workout_api.feed.repository import registrar_eventos
+from sqlalchemy import delete, exists, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-from workout_api.responses.standard_responses import StandardResponseSuccess, StandardResponseError # Importando os schemas padronizados
+from workout_api.responses.standard_responses import StandardJSONResponse, StandardResponseSuccess, StandardResponseError, success_response # Importando os schemas padronizados
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Criando um novo centro de treinamento
 @router.post(
@@ -20,7 +29,7 @@ router = APIRouter()
 async def post(
     db_session: DatabaseDependency,
     centro_treinamento_in: CentroTreinamentoIn = Body(...)
-) -> StandardResponseSuccess[CentroTreinamentoOut]: # Definindo o tipo de retorno da função
+) -> StandardJSONResponse: # Definindo o tipo de retorno da função
     
     # Verificando se já existe um centro de treinamento com o mesmo nome
     centro_treinamento_existente = (await db_session.execute(
@@ -40,13 +49,14 @@ async def post(
 
     # Adicionando o centro de treinamento ao banco de dados
     db_session.add(centro_treinamento_model)
-    # Persistindo as mudanças
-    await db_session.commit()
+    await registrar_eventos(db_session, "centros_treinamento", "insert", [(centro_treinamento_out.id, centro_treinamento_out)])
+    # Persistindo as mudanças e invalidando o cache de centros de treinamento em todos os workers
+    await commit_and_publish(db_session, ChangeEvent(table="centros_treinamento", op="insert"))
     # Atualizando o objeto do modelo para incluir dados gerados pelo banco (ex: pk_id)
     await db_session.refresh(centro_treinamento_model)
 
     # Retornando o centro de treinamento criado no formato de sucesso padronizado
-    return StandardResponseSuccess.create(data=CentroTreinamentoOut.model_validate(centro_treinamento_model))
+    return success_response(CentroTreinamentoOut.model_validate(centro_treinamento_model), status_code=status.HTTP_201_CREATED)
 
 # Consultando todos os centros de treinamento
 @router.get(
@@ -55,12 +65,22 @@ async def post(
      status_code=status.HTTP_200_OK,
     response_model=StandardResponseSuccess[list[CentroTreinamentoOut]], # Definindo o modelo de resposta padronizado para uma lista
 )
-async def query_all_centros_treinamento(db_session: DatabaseDependency,) -> StandardResponseSuccess[list[CentroTreinamentoOut]]: # Definindo o tipo de retorno da função
-    # Consultando todos os centros de treinamento no banco de dados
-    centros_treinamento_models: list[CentroTreinamentoModel] = (await db_session.execute(select(CentroTreinamentoModel))).scalars().all() # type: ignore
+async def query_all_centros_treinamento(request: Request) -> StandardJSONResponse: # Definindo o tipo de retorno da função
+    # ETag da versão atual da tabela: se o cliente já tem essa versão, responde 304 sem serializar
+    etag = f'"{table_versions.token("centros_treinamento")}"'
+    if resposta := nao_modificado(request, etag):
+        return resposta # type: ignore
 
-    # Mapeando modelos SQLAlchemy para schemas Pydantic e retornando no formato padronizado
-    return StandardResponseSuccess.create(data=[CentroTreinamentoOut.model_validate(ct) for ct in centros_treinamento_models])
+    async def gerar() -> StandardJSONResponse:
+        # Consultando todos os centros de treinamento (servidos pelo cache de referência)
+        centros_treinamento_out = await centros_treinamento_cache.todos()
+        # Retornando no formato padronizado
+        return success_response(centros_treinamento_out)
+
+    # Corpo já serializado no cache de respostas, compartilhado entre as réplicas
+    return await response_cache.responder( # type: ignore
+        "centros_treinamento", {}, ("centros_treinamento",), gerar, headers=cabecalhos_cache(request, etag)
+    )
 
 # Consultando um centro de treinamento pelo ID
 @router.get(
@@ -69,21 +89,27 @@ async def query_all_centros_treinamento(db_session: DatabaseDependency,) -> Stan
      status_code=status.HTTP_200_OK,
      response_model=StandardResponseSuccess[CentroTreinamentoOut], # Definindo o modelo de resposta padronizado
 )
-async def query_centro_treinamento_by_id(id: UUID4, db_session: DatabaseDependency,) -> StandardResponseSuccess[CentroTreinamentoOut]: # Definindo o tipo de retorno da função
-    # Buscando o centro de treinamento pelo ID
-    centro_treinamento_model: CentroTreinamentoOut = (
-        await db_session.execute(select(CentroTreinamentoModel).filter_by(id=id))
-    ).scalars().first() # type: ignore
+async def query_centro_treinamento_by_id(id: UUID4, request: Request) -> StandardJSONResponse: # Definindo o tipo de retorno da função
+    etag = f'"{table_versions.token("centros_treinamento")}"'
+    if resposta := nao_modificado(request, etag, curinga=False):
+        return resposta # type: ignore
+
+    # Buscando o centro de treinamento pelo ID no cache de referência
+    centro_treinamento_out = await centros_treinamento_cache.por_id(id)
 
     # Verificando se o centro de treinamento foi encontrado
-    if not centro_treinamento_model:
+    if not centro_treinamento_out:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Centro de treinamento não encontrado no identificador: {id}",
         )
 
+    # If-None-Match: * só depois de confirmar que o ID existe (senão já levantou o 404)
+    if resposta := nao_modificado(request, etag):
+        return resposta # type: ignore
+
     # Retornando o centro de treinamento encontrado no formato de sucesso padronizado
-    return StandardResponseSuccess.create(data=CentroTreinamentoOut.model_validate(centro_treinamento_model))
+    return success_response(centro_treinamento_out, headers=cabecalhos_cache(request, etag))
 
 # Deletando um centro de treinamento pelo ID
 @router.delete(
@@ -92,40 +118,58 @@ async def query_centro_treinamento_by_id(id: UUID4, db_session: DatabaseDependen
      status_code=status.HTTP_204_NO_CONTENT
 )
 async def delete_centro_treinamento(id: UUID4, db_session: DatabaseDependency,) -> None: # Definindo o tipo de retorno da função (None para 204)
-    # Buscando o centro de treinamento pelo ID
-    centro_treinamento: CentroTreinamentoModel = (
-        await db_session.execute(select(CentroTreinamentoModel).filter_by(id=id))
-    ).scalars().first() # type: ignore
+    # Um único DELETE protegido: o centro só é removido se nenhum atleta estiver vinculado a ele.
+    # A FK de atletas.centro_treinamento_id ainda barra um atleta inserido ao mesmo tempo por outra transação.
+    stmt = (
+        delete(CentroTreinamentoModel)
+        .where(CentroTreinamentoModel.id == id, ~exists().where(AtletaModel.centro_treinamento_id == CentroTreinamentoModel.pk_id))
+        .returning(CentroTreinamentoModel.pk_id)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        removido = (await db_session.execute(stmt)).scalar_one_or_none()
+    except IntegrityError:
+        removido = None
 
-    # Verificando se o centro de treinamento foi encontrado
-    if not centro_treinamento:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Centro de treinamento não encontrado no identificador: {id}",
-        )
-    
-    # Verificando se o centro de treinamento possui atletas vinculados
-    atletas_vinculados = (await db_session.execute(
-        select(AtletaModel).filter_by(centro_treinamento_id=centro_treinamento.pk_id)
-    )).scalars().all()
+    if removido is None:
+        # Nada foi removido: descobrindo o motivo (só no caminho de erro)
+        await db_session.rollback()
+        centro_treinamento = (await db_session.execute(
+            select(CentroTreinamentoModel.pk_id, CentroTreinamentoModel.nome).filter_by(id=id)
+        )).first()
 
-    if atletas_vinculados:
+        # Verificando se o centro de treinamento foi encontrado
+        if not centro_treinamento:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Centro de treinamento não encontrado no identificador: {id}",
+            )
+
+        # Contando os atletas vinculados no banco, sem carregá-los
+        atletas_vinculados = (await db_session.execute(
+            select(func.count()).select_from(AtletaModel).filter_by(centro_treinamento_id=centro_treinamento.pk_id)
+        )).scalar_one()
+
+        if not atletas_vinculados:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="O centro de treinamento recebeu atletas durante a exclusão. Por favor, tente novamente."
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
-                f"Não é possível excluir o centro de treinamento '{centro_treinamento.nome}' pois {len(atletas_vinculados)} "
+                f"Não é possível excluir o centro de treinamento '{centro_treinamento.nome}' pois {atletas_vinculados} "
                 f"atleta(s) estão atualmente vinculado(s) a ele."
             )
         )
     
     try:
-        # Deletando o centro de treinamento do banco de dados
-        await db_session.delete(centro_treinamento)
-        # Persistindo as mudanças
-        await db_session.commit()
-    except Exception as e:
+        await registrar_eventos(db_session, "centros_treinamento", "delete", [(id, None)])
+        # Persistindo as mudanças e invalidando o cache de centros de treinamento em todos os workers
+        await commit_and_publish(db_session, ChangeEvent(table="centros_treinamento", op="delete"))
+    except Exception:
         # Em caso de qualquer outro erro inesperado durante a deleção
-        print(f'Erro ao excluir o centro de treinamento: {e}')
+        logger.exception("Erro ao excluir o centro de treinamento %s", id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ocorreu um erro interno ao tentar deletar o centro de treinamento."
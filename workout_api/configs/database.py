@@ -1,13 +1,250 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.contrib.instrumentation import instrumentar_engine, registrar_espera_pool
 
-engine = create_async_engine(settings.DB_URL, echo=False)
+logger = logging.getLogger(__name__)
+
+POOL_CHECKOUT_WAIT = metrics.histogram(
+    "workout_api_db_pool_checkout_wait_seconds",
+    "Tempo esperando uma conexão livre no pool.",
+    ["pool"],
+)
+POOL_CHECKOUT_TIMEOUTS = metrics.counter(
+    "workout_api_db_pool_checkout_timeouts_total",
+    "Requisições que desistiram de esperar uma conexão (DB_POOL_TIMEOUT).",
+    ["pool"],
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool padrão do asyncio que mede o tempo de espera de cada checkout."""
+
+    def _do_get(self):
+        nome = getattr(self, "logging_name", None) or "primary"
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(pool=nome)
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            POOL_CHECKOUT_WAIT.observe(espera, pool=nome)
+            registrar_espera_pool(espera)
+
+
+def build_engine(url: str, nome: str) -> AsyncEngine:
+    """Cria um engine com o pool e os parâmetros de conexão definidos em Settings."""
+    url_obj = make_url(url)
+    kwargs: dict = {"echo": False, "pool_logging_name": nome}
+    connect_args: dict = {}
+
+    if url_obj.get_driver_name() == "asyncpg":
+        cache_size = 0 if settings.DB_PGBOUNCER_MODE else settings.DB_STATEMENT_CACHE_SIZE
+        # statement_cache_size é do asyncpg; prepared_statement_cache_size é do dialeto do SQLAlchemy
+        connect_args["statement_cache_size"] = cache_size
+        connect_args["prepared_statement_cache_size"] = cache_size
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        if settings.DB_PGBOUNCER_MODE:
+            # Nomes únicos evitam colisão de prepared statements entre conexões do PgBouncer
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+
+    if settings.DB_PGBOUNCER_MODE:
+        kwargs["poolclass"] = NullPool
+    elif url_obj.get_backend_name() != "sqlite" or url_obj.database not in (None, "", ":memory:"):
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    engine_ = create_async_engine(url, connect_args=connect_args, **kwargs)
+    if url_obj.get_backend_name() == "sqlite":
+        _transacoes_sqlite(engine_)
+    # Contagem de comandos e tempo de banco por requisição (Server-Timing e /metrics)
+    instrumentar_engine(engine_)
+    return engine_
+
+
+def _transacoes_sqlite(engine_: AsyncEngine) -> None:
+    # O driver sqlite3 só abre a transação antes de um INSERT/UPDATE/DELETE, e um SAVEPOINT fora de
+    # transação vira ele mesmo a transação (o RELEASE faz o commit). O BEGIN explícito, como na
+    # documentação do SQLAlchemy, deixa os savepoints aninhados (Idempotency-Key) funcionarem
+    @event.listens_for(engine_.sync_engine, "connect")
+    def _sem_transacao_do_driver(conexao_dbapi, registro) -> None:
+        conexao_dbapi.isolation_level = None
+
+    @event.listens_for(engine_.sync_engine, "begin")
+    def _begin(conexao) -> None:
+        conexao.exec_driver_sql("BEGIN")
+
+
+engine = build_engine(settings.DB_URL, "primary")
+
+# Engines por nome, usados na exportação das métricas do pool
+ENGINES: dict[str, AsyncEngine] = {"primary": engine}
 
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False) # type: ignore
 
+async def aquecer_pools(conexoes: int) -> None:
+    """
+    Abre até `conexoes` conexões em cada pool (limitado ao pool_size) e as devolve ao pool:
+    as primeiras requisições do worker não pagam o connect nem a inicialização do dialeto.
+    """
+    for nome, engine_ in ENGINES.items():
+        pool = engine_.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        quantidade = min(conexoes, pool.size())
+        if quantidade <= 0:
+            continue
+        # Todas abertas ao mesmo tempo: devolvendo uma antes de abrir a próxima, o pool a reutilizaria
+        abertas = await asyncio.gather(
+            *(engine_.connect().start() for _ in range(quantidade)), return_exceptions=True
+        )
+        falhas = [conexao for conexao in abertas if isinstance(conexao, BaseException)]
+        for conexao in abertas:
+            if not isinstance(conexao, BaseException):
+                await conexao.close()
+        if falhas:
+            logger.warning(
+                "Aquecimento do pool '%s': %d de %d conexões falharam", nome, len(falhas), quantidade,
+                exc_info=falhas[0],
+            )
+
+
+async def encerrar_engines() -> None:
+    """Fecha as conexões de todos os pools (primário e réplicas) no desligamento."""
+    for engine_ in ENGINES.values():
+        await engine_.dispose()
+
+
 async def get_session() -> AsyncGenerator:
     async with async_session() as session: # type: ignore
         yield session
+
+
+READ_SESSIONS = metrics.counter(
+    "workout_api_db_read_sessions_total",
+    "Sessões de leitura abertas por destino (réplica ou primary).",
+    ["target"],
+)
+REPLICA_FAILURES = metrics.counter(
+    "workout_api_db_replica_failures_total",
+    "Falhas de conexão que tiraram uma réplica da rotação.",
+    ["replica"],
+)
+
+
+class ReplicaRouter:
+    """Distribui as sessões de leitura entre as réplicas, voltando ao primário se nenhuma responder."""
+
+    def __init__(self, urls: list[str], strategy: str, retry_seconds: float) -> None:
+        self.strategy = strategy
+        self.retry_seconds = retry_seconds
+        self.replicas: list[tuple[str, sessionmaker]] = []
+        for indice, url in enumerate(urls):
+            nome = f"replica{indice}"
+            engine_ = build_engine(url, nome)
+            ENGINES[nome] = engine_
+            self.replicas.append((nome, sessionmaker(engine_, class_=AsyncSession, expire_on_commit=False))) # type: ignore
+        self._indisponivel_ate: dict[str, float] = {}
+        self._rodizio = itertools.count()
+
+    def _candidatas(self) -> list[tuple[str, sessionmaker]]:
+        agora = time.monotonic()
+        saudaveis = [
+            replica for replica in self.replicas
+            if self._indisponivel_ate.get(replica[0], 0.0) <= agora
+        ]
+        if self.strategy == "least_busy":
+            return sorted(saudaveis, key=lambda replica: _conexoes_em_uso(ENGINES[replica[0]]))
+        if not saudaveis:
+            return []
+        inicio = next(self._rodizio) % len(saudaveis)
+        return saudaveis[inicio:] + saudaveis[:inicio]
+
+    def marcar_indisponivel(self, nome: str) -> None:
+        self._indisponivel_ate[nome] = time.monotonic() + self.retry_seconds
+        REPLICA_FAILURES.inc(replica=nome)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        for nome, fabrica in self._candidatas():
+            session = fabrica()
+            try:
+                # Conecta já, para cair na próxima réplica (ou no primário) se esta estiver fora
+                await session.connection()
+            except Exception:
+                await session.close()
+                logger.exception("Réplica de leitura '%s' indisponível", nome)
+                self.marcar_indisponivel(nome)
+                continue
+            READ_SESSIONS.inc(target=nome)
+            try:
+                yield session
+            finally:
+                await session.close()
+            return
+
+        READ_SESSIONS.inc(target="primary")
+        async with async_session() as session: # type: ignore
+            yield session
+
+
+def _conexoes_em_uso(engine_: AsyncEngine) -> int:
+    pool = engine_.pool
+    return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in (settings.DB_READ_URL or "").split(",") if url.strip()],
+    settings.DB_READ_STRATEGY,
+    settings.DB_READ_RETRY_SECONDS,
+)
+
+
+def read_session():
+    """Sessão somente leitura: réplica saudável, ou o primário se não houver nenhuma."""
+    return replica_router.session()
+
+
+async def get_read_session() -> AsyncGenerator:
+    async with read_session() as session:
+        yield session
+
+
+def _estado_pools():
+    for nome, engine_ in ENGINES.items():
+        pool = engine_.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        yield {"pool": nome, "state": "in_use"}, pool.checkedout()
+        yield {"pool": nome, "state": "idle"}, pool.checkedin()
+        yield {"pool": nome, "state": "overflow"}, max(pool.overflow(), 0)
+        yield {"pool": nome, "state": "size"}, pool.size()
+
+
+metrics.callback(
+    "workout_api_db_pool_connections",
+    "Conexões do pool por estado (in_use, idle, overflow, size).",
+    _estado_pools,
+    labelnames=["pool", "state"],
+)
@@ -0,0 +1,224 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.responses.standard_responses import StandardResponseError
+
+# Controle de admissão: protege o pool de conexões em rajadas. Cada classe de rota (leituras e
+# escritas) tem um limite de requisições em andamento; as excedentes esperam em fila, por ordem
+# de chegada, até ADMISSION_QUEUE_TIMEOUT. Passado esse tempo (ou com a fila cheia) a requisição
+# é recusada na hora com 503 e Retry-After, em vez de esperar DB_POOL_TIMEOUT por uma conexão e
+# estourar o tempo do cliente de qualquer jeito. Opcionalmente, cada cliente tem um balde de
+# fichas por classe (429 ao esvaziar).
+#
+# Os limites valem por worker, como o pool: com SERVER_WORKERS processos o servidor admite até
+# SERVER_WORKERS * ADMISSION_MAX_READS leituras simultâneas.
+
+LEITURA, ESCRITA = "leitura", "escrita"
+METODOS_LEITURA = frozenset({"GET", "HEAD", "OPTIONS"})
+# Observabilidade e documentação nunca são recusadas; o feed SSE é uma conexão longa que não fica
+# com conexão do banco, e ocuparia uma vaga de leitura até o cliente desconectar
+ROTAS_LIVRES = frozenset({"/metrics", "/docs", "/redoc", "/openapi.json", "/feed/eventos"})
+
+ESPERA = metrics.histogram(
+    "workout_api_admission_queue_wait_seconds",
+    "Tempo na fila do controle de admissão, por classe de rota.",
+    ["classe"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+RECUSADAS = metrics.counter(
+    "workout_api_admission_shed_total",
+    "Requisições recusadas pelo controle de admissão, por classe de rota e motivo "
+    "(fila_cheia, tempo_esgotado: 503; limite_taxa: 429).",
+    ["classe", "motivo"],
+)
+
+
+class LimiteDeConcorrencia:
+    """
+    Semáforo com fila FIFO visível: quem sai entrega a vaga direto para o primeiro da fila, então
+    uma requisição que acabou de chegar não passa na frente de quem já esperava.
+    """
+
+    def __init__(self, limite: int, fila_maxima: int) -> None:
+        self.limite = limite
+        self.fila_maxima = fila_maxima
+        self.em_andamento = 0
+        self._fila: deque[asyncio.Future] = deque()
+
+    def na_fila(self) -> int:
+        return len(self._fila)
+
+    async def entrar(self, espera_maxima: float) -> Optional[str]:
+        """Ocupa uma vaga. Devolve None quando admitida, ou o motivo da recusa."""
+        if self.em_andamento < self.limite and not self._fila:
+            self.em_andamento += 1
+            return None
+        if len(self._fila) >= self.fila_maxima:
+            return "fila_cheia"
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._fila.append(futuro)
+        try:
+            # asyncio.wait não cancela o futuro no timeout: dá para saber se a vaga chegou junto
+            await asyncio.wait((futuro,), timeout=espera_maxima)
+        except asyncio.CancelledError:
+            self._desistir(futuro)
+            raise
+        if futuro.done():
+            return None
+        self._desistir(futuro)
+        return "tempo_esgotado"
+
+    def sair(self) -> None:
+        # A vaga passa para o primeiro da fila (em_andamento não muda) ou fica livre
+        while self._fila:
+            futuro = self._fila.popleft()
+            if not futuro.done():
+                futuro.set_result(None)
+                return
+        self.em_andamento -= 1
+
+    def _desistir(self, futuro: asyncio.Future) -> None:
+        if futuro.done():
+            # A vaga foi entregue no mesmo instante da desistência: devolve para o próximo
+            self.sair()
+        else:
+            futuro.cancel()
+            self._fila.remove(futuro)
+
+
+class LimiteDeTaxa:
+    """
+    Balde de fichas por cliente: `rajada` fichas no máximo, repostas a `por_segundo`.
+    Guarda os `maximo_clientes` usados mais recentemente; um cliente esquecido volta com o
+    balde cheio.
+    """
+
+    def __init__(self, por_segundo: float, rajada: int, maximo_clientes: int = 100_000) -> None:
+        self.por_segundo = por_segundo
+        self.rajada = max(rajada, 1)
+        self.maximo_clientes = maximo_clientes
+        self._baldes: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def consumir(self, cliente: str, agora: float) -> float:
+        """Gasta uma ficha. Devolve 0 se havia ficha, ou os segundos até a próxima."""
+        fichas, atualizado_em = self._baldes.pop(cliente, (self.rajada, agora))
+        fichas = min(self.rajada, fichas + (agora - atualizado_em) * self.por_segundo)
+        espera = 0.0
+        if fichas >= 1:
+            fichas -= 1
+        else:
+            espera = (1 - fichas) / self.por_segundo
+        self._baldes[cliente] = (fichas, agora)
+        if len(self._baldes) > self.maximo_clientes:
+            self._baldes.popitem(last=False)
+        return espera
+
+
+def _limite_de_taxa(por_segundo: float, rajada: int) -> Optional[LimiteDeTaxa]:
+    return LimiteDeTaxa(por_segundo, rajada) if por_segundo > 0 else None
+
+
+LIMITES = {
+    LEITURA: LimiteDeConcorrencia(settings.ADMISSION_MAX_READS, settings.ADMISSION_MAX_QUEUE),
+    ESCRITA: LimiteDeConcorrencia(settings.ADMISSION_MAX_WRITES, settings.ADMISSION_MAX_QUEUE),
+}
+TAXAS = {
+    LEITURA: _limite_de_taxa(settings.RATE_LIMIT_READS_PER_SECOND, settings.RATE_LIMIT_READS_BURST),
+    ESCRITA: _limite_de_taxa(settings.RATE_LIMIT_WRITES_PER_SECOND, settings.RATE_LIMIT_WRITES_BURST),
+}
+
+metrics.callback(
+    "workout_api_admission_queue_depth",
+    "Requisições esperando vaga no controle de admissão, por classe de rota.",
+    lambda: [({"classe": classe}, limite.na_fila()) for classe, limite in LIMITES.items()],
+    labelnames=["classe"],
+)
+metrics.callback(
+    "workout_api_admission_in_flight",
+    "Requisições admitidas em andamento, por classe de rota.",
+    lambda: [({"classe": classe}, limite.em_andamento) for classe, limite in LIMITES.items()],
+    labelnames=["classe"],
+)
+
+
+def _cliente(scope: Scope) -> str:
+    # Atrás de proxy, o uvicorn (--proxy-headers) já troca o client pelo X-Forwarded-For
+    cliente = scope.get("client")
+    return cliente[0] if cliente else "desconhecido"
+
+
+async def _recusar(
+    scope: Scope, receive: Receive, send: Send, status_code: int, retry_after: float, message: str, details: dict
+) -> None:
+    segundos = max(1, math.ceil(retry_after))
+    erro = StandardResponseError.create(
+        code=status_code,
+        message=message.format(segundos=segundos),
+        details={**details, "retry_after": segundos},
+    )
+    resposta = JSONResponse(
+        status_code=status_code,
+        content=erro.model_dump(),
+        headers={"Retry-After": str(segundos)},
+    )
+    await resposta(scope, receive, send)
+
+
+class ControleDeAdmissaoMiddleware:
+    """
+    Aplica o limite de taxa do cliente e ocupa uma vaga da classe da rota (leitura para
+    GET/HEAD/OPTIONS, escrita para o resto) durante toda a requisição, inclusive o envio de
+    respostas em streaming.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in ROTAS_LIVRES:
+            await self.app(scope, receive, send)
+            return
+
+        classe = LEITURA if scope["method"] in METODOS_LEITURA else ESCRITA
+
+        taxa = TAXAS[classe]
+        if taxa is not None:
+            espera = taxa.consumir(_cliente(scope), time.monotonic())
+            if espera:
+                RECUSADAS.inc(classe=classe, motivo="limite_taxa")
+                await _recusar(
+                    scope, receive, send, 429, espera,
+                    "Limite de requisições excedido; tente novamente em {segundos} s.",
+                    {"classe": classe},
+                )
+                return
+
+        limite = LIMITES[classe]
+        if limite.limite <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        motivo = await limite.entrar(settings.ADMISSION_QUEUE_TIMEOUT)
+        ESPERA.observe(time.perf_counter() - inicio, classe=classe)
+        if motivo is not None:
+            RECUSADAS.inc(classe=classe, motivo=motivo)
+            await _recusar(
+                scope, receive, send, 503, settings.ADMISSION_QUEUE_TIMEOUT,
+                "Servidor sobrecarregado; tente novamente em {segundos} s.",
+                {"classe": classe, "motivo": motivo},
+            )
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limite.sair()
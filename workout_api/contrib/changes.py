@@ -0,0 +1,181 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Optional, Union
+from uuid import uuid4
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.configs.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Notificação de que uma tabela foi alterada por uma requisição de escrita."""
+    table: str
+    op: str  # "insert", "update", "delete" ou "reset" (estado desconhecido: invalide tudo)
+    # pk_id das linhas alteradas, quando conhecidos (vazio = quaisquer linhas da tabela)
+    ids: tuple[int, ...] = ()
+
+
+# Evento enviado aos ouvintes quando notificações podem ter sido perdidas (ex: reconexão)
+RESET = ChangeEvent(table="*", op="reset")
+
+Listener = Callable[[ChangeEvent], Union[None, Awaitable[None]]]
+
+
+class ChangeBus:
+    """Distribui ChangeEvents para os ouvintes (caches) deste processo."""
+
+    def __init__(self) -> None:
+        self._listeners: list[tuple[Listener, bool]] = []
+
+    def subscribe(self, listener: Listener, local_only: bool = False) -> None:
+        """
+        Registra um ouvinte. Com local_only ele só recebe os eventos dos commits deste processo
+        (não os dos outros workers, nem o RESET da reconexão): para efeitos compartilhados entre
+        os workers, que o processo da escrita já aplicou.
+        """
+        self._listeners.append((listener, local_only))
+
+    async def dispatch(self, event: ChangeEvent, local: bool = False) -> None:
+        for listener, local_only in self._listeners:
+            if local_only and not local:
+                continue
+            resultado = listener(event)
+            if inspect.isawaitable(resultado):
+                await resultado
+
+    async def publish(self, session: AsyncSession, event: ChangeEvent) -> None:
+        # Chamado dentro da transação, antes do commit, para avisar os outros processos
+        pass
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalChangeBus(ChangeBus):
+    """Barramento restrito ao processo atual (testes, SQLite ou um único worker)."""
+
+
+class PostgresChangeBus(ChangeBus):
+    """Propaga os eventos para todos os workers via LISTEN/NOTIFY do Postgres."""
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 1.0) -> None:
+        super().__init__()
+        self._dsn = dsn
+        self._channel = channel
+        self._reconnect_delay = reconnect_delay
+        # Identifica este processo para ignorar as próprias notificações (já despachadas localmente)
+        self._origem = f"{os.getpid()}-{uuid4().hex}"
+        self._connection = None
+        self._tasks: set[asyncio.Task] = set()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def publish(self, session: AsyncSession, event: ChangeEvent) -> None:
+        # pg_notify na mesma transação: a notificação só é entregue se o commit acontecer. Os ids
+        # ficam de fora (um lote de atletas passaria do limite de 8000 bytes do NOTIFY): nos outros
+        # workers o evento vale para a tabela inteira
+        dados = asdict(event)
+        del dados["ids"]
+        payload = json.dumps({**dados, "origem": self._origem})
+        await session.execute(select(func.pg_notify(self._channel, payload)))
+
+    async def start(self) -> None:
+        self._stopping = False
+        try:
+            await self._connect()
+        except Exception:
+            # Como no aquecimento, uma falha aqui não impede a subida do worker: o laço de
+            # reconexão tenta de novo e, até conseguir, os caches só expiram pelo TTL
+            logger.exception("Erro ao iniciar o ouvinte de notificações")
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        connection = await asyncpg.connect(self._dsn)
+        try:
+            await connection.add_listener(self._channel, self._on_notification)
+        except BaseException:
+            await connection.close()
+            raise
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        dados = json.loads(payload)
+        if dados.pop("origem", None) == self._origem:
+            return
+        self._spawn(self.dispatch(ChangeEvent(**dados)))
+
+    def _on_termination(self, connection) -> None:
+        if not self._stopping:
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._stopping:
+            try:
+                await self._connect()
+            except Exception:
+                logger.exception("Erro ao reconectar o ouvinte de notificações")
+                await asyncio.sleep(self._reconnect_delay)
+                continue
+            # Notificações enviadas enquanto estávamos desconectados foram perdidas
+            await self.dispatch(RESET)
+            return
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def _build_change_bus() -> ChangeBus:
+    url = make_url(settings.DB_URL)
+    if settings.CHANGE_BUS_BACKEND == "postgres" and url.get_backend_name() == "postgresql":
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresChangeBus(dsn, settings.CHANGE_BUS_CHANNEL)
+    return LocalChangeBus()
+
+
+change_bus = _build_change_bus()
+
+
+# Chave de session.info com a lista dos eventos a despachar depois do commit da transação externa
+EVENTOS_ADIADOS = "eventos_adiados"
+
+
+async def commit_and_publish(session: AsyncSession, *events: ChangeEvent) -> None:
+    """Faz o commit da sessão avisando todos os workers sobre as tabelas alteradas."""
+    for event in events:
+        await change_bus.publish(session, event)
+    await session.commit()
+    adiados = session.info.get(EVENTOS_ADIADOS)
+    if adiados is not None:
+        # Sessão dentro de uma transação externa (o commit acima só fecha um savepoint): quem fizer
+        # o commit de verdade despacha os eventos, senão os caches seriam invalidados antes dele
+        adiados.extend(events)
+        return
+    # O próprio processo é avisado logo após o commit, sem esperar a volta do NOTIFY
+    for event in events:
+        await change_bus.dispatch(event, local=True)
@@ -0,0 +1,77 @@
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from fastapi import HTTPException, Response
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.contrib.singleflight import SingleFlight
+
+# Coalescência das leituras por id: requisições iguais e simultâneas (ex: centenas de placares
+# pedindo o mesmo atleta no mesmo milissegundo) esperam a consulta e a serialização de uma só.
+#
+# A chave inclui o token de versão da tabela lido no início da requisição: depois de uma escrita
+# o token muda, e uma leitura em andamento desde antes dela não é mais compartilhada.
+
+EXECUTADAS = metrics.counter(
+    "workout_api_coalescing_leaders_total",
+    "Leituras por id que executaram a consulta (uma por grupo de requisições iguais simultâneas).",
+    ["namespace"],
+)
+COMPARTILHADAS = metrics.counter(
+    "workout_api_coalescing_shared_total",
+    "Leituras por id servidas pela consulta em andamento de outra requisição; "
+    "shared / (shared + leaders) é a taxa de coalescência.",
+    ["namespace"],
+)
+
+# Cabeçalhos recalculados pelo Response de cada requisição
+_CABECALHOS_IGNORADOS = {"content-length"}
+
+
+class RequestCoalescer:
+    """
+    Single-flight de respostas: a primeira requisição de uma chave gera a resposta e as que
+    chegam enquanto ela está em andamento recebem uma cópia (mesmo status, cabeçalhos e corpo),
+    ou uma cópia da HTTPException. Cada requisição ganha o próprio Response (os middlewares
+    alteram os cabeçalhos da resposta que enviam) e a própria exceção.
+    """
+
+    def __init__(self, ativo: bool) -> None:
+        self.ativo = ativo
+        self._single_flight: SingleFlight = SingleFlight()
+
+    async def responder(self, namespace: str, chave: Hashable, gerar: Callable[[], Awaitable[Response]]) -> Response:
+        if not self.ativo:
+            return await gerar()
+
+        async def gerar_serializada() -> tuple[int, Optional[dict[str, str]], Any]:
+            try:
+                resposta = await gerar()
+            except HTTPException as e:
+                # Compartilhados só os dados; a exceção é recriada para cada requisição
+                return e.status_code, e.headers, e
+            cabecalhos = {
+                nome: valor for nome, valor in resposta.headers.items() if nome not in _CABECALHOS_IGNORADOS
+            }
+            return resposta.status_code, cabecalhos, bytes(resposta.body)
+
+        (status_code, cabecalhos, corpo), compartilhado = await self._single_flight.do(
+            (namespace, chave), gerar_serializada
+        )
+        (COMPARTILHADAS if compartilhado else EXECUTADAS).inc(namespace=namespace)
+        if isinstance(corpo, HTTPException):
+            raise HTTPException(
+                status_code=status_code, detail=corpo.detail, headers=dict(cabecalhos) if cabecalhos else None
+            )
+        return Response(content=corpo, status_code=status_code, headers=cabecalhos)
+
+    def em_andamento(self) -> int:
+        return self._single_flight.em_andamento()
+
+
+request_coalescer = RequestCoalescer(settings.REQUEST_COALESCING)
+
+metrics.callback(
+    "workout_api_coalescing_in_flight",
+    "Leituras por id em andamento que outras requisições podem aproveitar.",
+    lambda: [({}, request_coalescer.em_andamento())],
+)
@@ -1,7 +1,11 @@
 from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
-from workout_api.configs.database import get_session
+from workout_api.configs.database import get_read_session, get_session
 
 
-DatabaseDependency = Annotated[AsyncSession, Depends(get_session)]
\ No newline at end of file
+DatabaseDependency = Annotated[AsyncSession, Depends(get_session)]
+
+# Sessão para os GETs: vai a uma réplica de leitura quando DB_READ_URL estiver configurado
+ReadDatabaseDependency = Annotated[AsyncSession, Depends(get_read_session)]
+
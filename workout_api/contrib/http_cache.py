@@ -0,0 +1,81 @@
+import secrets
+from typing import Optional
+
+from fastapi import Request, Response, status
+from workout_api.contrib.changes import ChangeEvent, change_bus
+
+
+class TableVersions:
+    """
+    Token de versão por tabela, usado nos ETags das rotas GET.
+
+    O token é trocado a cada ChangeEvent da tabela (inclusive os de outros workers, via
+    change_bus), então comparar o If-None-Match com o token atual não custa nenhuma consulta.
+    Cada worker sorteia os próprios tokens: um ETag de outro worker só gera um 200 a mais.
+    """
+
+    def __init__(self) -> None:
+        self._tokens: dict[str, str] = {}
+
+    def token(self, table: str) -> str:
+        if table not in self._tokens:
+            self._tokens[table] = secrets.token_hex(6)
+        return self._tokens[table]
+
+    def bump(self, table: str) -> None:
+        if table == "*":
+            self._tokens.clear()
+        else:
+            self._tokens[table] = secrets.token_hex(6)
+
+
+table_versions = TableVersions()
+
+
+def _trocar_por_evento(event: ChangeEvent) -> None:
+    table_versions.bump(event.table)
+
+
+change_bus.subscribe(_trocar_por_evento)
+
+
+def cache_control(valor: str):
+    """Dependência de router: define o Cache-Control enviado pelas rotas GET com ETag."""
+    async def definir_cache_control(request: Request) -> None:
+        request.state.cache_control = valor
+    return definir_cache_control
+
+
+def etags_recebidos(request: Request) -> list[str]:
+    """Valores opacos do If-None-Match (sem aspas e sem W/: a comparação é fraca, RFC 9110)."""
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return []
+    valores = []
+    for etag in cabecalho.split(","):
+        etag = etag.strip()
+        if etag.startswith("W/"):
+            etag = etag[2:]
+        if etag == "*" or (len(etag) >= 2 and etag.startswith('"') and etag.endswith('"')):
+            valores.append(etag.strip('"'))
+    return valores
+
+
+def cabecalhos_cache(request: Request, etag: str) -> dict[str, str]:
+    cabecalhos = {"ETag": etag}
+    cache_control_ = getattr(request.state, "cache_control", None)
+    if cache_control_:
+        cabecalhos["Cache-Control"] = cache_control_
+    return cabecalhos
+
+
+def nao_modificado(request: Request, etag: str, curinga: bool = True) -> Optional[Response]:
+    """
+    304 sem corpo se o cliente já tem a representação com este ETag; None caso contrário.
+    If-None-Match: * casa com qualquer representação que exista: nas rotas por id, passe
+    curinga=False antes de saber se o recurso existe.
+    """
+    recebidos = etags_recebidos(request)
+    if (curinga and "*" in recebidos) or etag.strip('"') in recebidos:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos_cache(request, etag))
+    return None
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Response, status
+from pydantic_core import to_json
+from sqlalchemy import Column, DateTime, Index, LargeBinary, SmallInteger, String, Table, delete, func, insert, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.configs.database import engine
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.contrib.changes import EVENTOS_ADIADOS, change_bus
+from workout_api.contrib.models import BaseModel
+from workout_api.responses.standard_responses import error_content
+
+logger = logging.getLogger(__name__)
+
+# Idempotency-Key: o cliente que repete um POST (ex: o balanceador encerrou a conexão antes da
+# resposta de um lote grande) manda a mesma chave, e recebe a resposta gravada na primeira vez,
+# sem que a rota rode de novo. Requisições simultâneas com a mesma chave esperam a primeira.
+#
+# A espera usa uma trava por chave no processo e, no Postgres, uma trava consultiva na transação
+# (vale entre workers). A rota roda nessa mesma transação, com a sessão presa à conexão da trava
+# (os commits dela viram savepoints): a requisição ocupa uma única conexão do pool, e as linhas
+# da rota e a resposta gravada entram no mesmo commit. Se o processo cair no meio, nenhuma das
+# duas fica, e a repetição roda de novo. Respostas 4xx também são gravadas (repetir o lote daria
+# o mesmo erro); 5xx não: a transação é desfeita e a repetição roda de novo.
+
+TAMANHO_MAXIMO_CHAVE = 255
+# SQLSTATE do Postgres para lock_timeout estourado (lock_not_available)
+TRAVA_INDISPONIVEL = "55P03"
+
+idempotency_keys = Table(
+    'idempotency_keys',
+    BaseModel.metadata,
+    # Rota ("POST /atletas/") e chave do cliente: a mesma chave em rotas diferentes são requisições diferentes
+    Column('rota', String(100), primary_key=True),
+    Column('chave', String(TAMANHO_MAXIMO_CHAVE), primary_key=True),
+    # SHA-256 do corpo da requisição: a chave reaproveitada com outro corpo é um erro do cliente
+    Column('hash_corpo', String(64), nullable=False),
+    Column('status_code', SmallInteger, nullable=False),
+    Column('corpo', LargeBinary, nullable=False),
+    Column('criado_em', DateTime, nullable=False),
+    Column('expira_em', DateTime, nullable=False),
+    Index('ix_idempotency_keys_expira_em', 'expira_em'),
+)
+
+REQUISICOES = metrics.counter(
+    "workout_api_idempotency_requests_total",
+    "Requisições com Idempotency-Key por rota e resultado "
+    "(executada, repetida, corpo_diferente, em_andamento).",
+    ["rota", "resultado"],
+)
+
+
+class IdempotencyStore:
+    """Executa uma rota uma única vez por Idempotency-Key e repete a resposta gravada."""
+
+    def __init__(self, ttl: timedelta, espera_maxima: float, intervalo_limpeza: float) -> None:
+        self.ttl = ttl
+        self.espera_maxima = espera_maxima
+        self.intervalo_limpeza = intervalo_limpeza
+        # Travas por (rota, chave) com a quantidade de requisições usando cada uma
+        self._travas: dict[tuple[str, str], list] = {}
+        self._ultima_limpeza = time.monotonic()
+
+    async def responder(
+        self,
+        rota: str,
+        chave: Optional[str],
+        corpo: bytes,
+        session: AsyncSession,
+        gerar: Callable[[AsyncSession], Awaitable[Response]],
+    ) -> Response:
+        """
+        Sem chave, chama gerar(session) com a sessão da requisição. Com chave, gerar recebe uma
+        sessão na transação da trava, no lugar dela.
+        """
+        if chave is None:
+            return await gerar(session)
+        if not chave or len(chave) > TAMANHO_MAXIMO_CHAVE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key deve ter de 1 a {TAMANHO_MAXIMO_CHAVE} caracteres.",
+            )
+
+        hash_corpo = hashlib.sha256(corpo).hexdigest()
+        trava = self._travas.setdefault((rota, chave), [asyncio.Lock(), 0])
+        trava[1] += 1
+        try:
+            try:
+                await asyncio.wait_for(trava[0].acquire(), self.espera_maxima)
+            except asyncio.TimeoutError:
+                self._em_andamento(rota)
+            try:
+                status_code, conteudo, repetida = await self._executar(rota, chave, hash_corpo, gerar)
+            finally:
+                trava[0].release()
+        finally:
+            trava[1] -= 1
+            if not trava[1]:
+                del self._travas[(rota, chave)]
+
+        REQUISICOES.inc(rota=rota, resultado="repetida" if repetida else "executada")
+        await self._limpar_se_preciso()
+        headers = {"Idempotent-Replayed": "true"} if repetida else None
+        return Response(content=conteudo, status_code=status_code, media_type="application/json", headers=headers)
+
+    async def _executar(
+        self, rota: str, chave: str, hash_corpo: str, gerar: Callable[[AsyncSession], Awaitable[Response]]
+    ) -> tuple[int, bytes, bool]:
+        eventos: list = []
+        async with engine.connect() as conexao, conexao.begin():
+            if engine.dialect.name == "postgresql":
+                # Presa até o commit: outro worker com a mesma chave espera aqui a resposta ser gravada
+                await conexao.execute(text(f"SET LOCAL lock_timeout = {int(self.espera_maxima * 1000)}"))
+                try:
+                    await conexao.execute(
+                        select(func.pg_advisory_xact_lock(func.hashtext(f"idempotency:{rota}:{chave}")))
+                    )
+                except DBAPIError as e:
+                    if getattr(e.orig, "sqlstate", None) != TRAVA_INDISPONIVEL:
+                        raise
+                    self._em_andamento(rota)
+                # O limite vale só para a trava, não para as instruções da rota
+                await conexao.execute(text("SET LOCAL lock_timeout = DEFAULT"))
+
+            agora = datetime.utcnow()
+            gravada = (await conexao.execute(
+                select(idempotency_keys.c.hash_corpo, idempotency_keys.c.status_code, idempotency_keys.c.corpo)
+                .where(
+                    idempotency_keys.c.rota == rota,
+                    idempotency_keys.c.chave == chave,
+                    idempotency_keys.c.expira_em > agora,
+                )
+            )).first()
+            if gravada is not None:
+                if gravada.hash_corpo != hash_corpo:
+                    REQUISICOES.inc(rota=rota, resultado="corpo_diferente")
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Idempotency-Key já usada com outro corpo de requisição.",
+                    )
+                return gravada.status_code, gravada.corpo, True
+
+            # commit/rollback da rota só fecham ou desfazem um savepoint; os eventos de alteração
+            # são despachados neste processo depois do commit abaixo
+            async with AsyncSession(
+                bind=conexao, join_transaction_mode="create_savepoint", expire_on_commit=False
+            ) as session:
+                session.info[EVENTOS_ADIADOS] = eventos
+                try:
+                    resposta = await gerar(session)
+                    status_code, conteudo = resposta.status_code, bytes(resposta.body)
+                except HTTPException as exc:
+                    if exc.status_code >= 500:
+                        raise
+                    status_code, conteudo = exc.status_code, to_json(error_content(exc.status_code, exc.detail))
+
+            # Uma gravação vencida da mesma chave (ainda não limpa) é substituída
+            await conexao.execute(
+                delete(idempotency_keys).where(idempotency_keys.c.rota == rota, idempotency_keys.c.chave == chave)
+            )
+            await conexao.execute(insert(idempotency_keys).values(
+                rota=rota, chave=chave, hash_corpo=hash_corpo, status_code=status_code, corpo=conteudo,
+                criado_em=agora, expira_em=agora + self.ttl,
+            ))
+        for evento in eventos:
+            await change_bus.dispatch(evento, local=True)
+        return status_code, conteudo, False
+
+    def _em_andamento(self, rota: str) -> None:
+        REQUISICOES.inc(rota=rota, resultado="em_andamento")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Requisição com a mesma Idempotency-Key ainda em andamento. Tente novamente em instantes.",
+        )
+
+    async def _limpar_se_preciso(self) -> None:
+        # Limpeza das chaves vencidas no máximo a cada intervalo_limpeza segundos, por worker
+        if time.monotonic() - self._ultima_limpeza < self.intervalo_limpeza:
+            return
+        self._ultima_limpeza = time.monotonic()
+        try:
+            await self.limpar_expiradas()
+        except Exception:
+            logger.exception("Erro ao limpar as Idempotency-Keys vencidas")
+
+    async def limpar_expiradas(self) -> int:
+        async with engine.begin() as conexao:
+            resultado = await conexao.execute(
+                delete(idempotency_keys).where(idempotency_keys.c.expira_em <= datetime.utcnow())
+            )
+        return resultado.rowcount
+
+
+idempotency_store = IdempotencyStore(
+    ttl=timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+    espera_maxima=settings.IDEMPOTENCY_LOCK_TIMEOUT,
+    intervalo_limpeza=settings.IDEMPOTENCY_CLEANUP_INTERVAL,
+)
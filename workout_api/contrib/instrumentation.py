@@ -0,0 +1,177 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+
+logger = logging.getLogger(__name__)
+
+# Instrumentação por requisição: quantos comandos SQL, quanto tempo no banco e quanto tempo
+# esperando conexão no pool. Os eventos do engine somam no objeto da requisição atual
+# (ContextVar), e o middleware publica o resultado em Server-Timing e em /metrics.
+
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 50, 100, 250, 1000)
+
+REQUESTS = metrics.counter(
+    "workout_api_http_requests_total",
+    "Requisições HTTP por rota e status.",
+    ["method", "route", "status"],
+)
+REQUEST_DURATION = metrics.histogram(
+    "workout_api_http_request_duration_seconds",
+    "Duração das requisições HTTP por rota.",
+    ["method", "route"],
+)
+REQUEST_QUERIES = metrics.histogram(
+    "workout_api_db_queries_per_request",
+    "Comandos SQL executados por requisição.",
+    ["method", "route"],
+    buckets=QUERY_BUCKETS,
+)
+REQUEST_DB_TIME = metrics.histogram(
+    "workout_api_db_time_per_request_seconds",
+    "Tempo total no banco por requisição.",
+    ["method", "route"],
+)
+REQUEST_POOL_WAIT = metrics.histogram(
+    "workout_api_db_pool_wait_per_request_seconds",
+    "Tempo total esperando conexões do pool por requisição.",
+    ["method", "route"],
+)
+BUDGET_EXCEEDED = metrics.counter(
+    "workout_api_query_budget_exceeded_total",
+    "Requisições que passaram do orçamento de comandos SQL da rota.",
+    ["method", "route"],
+)
+
+
+class OrcamentoDeConsultasExcedido(RuntimeError):
+    """Uma requisição executou mais comandos SQL que o orçamento da rota (QUERY_BUDGET_MODE=raise)."""
+
+
+@dataclass
+class EstatisticasRequisicao:
+    scope: Scope
+    consultas: int = 0
+    tempo_db: float = 0.0
+    espera_pool: float = 0.0
+    excedeu: bool = False
+    _inicios: list[float] = field(default_factory=list)
+
+    @property
+    def rota(self) -> str:
+        return rota_da_requisicao(self.scope)
+
+
+_requisicao_atual: ContextVar[Optional[EstatisticasRequisicao]] = ContextVar("requisicao_atual", default=None)
+
+
+def estatisticas_atuais() -> Optional[EstatisticasRequisicao]:
+    return _requisicao_atual.get()
+
+
+def rota_da_requisicao(scope: Scope) -> str:
+    # O caminho da rota (/atletas/{id}), não a URL: mantém a cardinalidade dos labels baixa
+    rota = scope.get("route")
+    return getattr(rota, "path", None) or "desconhecida"
+
+
+def orcamento_da_rota(metodo: str, rota: str) -> int:
+    return settings.QUERY_BUDGETS.get(f"{metodo} {rota}", settings.QUERY_BUDGET_DEFAULT)
+
+
+def _verificar_orcamento(estatisticas: EstatisticasRequisicao) -> None:
+    metodo, rota = estatisticas.scope.get("method", ""), estatisticas.rota
+    orcamento = orcamento_da_rota(metodo, rota)
+    if estatisticas.consultas <= orcamento or estatisticas.excedeu:
+        return
+    estatisticas.excedeu = True
+    BUDGET_EXCEEDED.inc(method=metodo, route=rota)
+    mensagem = f"{metodo} {rota} passou do orçamento de {orcamento} comando(s) SQL por requisição"
+    if settings.QUERY_BUDGET_MODE == "raise":
+        raise OrcamentoDeConsultasExcedido(mensagem)
+    logger.warning(mensagem)
+
+
+def _antes_do_comando(conn, cursor, statement, parameters, context, executemany) -> None:
+    estatisticas = _requisicao_atual.get()
+    if estatisticas is None:
+        return
+    estatisticas.consultas += 1
+    estatisticas._inicios.append(time.perf_counter())
+    if settings.QUERY_BUDGET_MODE != "off":
+        _verificar_orcamento(estatisticas)
+
+
+def _depois_do_comando(conn, cursor, statement, parameters, context, executemany) -> None:
+    estatisticas = _requisicao_atual.get()
+    if estatisticas is not None and estatisticas._inicios:
+        estatisticas.tempo_db += time.perf_counter() - estatisticas._inicios.pop()
+
+
+def instrumentar_engine(engine: AsyncEngine) -> None:
+    """Liga a contagem de comandos e o tempo de banco por requisição a um engine."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _antes_do_comando)
+    event.listen(engine.sync_engine, "after_cursor_execute", _depois_do_comando)
+
+
+def registrar_espera_pool(segundos: float) -> None:
+    estatisticas = _requisicao_atual.get()
+    if estatisticas is not None:
+        estatisticas.espera_pool += segundos
+
+
+class InstrumentacaoMiddleware:
+    """
+    Middleware ASGI que abre as estatísticas de cada requisição HTTP, envia o cabeçalho
+    Server-Timing (db, pool, app) e registra as métricas por rota ao final.
+
+    Respostas em streaming continuam consultando o banco depois dos cabeçalhos: o
+    Server-Timing mostra o que aconteceu até ali, as métricas contam a requisição inteira.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estatisticas = EstatisticasRequisicao(scope=scope)
+        token = _requisicao_atual.set(estatisticas)
+        inicio = time.perf_counter()
+        status_code = 500
+
+        async def send_com_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", _server_timing(estatisticas, inicio))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_com_timing)
+        finally:
+            _requisicao_atual.reset(token)
+            metodo, rota = scope["method"], estatisticas.rota
+            REQUESTS.inc(method=metodo, route=rota, status=str(status_code))
+            REQUEST_DURATION.observe(time.perf_counter() - inicio, method=metodo, route=rota)
+            REQUEST_QUERIES.observe(estatisticas.consultas, method=metodo, route=rota)
+            REQUEST_DB_TIME.observe(estatisticas.tempo_db, method=metodo, route=rota)
+            REQUEST_POOL_WAIT.observe(estatisticas.espera_pool, method=metodo, route=rota)
+
+
+def _server_timing(estatisticas: EstatisticasRequisicao, inicio: float) -> str:
+    return (
+        f'db;dur={estatisticas.tempo_db * 1000:.2f};desc="{estatisticas.consultas} consultas", '
+        f"pool;dur={estatisticas.espera_pool * 1000:.2f}, "
+        f"app;dur={(time.perf_counter() - inicio) * 1000:.2f}"
+    )
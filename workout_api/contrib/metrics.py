@@ -0,0 +1,184 @@
+import math
+import threading
+from typing import Callable, Iterable, Optional, Sequence
+
+# Formato de exposição texto do Prometheus, sem depender do prometheus_client
+
+Labels = tuple[tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labelnames: Sequence[str], valores: dict) -> Labels:
+    return tuple((nome, str(valores.get(nome, ""))) for nome in labelnames)
+
+
+def _formatar_labels(labels: Iterable[tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    conteudo = ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in labels)
+    return "{" + conteudo + "}"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_valor(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        return []
+
+    def render(self) -> list[str]:
+        linhas = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for nome, labels, valor in self.samples():
+            linhas.append(f"{nome}{_formatar_labels(labels)} {_formatar_valor(valor)}")
+        return linhas
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._valores: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        chave = _labels(self.labelnames, labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._valores.get(_labels(self.labelnames, labels), 0.0)
+
+    def samples(self):
+        for labels, valor in list(self._valores.items()):
+            yield self.name, labels, valor
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._valores[_labels(self.labelnames, labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Para cada conjunto de labels: contagem por bucket, soma e total
+        self._series: dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        chave = _labels(self.labelnames, labels)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * len(self.buckets), 0.0, 0]
+            for indice, limite in enumerate(self.buckets):
+                if value <= limite:
+                    serie[0][indice] += 1
+                    break
+            serie[1] += value
+            serie[2] += 1
+
+    def samples(self):
+        for labels, (contagens, soma, total) in list(self._series.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                yield f"{self.name}_bucket", labels + (("le", _formatar_valor(limite)),), acumulado
+            yield f"{self.name}_sum", labels, soma
+            yield f"{self.name}_count", labels, total
+
+
+class CallbackMetric(Metric):
+    """Métrica lida no momento da coleta (ex: estado atual do pool de conexões)."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[tuple[dict, float]]],
+        kind: str = "gauge",
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._callback = callback
+
+    def samples(self):
+        for labels, valor in self._callback():
+            yield self.name, _labels(self.labelnames, labels), valor
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        linhas: list[str] = []
+        for metric in self._metrics.values():
+            linhas.extend(metric.render())
+        return "\n".join(linhas) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames)) # type: ignore
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames)) # type: ignore
+
+
+def histogram(
+    name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets)) # type: ignore
+
+
+def callback(
+    name: str,
+    documentation: str,
+    function: Callable[[], Iterable[tuple[dict, float]]],
+    kind: str = "gauge",
+    labelnames: Sequence[str] = (),
+) -> CallbackMetric:
+    return REGISTRY.register(CallbackMetric(name, documentation, function, kind, labelnames)) # type: ignore
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -3,4 +3,5 @@ from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
 class BaseModel(DeclarativeBase):
-    id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), default=UUID, nullable=False)
\ No newline at end of file
+    # Todas as rotas /{id} filtram pelo id público: índice único (ix_<tabela>_id) em cada tabela
+    id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), default=UUID, nullable=False, index=True, unique=True)
\ No newline at end of file
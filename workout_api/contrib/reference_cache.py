@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Generic, Iterable, Optional, Type, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel as PydanticModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.categorias.models import CategoriaModel
+from workout_api.categorias.schemas import CategoriaOut
+from workout_api.centro_treinamento.models import CentroTreinamentoModel
+from workout_api.centro_treinamento.schemas import CentroTreinamentoOut
+from workout_api.configs.database import async_session
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.contrib.changes import ChangeEvent, change_bus
+
+S = TypeVar('S', bound=PydanticModel)
+
+
+class ReferenceCache(Generic[S]):
+    """
+    Cache em processo de uma tabela de referência pequena (categorias, centros de treinamento).
+
+    A tabela inteira é carregada em uma única consulta e mantida até expirar o TTL ou
+    até chegar um ChangeEvent da tabela (de qualquer worker). A carga sempre usa o
+    primário: ler de uma réplica atrasada manteria dados antigos no cache por todo o TTL.
+    Um nome desconhecido força uma recarga no máximo uma vez a cada intervalo_recarga.
+    """
+
+    def __init__(self, model: type, schema: Type[S], table: str, ttl: float, intervalo_recarga: float) -> None:
+        self.model = model
+        self.schema = schema
+        self.table = table
+        self.ttl = ttl
+        self.intervalo_recarga = intervalo_recarga
+        self.hits = 0
+        self.misses = 0
+        self._pk_id_por_nome: dict[str, int] = {}
+        self._nome_por_pk_id: dict[int, str] = {}
+        self._por_id: dict[UUID, S] = {}
+        self._expira_em = 0.0
+        self._recarga_forcada_em = float("-inf")
+        # Incrementada a cada invalidação para descartar cargas iniciadas antes dela
+        self._geracao = 0
+        self._lock = asyncio.Lock()
+
+    def _valido(self) -> bool:
+        return time.monotonic() < self._expira_em
+
+    async def _carregar(self, session: Optional[AsyncSession] = None) -> None:
+        async with self._lock:
+            # Outra requisição pode ter carregado enquanto esperávamos o lock
+            if self._valido():
+                return
+            geracao = self._geracao
+            stmt = select(self.model).order_by(self.model.pk_id)
+            if session is not None:
+                # Pela conexão que a requisição já tem: pegar outra do pool enquanto segura uma
+                # esgota o pool com requisições simultâneas (todas esperando a segunda conexão)
+                modelos = (await session.execute(stmt)).scalars().all()
+            else:
+                async with async_session() as nova: # type: ignore
+                    modelos = (await nova.execute(stmt)).scalars().all()
+
+            self._pk_id_por_nome = {modelo.nome: modelo.pk_id for modelo in modelos}
+            self._nome_por_pk_id = {modelo.pk_id: modelo.nome for modelo in modelos}
+            self._por_id = {modelo.id: self.schema.model_validate(modelo) for modelo in modelos}
+            if geracao == self._geracao:
+                self._expira_em = time.monotonic() + self.ttl
+
+    async def _garantir(self, session: Optional[AsyncSession] = None) -> bool:
+        # Retorna True se foi preciso ir ao banco
+        if self._valido():
+            self.hits += 1
+            return False
+        self.misses += 1
+        await self._carregar(session)
+        return True
+
+    async def pk_ids_por_nome(self, nomes: Iterable[str], session: Optional[AsyncSession] = None) -> dict[str, int]:
+        """
+        Resolve nomes para pk_id; nomes inexistentes ficam fora do dicionário. Numa escrita, passe
+        a sessão da requisição: uma carga necessária usa a conexão dela (sempre o primário).
+        """
+        nomes = set(nomes)
+        carregou = await self._garantir(session)
+        agora = time.monotonic()
+        if (
+            not carregou
+            and not nomes <= self._pk_id_por_nome.keys()
+            and agora - self._recarga_forcada_em >= self.intervalo_recarga
+        ):
+            # O nome pode ter sido criado em outro worker e a notificação ainda não chegou.
+            # Marcado antes do await: requisições simultâneas (ou um cliente repetindo um nome
+            # inexistente) não transformam cada requisição numa leitura da tabela inteira
+            self._recarga_forcada_em = agora
+            self.invalidar()
+            self.misses += 1
+            await self._carregar(session)
+        return {nome: self._pk_id_por_nome[nome] for nome in nomes if nome in self._pk_id_por_nome}
+
+    async def pk_id_por_nome(self, nome: str, session: Optional[AsyncSession] = None) -> Optional[int]:
+        return (await self.pk_ids_por_nome([nome], session)).get(nome)
+
+    async def nomes_por_pk_id(self) -> dict[int, str]:
+        await self._garantir()
+        return dict(self._nome_por_pk_id)
+
+    async def por_id(self, id: UUID) -> Optional[S]:
+        await self._garantir()
+        return self._por_id.get(id)
+
+    async def todos(self) -> list[S]:
+        await self._garantir()
+        return list(self._por_id.values())
+
+    def invalidar(self) -> None:
+        self._geracao += 1
+        self._expira_em = 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+categorias_cache: ReferenceCache[CategoriaOut] = ReferenceCache(
+    CategoriaModel, CategoriaOut, "categorias", settings.REFERENCE_CACHE_TTL,
+    settings.REFERENCE_CACHE_RELOAD_INTERVAL,
+)
+centros_treinamento_cache: ReferenceCache[CentroTreinamentoOut] = ReferenceCache(
+    CentroTreinamentoModel, CentroTreinamentoOut, "centros_treinamento", settings.REFERENCE_CACHE_TTL,
+    settings.REFERENCE_CACHE_RELOAD_INTERVAL,
+)
+
+REFERENCE_CACHES = (categorias_cache, centros_treinamento_cache)
+
+
+def _invalidar_por_evento(event: ChangeEvent) -> None:
+    for cache in REFERENCE_CACHES:
+        if event.table in (cache.table, "*"):
+            cache.invalidar()
+
+
+change_bus.subscribe(_invalidar_por_evento)
+
+
+def stats() -> dict:
+    """Contadores de acertos e faltas de cada cache de referência."""
+    return {cache.table: cache.stats() for cache in REFERENCE_CACHES}
+
+
+metrics.callback(
+    "workout_api_reference_cache_hits_total",
+    "Consultas a tabelas de referência respondidas pelo cache.",
+    lambda: (({"table": cache.table}, cache.hits) for cache in REFERENCE_CACHES),
+    kind="counter",
+    labelnames=["table"],
+)
+metrics.callback(
+    "workout_api_reference_cache_misses_total",
+    "Consultas a tabelas de referência que precisaram ir ao banco.",
+    lambda: (({"table": cache.table}, cache.misses) for cache in REFERENCE_CACHES),
+    kind="counter",
+    labelnames=["table"],
+)
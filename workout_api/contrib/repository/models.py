@@ -1,3 +1,8 @@
 from workout_api.categorias.models import CategoriaModel
 from workout_api.atleta.models import AtletaModel
-from workout_api.centro_treinamento.models import CentroTreinamentoModel
\ No newline at end of file
+from workout_api.centro_treinamento.models import CentroTreinamentoModel
+from workout_api.importacao.models import AtletaImportacaoModel, ImportacaoErroModel, ImportacaoModel
+from workout_api.estatisticas.models import atletas_estatisticas_delta, atletas_histograma, atletas_resumo
+from workout_api.treinos.models import treinos_diarios, treinos_semanais, treinos_series
+from workout_api.contrib.idempotency import idempotency_keys
+from workout_api.feed.models import feed_eventos
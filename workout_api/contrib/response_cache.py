@@ -0,0 +1,369 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Sequence
+from urllib.parse import unquote, urlsplit
+
+from fastapi import HTTPException, Response
+from workout_api.configs.database import async_session, read_session
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.contrib.changes import ChangeEvent, change_bus
+from workout_api.contrib.http_cache import table_versions
+from workout_api.contrib.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Cache compartilhado das respostas de listagem, já serializadas em bytes.
+#
+# A invalidação é por geração: cada tag (tabela) tem um contador no backend, e a chave de
+# cada resposta inclui os contadores das suas tags lidos antes de gerá-la. Invalidar uma tag
+# é só incrementar o contador; as entradas antigas ficam inalcançáveis e expiram pelo TTL.
+# Uma resposta gerada durante uma escrita fica guardada sob a geração anterior e nunca é servida.
+# A resposta é gerada numa réplica (sessao()), menos enquanto alguma das tags tiver uma geração
+# vista há menos de DB_READ_MAX_LAG: logo depois de uma escrita uma réplica atrasada devolveria os
+# dados de antes dela já sob a geração nova, servidos por todo o TTL, então aí a leitura vai ao primário.
+#
+# Com um backend compartilhado (Redis) só o processo que fez a escrita incrementa os contadores;
+# no backend em memória cada worker tem os próprios, incrementados pelos eventos de todos.
+
+HITS = metrics.counter("workout_api_response_cache_hits_total", "Respostas servidas pelo cache.", ["namespace"])
+MISSES = metrics.counter("workout_api_response_cache_misses_total", "Respostas geradas por falta no cache.", ["namespace"])
+COALESCED = metrics.counter(
+    "workout_api_response_cache_coalesced_total",
+    "Requisições que esperaram a geração em andamento da mesma resposta (single-flight).",
+    ["namespace"],
+)
+ERRORS = metrics.counter(
+    "workout_api_response_cache_errors_total", "Falhas de acesso ao backend do cache (a requisição segue sem cache).", ["op"]
+)
+
+# Tags invalidadas por um evento "*" (estado desconhecido)
+TODAS_AS_TAGS = ("atletas", "categorias", "centros_treinamento")
+
+# Cabeçalhos gerados pelo próprio Response, que não devem ser guardados com o corpo
+_CABECALHOS_IGNORADOS = {"content-length", "content-type"}
+
+
+class CacheBackend:
+    """Interface dos backends: valores em bytes com TTL e contadores sem expiração."""
+
+    # Compartilhado entre os workers (um incremento vale para todos)
+    compartilhado = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """LRU em processo (um único worker, testes, ou quando não há Redis)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._valores: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        # Contadores ficam fora do LRU: perder um contador faria uma geração antiga voltar a valer
+        self._contadores: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self._contadores:
+            return str(self._contadores[key]).encode()
+        item = self._valores.get(key)
+        if item is None:
+            return None
+        expira_em, valor = item
+        if expira_em <= time.monotonic():
+            del self._valores[key]
+            return None
+        self._valores.move_to_end(key)
+        return valor
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._valores[key] = (time.monotonic() + ttl, value)
+        self._valores.move_to_end(key)
+        while len(self._valores) > self.max_entries:
+            self._valores.popitem(last=False)
+
+    async def incr(self, key: str) -> int:
+        self._contadores[key] = self._contadores.get(key, 0) + 1
+        return self._contadores[key]
+
+
+class RedisErro(Exception):
+    """Resposta de erro (-ERR ...) do servidor Redis."""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cliente mínimo do protocolo do Redis (RESP2) sobre asyncio, sem dependências externas.
+
+    Usa só GET, MGET, SET PX e INCR; funciona com Redis, Valkey, KeyDB ou qualquer servidor
+    compatível (benchmarks/response_cache.py o verifica contra um servidor falso local). As
+    conexões ficam em um pool simples.
+    """
+
+    compartilhado = True
+
+    def __init__(self, url: str, pool_size: int = 10, timeout: float = 0.25) -> None:
+        partes = urlsplit(url)
+        self.host = partes.hostname or "localhost"
+        self.port = partes.port or 6379
+        self.password = unquote(partes.password) if partes.password else None
+        self.db = int(partes.path.strip("/") or 0)
+        self.timeout = timeout
+        self._livres: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._limite = asyncio.Semaphore(pool_size)
+
+    async def _conectar(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._enviar(reader, writer, "AUTH", self.password)
+        if self.db:
+            await self._enviar(reader, writer, "SELECT", self.db)
+        return reader, writer
+
+    async def _comando(self, *args: Any) -> Any:
+        async with self._limite:
+            conexao = self._livres.pop() if self._livres else None
+            try:
+                if conexao is None:
+                    conexao = await asyncio.wait_for(self._conectar(), self.timeout)
+                resposta = await asyncio.wait_for(self._enviar(*conexao, *args), self.timeout)
+            except BaseException:
+                # Conexão em estado desconhecido (timeout no meio da resposta): descarta
+                if conexao is not None:
+                    conexao[1].close()
+                raise
+            self._livres.append(conexao)
+            return resposta
+
+    @staticmethod
+    async def _enviar(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, *args: Any) -> Any:
+        partes = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            dado = arg if isinstance(arg, bytes) else str(arg).encode()
+            partes.append(b"$%d\r\n%s\r\n" % (len(dado), dado))
+        writer.write(b"".join(partes))
+        await writer.drain()
+        return await RedisBackend._ler(reader)
+
+    @staticmethod
+    async def _ler(reader: asyncio.StreamReader) -> Any:
+        linha = await reader.readline()
+        if not linha:
+            raise ConnectionError("Conexão com o Redis encerrada")
+        tipo, conteudo = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return conteudo.decode()
+        if tipo == b"-":
+            raise RedisErro(conteudo.decode())
+        if tipo == b":":
+            return int(conteudo)
+        if tipo == b"$":
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            return (await reader.readexactly(tamanho + 2))[:-2]
+        if tipo == b"*":
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            return [await RedisBackend._ler(reader) for _ in range(tamanho)]
+        raise RedisErro(f"Resposta inesperada do servidor: {linha!r}")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._comando("GET", key)
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        return await self._comando("MGET", *keys) if keys else []
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._comando("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    async def incr(self, key: str) -> int:
+        return await self._comando("INCR", key)
+
+    async def close(self) -> None:
+        while self._livres:
+            _, writer = self._livres.pop()
+            writer.close()
+
+
+# Falhas do backend que não devem derrubar a requisição: ela segue sem cache
+ERROS_BACKEND = (OSError, asyncio.TimeoutError, RedisErro, asyncio.IncompleteReadError)
+
+
+class ResponseCache:
+    """Guarda corpos de resposta 200 por namespace + parâmetros normalizados, invalidados por tag."""
+
+    def __init__(
+        self, backend: Optional[CacheBackend], ttl: float, prefixo: str = "workout_api:respostas", atraso_replica: float = 0.0
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefixo = prefixo
+        self.atraso_replica = atraso_replica
+        self._single_flight: SingleFlight = SingleFlight()
+        # Por tag, a última geração vista por este processo e quando ela apareceu
+        self._geracoes_vistas: dict[str, tuple[Optional[bytes], float]] = {}
+
+    def _chave_tag(self, tag: str) -> str:
+        return f"{self.prefixo}:tag:{tag}"
+
+    def chave(self, namespace: str, params: dict, geracoes: Iterable[Optional[bytes]]) -> str:
+        normalizados = json.dumps({k: v for k, v in params.items() if v is not None}, sort_keys=True, default=str)
+        geracao = ".".join((valor or b"0").decode() for valor in geracoes)
+        resumo = hashlib.sha1(normalizados.encode()).hexdigest()
+        return f"{self.prefixo}:{namespace}:{geracao}:{resumo}"
+
+    def _observar(self, tags: Sequence[str], geracoes: Sequence[Optional[bytes]]) -> None:
+        agora = time.monotonic()
+        for tag, geracao in zip(tags, geracoes):
+            vista = self._geracoes_vistas.get(tag)
+            if vista is None or vista[0] != geracao:
+                self._geracoes_vistas[tag] = (geracao, agora)
+
+    def sessao(self, tags: Sequence[str]):
+        """
+        Sessão para gerar a resposta das tags: réplica (read_session), ou o primário se alguma
+        delas mudou de geração há menos de atraso_replica (ou ainda não foi vista por responder).
+        """
+        agora = time.monotonic()
+        for tag in tags:
+            vista = self._geracoes_vistas.get(tag)
+            if vista is None or agora - vista[1] < self.atraso_replica:
+                return async_session()
+        return read_session()
+
+    async def invalidar(self, *tags: str) -> None:
+        if self.backend is None:
+            return
+        for tag in tags:
+            try:
+                await self.backend.incr(self._chave_tag(tag))
+            except ERROS_BACKEND:
+                # Sem o incremento as entradas da tag só saem pelo TTL
+                ERRORS.inc(op="invalidar")
+                logger.exception("Erro ao invalidar a tag '%s' do cache de respostas", tag)
+
+    async def responder(
+        self,
+        namespace: str,
+        params: dict,
+        tags: Sequence[str],
+        gerar: Callable[[], Awaitable[Response]],
+        headers: Optional[dict[str, str]] = None,
+    ) -> Response:
+        """
+        Devolve a resposta guardada ou chama gerar() uma única vez entre requisições
+        concorrentes iguais. headers são cabeçalhos desta requisição (ETag, Cache-Control),
+        acrescentados sem serem guardados.
+        """
+        if self.backend is None:
+            # Sem cache, a geração das tags é o token do ETag (que uma réplica atrasada também não pode desmentir)
+            self._observar(tags, [table_versions.token(tag).encode() for tag in tags])
+            return await gerar()
+
+        backend = self.backend
+        try:
+            # As gerações são lidas antes de gerar: uma escrita no meio do caminho muda a chave
+            geracoes = await backend.get_many([self._chave_tag(tag) for tag in tags])
+            self._observar(tags, geracoes)
+            chave = self.chave(namespace, params, geracoes)
+            valor = await backend.get(chave)
+        except ERROS_BACKEND:
+            ERRORS.inc(op="ler")
+            logger.exception("Erro ao ler o cache de respostas")
+            self._observar(tags, [table_versions.token(tag).encode() for tag in tags])
+            return await gerar()
+
+        if valor is not None:
+            HITS.inc(namespace=namespace)
+            return self._montar(valor, headers)
+
+        async def gerar_e_guardar() -> tuple[int, Any]:
+            try:
+                resposta = await gerar()
+            except HTTPException as e:
+                # Compartilhados só os dados; a exceção é recriada para cada requisição
+                return e.status_code, e
+            valor = self._codificar(resposta)
+            if resposta.status_code != 200:
+                return resposta.status_code, valor
+            try:
+                await backend.set(chave, valor, self.ttl)
+            except ERROS_BACKEND:
+                ERRORS.inc(op="gravar")
+                logger.exception("Erro ao gravar no cache de respostas")
+            return 200, valor
+
+        (status_code, resultado), compartilhado = await self._single_flight.do(chave, gerar_e_guardar)
+        (COALESCED if compartilhado else MISSES).inc(namespace=namespace)
+        if isinstance(resultado, HTTPException):
+            raise HTTPException(
+                status_code=status_code, detail=resultado.detail, headers=dict(resultado.headers) if resultado.headers else None
+            )
+        # Cada requisição ganha o próprio Response (os middlewares alteram os cabeçalhos do que enviam)
+        return self._montar(resultado, headers, status_code)
+
+    @staticmethod
+    def _codificar(resposta: Response) -> bytes:
+        # Cabeçalhos da resposta (ex: X-Next-Cursor) em JSON na primeira linha, depois o corpo
+        cabecalhos = {
+            nome: valor for nome, valor in resposta.headers.items() if nome not in _CABECALHOS_IGNORADOS
+        }
+        return json.dumps(cabecalhos).encode() + b"\n" + bytes(resposta.body)
+
+    @staticmethod
+    def _montar(valor: bytes, headers: Optional[dict[str, str]], status_code: int = 200) -> Response:
+        cabecalhos, _, corpo = valor.partition(b"\n")
+        return Response(
+            content=corpo,
+            status_code=status_code,
+            media_type="application/json",
+            headers={**json.loads(cabecalhos), **(headers or {})},
+        )
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+
+def _build_backend() -> Optional[CacheBackend]:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.RESPONSE_CACHE_URL, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    return None
+
+
+response_cache = ResponseCache(
+    _build_backend(), settings.RESPONSE_CACHE_TTL, atraso_replica=settings.DB_READ_MAX_LAG
+)
+
+
+async def _invalidar_por_evento(event: ChangeEvent) -> None:
+    await response_cache.invalidar(*(TODAS_AS_TAGS if event.table == "*" else (event.table,)))
+
+
+# Um incremento por escrita: no Redis, só o worker que fez o commit
+change_bus.subscribe(
+    _invalidar_por_evento, local_only=response_cache.backend is not None and response_cache.backend.compartilhado
+)
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight(Generic[T]):
+    """
+    Junta chamadas concorrentes com a mesma chave em uma única execução.
+
+    Enquanto a primeira chamada de uma chave está em andamento, as demais esperam o mesmo
+    resultado (ou a mesma exceção) em vez de repetir o trabalho: evita o efeito manada
+    quando uma entrada de cache expira sob carga. Vale dentro do processo.
+    """
+
+    def __init__(self) -> None:
+        self._em_andamento: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, chave: Hashable, funcao: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Executa funcao() uma vez por chave; retorna (resultado, compartilhado)."""
+        futuro = self._em_andamento.get(chave)
+        if futuro is not None:
+            try:
+                # shield: o cancelamento de quem espera não cancela a execução dos outros
+                return await asyncio.shield(futuro), True
+            except asyncio.CancelledError:
+                if not futuro.cancelled():
+                    raise
+                # Quem executava foi cancelado (ex: cliente desconectou): tenta de novo
+                return await self.do(chave, funcao)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_andamento[chave] = futuro
+        try:
+            resultado = await funcao()
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            # Marca a exceção como recuperada se ninguém estava esperando
+            futuro.exception()
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado, False
+        finally:
+            del self._em_andamento[chave]
+
+    def em_andamento(self) -> int:
+        return len(self._em_andamento)
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from workout_api.configs.database import engine
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.contrib.changes import ChangeEvent, change_bus
+from workout_api.estatisticas.models import TRAVA_CONSOLIDACAO, sql_consolidar
+
+# Consolidação do delta das estatísticas (Postgres): depois de um commit que alterou atletas, o
+# worker da escrita soma o delta ao resumo, no máximo uma vez por intervalo. Escritas durante o
+# intervalo ficam no delta (as consultas já o somam) e são consolidadas ao fim dele, então o delta
+# guarda no máximo o que foi escrito em um intervalo. Entre os workers, uma consolidação por vez
+# (trava consultiva); quem não consegue a trava deixa o delta para a próxima.
+
+logger = logging.getLogger(__name__)
+
+CONSOLIDACOES = metrics.counter(
+    "workout_api_stats_consolidations_total",
+    "Consolidações do delta das estatísticas no resumo (executada ou pulada: outro worker consolidando).",
+    ["resultado"],
+)
+
+
+class ConsolidadorEstatisticas:
+    def __init__(self, intervalo: float) -> None:
+        self.intervalo = intervalo
+        self._ultima = 0.0
+        self._pendente = False
+        self._tarefa: Optional[asyncio.Task] = None
+
+    def ao_alterar(self, event: ChangeEvent) -> None:
+        if event.table != "atletas" or engine.dialect.name != "postgresql":
+            return
+        self._pendente = True
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def _executar(self) -> None:
+        while self._pendente:
+            espera = self._ultima + self.intervalo - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            self._pendente = False
+            self._ultima = time.monotonic()
+            try:
+                await self.consolidar()
+            except Exception:
+                logger.exception("Erro ao consolidar as estatísticas de atletas")
+
+    async def consolidar(self) -> bool:
+        """Soma o delta ao resumo; False se outra consolidação (ou a carga da migração) está em andamento."""
+        async with engine.begin() as conexao:
+            trava = select(func.pg_try_advisory_xact_lock(func.hashtext(TRAVA_CONSOLIDACAO)))
+            if not await conexao.scalar(trava):
+                CONSOLIDACOES.inc(resultado="pulada")
+                return False
+            await conexao.execute(text(sql_consolidar()))
+        CONSOLIDACOES.inc(resultado="executada")
+        return True
+
+    async def encerrar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+
+
+consolidador_estatisticas = ConsolidadorEstatisticas(settings.ESTATISTICAS_INTERVALO_CONSOLIDACAO)
+
+# Só os commits deste processo: cada worker consolida as próprias escritas
+change_bus.subscribe(consolidador_estatisticas.ao_alterar, local_only=True)
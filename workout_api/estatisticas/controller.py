@@ -0,0 +1,75 @@
+from typing import Optional
+
+from fastapi import APIRouter, Request, status
+from workout_api.configs.settings import settings
+from workout_api.contrib.http_cache import cabecalhos_cache, nao_modificado, table_versions
+from workout_api.contrib.response_cache import response_cache
+from workout_api.estatisticas.repository import consultar_estatisticas
+from workout_api.estatisticas.schemas import EstatisticasGrupoOut, EstatisticasOut
+from workout_api.responses.standard_responses import StandardJSONResponse, StandardResponseSuccess, success_response
+
+# Rotas em /atletas, /categorias e /centros_treinamento: este router é incluído antes dos
+# routers desses recursos, senão "stats" seria lido como o {id} de GET /.../{id}
+router = APIRouter()
+
+# As estatísticas dependem das três tabelas (nomes de categoria e centro inclusive)
+TABELAS = ("atletas", "categorias", "centros_treinamento")
+
+
+async def _responder(request: Request, dimensao: Optional[str]) -> StandardJSONResponse:
+    # ETag pelos tokens das três tabelas: nenhuma escrita desde o ETag do cliente, 304 sem consulta.
+    # Por isso, logo após uma escrita, a consulta vai ao primário (response_cache.sessao): numa
+    # réplica atrasada o resultado antigo ficaria sob os tokens novos até a próxima escrita
+    etag = '"' + ".".join(table_versions.token(tabela) for tabela in TABELAS) + '"'
+    if resposta := nao_modificado(request, etag):
+        return resposta # type: ignore
+
+    async def gerar() -> StandardJSONResponse:
+        async with response_cache.sessao(TABELAS) as db_session:
+            estatisticas = await consultar_estatisticas(db_session, dimensao, settings.ESTATISTICAS_RESUMO)
+        if dimensao is None:
+            estatisticas = estatisticas[0]
+            del estatisticas["nome"]
+        return success_response(estatisticas)
+
+    return await response_cache.responder( # type: ignore
+        "estatisticas", {"dimensao": dimensao}, TABELAS, gerar, headers=cabecalhos_cache(request, etag)
+    )
+
+
+# Estatísticas de todos os atletas
+@router.get(
+    "/atletas/stats",
+     summary="Consultando as estatísticas de todos os atletas",
+     status_code=status.HTTP_200_OK,
+     response_model=StandardResponseSuccess[EstatisticasOut],
+     description=(
+        "Quantidade, médias de idade, peso, altura e IMC, distribuição por sexo e por faixa de IMC "
+        "e percentis, calculados no banco. No Postgres saem das tabelas de resumo e do delta ainda "
+        "não consolidado (percentis interpolados dentro da faixa do histograma)."
+     ),
+)
+async def query_athletes_stats(request: Request) -> StandardJSONResponse:
+    return await _responder(request, None)
+
+
+# Estatísticas por categoria
+@router.get(
+    "/categorias/stats",
+     summary="Consultando as estatísticas dos atletas por categoria",
+     status_code=status.HTTP_200_OK,
+     response_model=StandardResponseSuccess[list[EstatisticasGrupoOut]],
+)
+async def query_categories_stats(request: Request) -> StandardJSONResponse:
+    return await _responder(request, "categoria")
+
+
+# Estatísticas por centro de treinamento
+@router.get(
+    "/centros_treinamento/stats",
+     summary="Consultando as estatísticas dos atletas por centro de treinamento",
+     status_code=status.HTTP_200_OK,
+     response_model=StandardResponseSuccess[list[EstatisticasGrupoOut]],
+)
+async def query_training_centers_stats(request: Request) -> StandardJSONResponse:
+    return await _responder(request, "centro_treinamento")
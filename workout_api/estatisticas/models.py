@@ -0,0 +1,209 @@
+from sqlalchemy import DDL, BigInteger, Column, Float, Integer, SmallInteger, String, Table, event
+from workout_api.contrib.models import BaseModel
+
+# Tabelas de resumo das estatísticas de atletas no Postgres. Os gatilhos de INSERT, UPDATE e
+# DELETE em atletas só acrescentam as linhas alteradas a atletas_estatisticas_delta (sem travar
+# linhas compartilhadas: escritas concorrentes no mesmo grupo não esperam umas pelas outras); a
+# consolidação (estatisticas/consolidacao.py) soma o delta ao resumo e ao histograma em lote. As
+# consultas leem o resumo mais o delta ainda não consolidado, então o resultado não fica atrasado.
+# São tabelas do Core (sem o id público das entidades): ninguém consulta uma linha pelo id.
+
+# Limites (IMC) das faixas da OMS: abaixo do peso, normal, sobrepeso e obesidade
+FAIXAS_IMC = ("abaixo_do_peso", "normal", "sobrepeso", "obesidade")
+LIMITES_FAIXAS_IMC = (18.5, 25.0, 30.0)
+
+# Largura das faixas do histograma de cada medida: os percentis saem com essa resolução
+LARGURAS_HISTOGRAMA = {"idade": 1, "peso": 0.5, "altura": 0.01, "imc": 0.1}
+
+# Soma das medidas por categoria, centro, sexo e faixa de IMC: médias, distribuição por sexo e
+# por faixa de IMC saem de algumas centenas de linhas, qualquer que seja o tamanho de atletas
+atletas_resumo = Table(
+    'atletas_resumo',
+    BaseModel.metadata,
+    Column('categoria_id', Integer, primary_key=True),
+    Column('centro_treinamento_id', Integer, primary_key=True),
+    Column('sexo', String(1), primary_key=True),
+    Column('faixa_imc', SmallInteger, primary_key=True),
+    Column('quantidade', BigInteger, nullable=False),
+    Column('soma_idade', Float, nullable=False),
+    Column('soma_peso', Float, nullable=False),
+    Column('soma_altura', Float, nullable=False),
+    Column('soma_imc', Float, nullable=False),
+)
+
+# Quantidade de atletas por faixa de cada medida (valor arredondado para a largura da faixa)
+atletas_histograma = Table(
+    'atletas_histograma',
+    BaseModel.metadata,
+    Column('categoria_id', Integer, primary_key=True),
+    Column('centro_treinamento_id', Integer, primary_key=True),
+    Column('medida', String(10), primary_key=True),
+    Column('faixa', Integer, primary_key=True),
+    Column('quantidade', BigInteger, nullable=False),
+)
+
+# Linhas de atletas inseridas (sinal +1) ou removidas (-1) ainda não somadas ao resumo
+atletas_estatisticas_delta = Table(
+    'atletas_estatisticas_delta',
+    BaseModel.metadata,
+    Column('categoria_id', Integer, nullable=False),
+    Column('centro_treinamento_id', Integer, nullable=False),
+    Column('sexo', String(1), nullable=False),
+    Column('idade', Integer, nullable=False),
+    Column('peso', Float, nullable=False),
+    Column('altura', Float, nullable=False),
+    Column('sinal', SmallInteger, nullable=False),
+)
+
+# Trava consultiva da consolidação: uma por vez entre os workers (e nenhuma durante a carga
+# inicial da migração)
+TRAVA_CONSOLIDACAO = "atletas_estatisticas"
+
+
+def _sql_faixa_imc(imc: str) -> str:
+    limites = LIMITES_FAIXAS_IMC
+    return (
+        f"CASE WHEN {imc} < {limites[0]} THEN 0 WHEN {imc} < {limites[1]} THEN 1 "
+        f"WHEN {imc} < {limites[2]} THEN 2 ELSE 3 END"
+    )
+
+
+def _sql_imc(alias: str) -> str:
+    return f"({alias}.peso / ({alias}.altura * {alias}.altura))"
+
+
+def sql_faixas_histograma(alias: str) -> str:
+    """VALUES (medida, faixa) de uma linha: o valor da medida arredondado para a largura da faixa."""
+    return ", ".join(
+        f"('{medida}', round({expressao} / {LARGURAS_HISTOGRAMA[medida]})::integer)"
+        for medida, expressao in (
+            ("idade", f"{alias}.idade"), ("peso", f"{alias}.peso"), ("altura", f"{alias}.altura"), ("imc", _sql_imc(alias)),
+        )
+    )
+
+
+def sql_aplicar_delta(origem: str) -> list[str]:
+    """
+    Upserts (para um WITH) que somam ao resumo e ao histograma as linhas de origem, com as
+    colunas de atletas e "sinal" (+1 para linhas novas, -1 para antigas), no alias d.
+
+    Os deltas são agrupados antes do upsert (uma linha de resumo por grupo, não por atleta) e
+    aplicados em ordem de chave: consolidações concorrentes travam as linhas na mesma ordem.
+    """
+    imc = _sql_imc("d")
+    return [
+        f"""
+        INSERT INTO atletas_resumo AS r (
+            categoria_id, centro_treinamento_id, sexo, faixa_imc,
+            quantidade, soma_idade, soma_peso, soma_altura, soma_imc
+        )
+        SELECT d.categoria_id, d.centro_treinamento_id, d.sexo, {_sql_faixa_imc(imc)},
+               sum(d.sinal), sum(d.sinal * d.idade), sum(d.sinal * d.peso),
+               sum(d.sinal * d.altura), sum(d.sinal * {imc})
+        FROM {origem} AS d
+        GROUP BY 1, 2, 3, 4
+        HAVING sum(d.sinal) <> 0 OR sum(d.sinal * d.idade) <> 0
+            OR sum(d.sinal * d.peso) <> 0 OR sum(d.sinal * d.altura) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (categoria_id, centro_treinamento_id, sexo, faixa_imc) DO UPDATE SET
+            quantidade = r.quantidade + EXCLUDED.quantidade,
+            soma_idade = r.soma_idade + EXCLUDED.soma_idade,
+            soma_peso = r.soma_peso + EXCLUDED.soma_peso,
+            soma_altura = r.soma_altura + EXCLUDED.soma_altura,
+            soma_imc = r.soma_imc + EXCLUDED.soma_imc
+        """,
+        f"""
+        INSERT INTO atletas_histograma AS h (categoria_id, centro_treinamento_id, medida, faixa, quantidade)
+        SELECT d.categoria_id, d.centro_treinamento_id, m.medida, m.faixa, sum(d.sinal)
+        FROM {origem} AS d
+        CROSS JOIN LATERAL (VALUES {sql_faixas_histograma("d")}) AS m (medida, faixa)
+        GROUP BY 1, 2, 3, 4
+        HAVING sum(d.sinal) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (categoria_id, centro_treinamento_id, medida, faixa) DO UPDATE SET
+            quantidade = h.quantidade + EXCLUDED.quantidade
+        """,
+    ]
+
+
+_COLUNAS_DELTA = "categoria_id, centro_treinamento_id, sexo, idade, peso, altura"
+
+
+def sql_delta_resumo() -> str:
+    """O delta ainda não consolidado no formato de atletas_resumo (uma linha por atleta)."""
+    imc = _sql_imc("d")
+    return f"""
+    SELECT d.categoria_id, d.centro_treinamento_id, d.sexo, {_sql_faixa_imc(imc)} AS faixa_imc,
+           d.sinal AS quantidade, d.sinal * d.idade AS soma_idade, d.sinal * d.peso AS soma_peso,
+           d.sinal * d.altura AS soma_altura, d.sinal * {imc} AS soma_imc
+    FROM atletas_estatisticas_delta AS d
+    """
+
+
+def sql_delta_histograma() -> str:
+    """O delta ainda não consolidado no formato de atletas_histograma (uma linha por atleta e medida)."""
+    return f"""
+    SELECT d.categoria_id, d.centro_treinamento_id, m.medida, m.faixa, d.sinal AS quantidade
+    FROM atletas_estatisticas_delta AS d
+    CROSS JOIN LATERAL (VALUES {sql_faixas_histograma("d")}) AS m (medida, faixa)
+    """
+
+
+def sql_consolidar() -> str:
+    """
+    Um único comando: apaga o delta e soma as linhas apagadas ao resumo e ao histograma. Uma
+    escrita que grava no delta durante a consolidação fica para a próxima (não é apagada).
+    """
+    resumo, histograma = sql_aplicar_delta("consolidado")
+    return f"""
+    WITH consolidado AS (
+        DELETE FROM atletas_estatisticas_delta RETURNING {_COLUNAS_DELTA}, sinal
+    ), resumo AS ({resumo})
+    {histograma}
+    """
+
+
+# Deltas de cada evento, lidos das tabelas de transição do gatilho de instrução
+DELTAS_GATILHOS = {
+    "insert": f"SELECT {_COLUNAS_DELTA}, 1 FROM novas",
+    "update": (
+        f"SELECT {_COLUNAS_DELTA}, 1 FROM novas "
+        f"UNION ALL SELECT {_COLUNAS_DELTA}, -1 FROM antigas"
+    ),
+    "delete": f"SELECT {_COLUNAS_DELTA}, -1 FROM antigas",
+}
+TRANSICOES_GATILHOS = {
+    "insert": "NEW TABLE AS novas",
+    "update": "OLD TABLE AS antigas NEW TABLE AS novas",
+    "delete": "OLD TABLE AS antigas",
+}
+
+
+def sql_gatilhos() -> list[str]:
+    """
+    Funções e gatilhos FOR EACH STATEMENT em atletas: um INSERT ... SELECT de uma importação
+    com milhares de linhas grava o delta com um comando, não um por atleta. (O Postgres não
+    aceita tabelas de transição em gatilhos de mais de um evento, daí um gatilho por evento.)
+    """
+    comandos = []
+    for evento, delta in DELTAS_GATILHOS.items():
+        comandos.append(f"""
+        CREATE OR REPLACE FUNCTION atletas_estatisticas_{evento}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO atletas_estatisticas_delta ({_COLUNAS_DELTA}, sinal) {delta};
+            RETURN NULL;
+        END
+        $$
+        """)
+        comandos.append(f"""
+        CREATE TRIGGER atletas_estatisticas_{evento}
+        AFTER {evento.upper()} ON atletas
+        REFERENCING {TRANSICOES_GATILHOS[evento]}
+        FOR EACH STATEMENT EXECUTE PROCEDURE atletas_estatisticas_{evento}()
+        """)
+    return comandos
+
+
+# create_all (testes, benchmarks) também cria os gatilhos no Postgres; em produção vêm da migração
+for _comando in sql_gatilhos():
+    event.listen(BaseModel.metadata, 'after_create', DDL(_comando).execute_if(dialect='postgresql'))
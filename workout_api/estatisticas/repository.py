@@ -0,0 +1,262 @@
+from collections import defaultdict
+from typing import Any, Optional
+
+from sqlalchemy import (
+    BigInteger, Float, Integer, SmallInteger, String, case, column, func, literal_column, null, select, text, union_all, values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.atleta.models import AtletaModel
+from workout_api.categorias.models import CategoriaModel
+from workout_api.centro_treinamento.models import CentroTreinamentoModel
+from workout_api.estatisticas.models import (
+    FAIXAS_IMC,
+    LARGURAS_HISTOGRAMA,
+    LIMITES_FAIXAS_IMC,
+    atletas_histograma,
+    atletas_resumo,
+    sql_delta_histograma,
+    sql_delta_resumo,
+)
+
+# Percentis devolvidos para cada medida (discretos na consulta direta, interpolados no histograma)
+PERCENTIS = (0.25, 0.5, 0.75, 0.9)
+MEDIDAS = ("idade", "peso", "altura", "imc")
+
+# Tabela de referência e coluna de atletas de cada agrupamento
+DIMENSOES = {
+    "categoria": (CategoriaModel, "categoria_id"),
+    "centro_treinamento": (CentroTreinamentoModel, "centro_treinamento_id"),
+}
+
+
+def _chave_percentil(percentil: float) -> str:
+    return f"p{round(percentil * 100)}"
+
+
+def _fonte_resumo():
+    # Resumo mais o delta ainda não consolidado, no mesmo formato da consulta direta em atletas
+    # (quantidade já agregada)
+    delta = text(sql_delta_resumo()).columns(
+        column("categoria_id", Integer), column("centro_treinamento_id", Integer), column("sexo", String),
+        column("faixa_imc", SmallInteger), column("quantidade", BigInteger), column("soma_idade", Float),
+        column("soma_peso", Float), column("soma_altura", Float), column("soma_imc", Float),
+    ).subquery("delta")
+    fonte = union_all(select(atletas_resumo), select(delta)).subquery("resumo")
+    r = fonte.c
+    return fonte, {
+        "categoria_id": r.categoria_id,
+        "centro_treinamento_id": r.centro_treinamento_id,
+        "sexo": r.sexo,
+        "faixa_imc": r.faixa_imc,
+        "quantidade": func.sum(r.quantidade),
+        "idade": r.soma_idade,
+        "peso": r.soma_peso,
+        "altura": r.soma_altura,
+        "imc": r.soma_imc,
+    }
+
+
+def _imc_atleta():
+    return AtletaModel.peso / (AtletaModel.altura * AtletaModel.altura)
+
+
+def _fonte_atletas():
+    imc = _imc_atleta()
+    # Constantes no próprio SQL, sem parâmetros: o Postgres só reconhece a expressão do SELECT
+    # no GROUP BY se o texto for idêntico, e cada parâmetro ganha um número diferente
+    faixa_imc = case(
+        *((imc < literal_column(str(limite)), literal_column(str(indice))) for indice, limite in enumerate(LIMITES_FAIXAS_IMC)),
+        else_=literal_column(str(len(LIMITES_FAIXAS_IMC))),
+    )
+    return AtletaModel.__table__, {
+        "categoria_id": AtletaModel.categoria_id,
+        "centro_treinamento_id": AtletaModel.centro_treinamento_id,
+        "sexo": AtletaModel.sexo,
+        "faixa_imc": faixa_imc,
+        "quantidade": func.count(AtletaModel.pk_id),
+        "idade": AtletaModel.idade,
+        "peso": AtletaModel.peso,
+        "altura": AtletaModel.altura,
+        "imc": imc,
+    }
+
+
+def _agrupado(fonte, colunas: dict, dimensao: Optional[str], *agregados):
+    """
+    SELECT dos agregados por grupo. Com dimensão, parte da tabela de referência com LEFT JOIN:
+    categorias e centros sem atletas também aparecem, com quantidade zero.
+    """
+    if dimensao is None:
+        return select(null().label("grupo_id"), null().label("grupo_nome"), *agregados).select_from(fonte)
+    modelo, coluna = DIMENSOES[dimensao]
+    return (
+        select(modelo.pk_id.label("grupo_id"), modelo.nome.label("grupo_nome"), *agregados)
+        .select_from(modelo)
+        .outerjoin(fonte, colunas[coluna] == modelo.pk_id)
+        .group_by(modelo.pk_id, modelo.nome)
+    )
+
+
+async def _somas(session: AsyncSession, fonte, colunas: dict, dimensao: Optional[str]) -> list:
+    # Somas por grupo, sexo e faixa de IMC: médias e distribuições são montadas a partir delas
+    sexo = colunas["sexo"].label("sexo")
+    faixa_imc = colunas["faixa_imc"].label("faixa_imc")
+    stmt = _agrupado(
+        fonte, colunas, dimensao,
+        sexo,
+        faixa_imc,
+        colunas["quantidade"].label("quantidade"),
+        *(func.sum(colunas[medida]).label(medida) for medida in MEDIDAS),
+    )
+    return (await session.execute(stmt.group_by(sexo, faixa_imc))).all()
+
+
+async def _percentis_histograma(session: AsyncSession, dimensao: Optional[str]) -> dict:
+    """
+    Percentis a partir do histograma (mais o delta não consolidado), no próprio banco: para cada
+    percentil, a primeira faixa em que a contagem acumulada (SUM ... OVER) o alcança. Volta uma
+    linha por grupo, medida e percentil.
+
+    A faixa k guarda os valores arredondados para k * largura, isto é, [(k - 0.5) * largura,
+    (k + 0.5) * largura); o percentil é interpolado linearmente dentro dela pela posição do
+    percentil na contagem da faixa (como a mediana de dados agrupados). Não é necessariamente
+    um valor que existe nos dados, ao contrário do percentile_disc da consulta direta.
+    """
+    delta = text(sql_delta_histograma()).columns(
+        column("categoria_id", Integer), column("centro_treinamento_id", Integer), column("medida", String),
+        column("faixa", Integer), column("quantidade", BigInteger),
+    ).subquery("delta")
+    fonte = union_all(select(atletas_histograma), select(delta)).subquery("histograma")
+    h = fonte.c
+    colunas = {"categoria_id": h.categoria_id, "centro_treinamento_id": h.centro_treinamento_id}
+    faixas = (
+        _agrupado(fonte, colunas, dimensao, h.medida, h.faixa, func.sum(h.quantidade).label("quantidade"))
+        .group_by(h.medida, h.faixa)
+        .having(func.sum(h.quantidade) > 0)
+        .subquery()
+    )
+    particao = (faixas.c.grupo_id, faixas.c.medida)
+    acumulado = select(
+        faixas.c.grupo_id,
+        faixas.c.medida,
+        faixas.c.faixa,
+        faixas.c.quantidade,
+        func.sum(faixas.c.quantidade).over(partition_by=particao, order_by=faixas.c.faixa).label("acumulado"),
+        func.sum(faixas.c.quantidade).over(partition_by=particao).label("total"),
+    ).subquery()
+    percentis_ = values(column("percentil", Float), name="percentis").data([(percentil,) for percentil in PERCENTIS])
+    alcancadas = (
+        select(
+            acumulado,
+            percentis_.c.percentil,
+            func.row_number().over(
+                partition_by=(acumulado.c.grupo_id, acumulado.c.medida, percentis_.c.percentil),
+                order_by=acumulado.c.faixa,
+            ).label("ordem"),
+        )
+        .select_from(acumulado.join(percentis_, acumulado.c.acumulado >= percentis_.c.percentil * acumulado.c.total))
+        .subquery()
+    )
+    stmt = select(alcancadas).where(alcancadas.c.ordem == 1).order_by(alcancadas.c.medida, alcancadas.c.percentil)
+
+    percentis: dict[Any, dict] = defaultdict(lambda: defaultdict(dict))
+    for linha in (await session.execute(stmt)).all():
+        # Fração da faixa até o percentil: quantos atletas da faixa ficam abaixo dele
+        # (sum de bigint volta como numeric)
+        anteriores = float(linha.acumulado - linha.quantidade)
+        fracao = (linha.percentil * float(linha.total) - anteriores) / float(linha.quantidade)
+        valor = round((linha.faixa - 0.5 + fracao) * LARGURAS_HISTOGRAMA[linha.medida], 2)
+        percentis[linha.grupo_id][linha.medida][_chave_percentil(linha.percentil)] = valor
+    return percentis
+
+
+async def _percentis_atletas(session: AsyncSession, dimensao: Optional[str]) -> dict:
+    # Percentis exatos calculados pelo Postgres (percentile_disc), lendo a tabela de atletas
+    fracoes = literal_column(f"ARRAY[{', '.join(str(percentil) for percentil in PERCENTIS)}]::float8[]")
+    expressoes = {
+        "idade": AtletaModel.idade, "peso": AtletaModel.peso, "altura": AtletaModel.altura, "imc": _imc_atleta(),
+    }
+    stmt = _agrupado(
+        AtletaModel.__table__, {coluna: getattr(AtletaModel, coluna) for _, coluna in DIMENSOES.values()}, dimensao,
+        *(
+            func.percentile_disc(fracoes).within_group(expressao).cast(ARRAY(Float)).label(medida)
+            for medida, expressao in expressoes.items()
+        ),
+    )
+    percentis: dict[Any, dict] = {}
+    for linha in (await session.execute(stmt)).all():
+        percentis[linha.grupo_id] = {
+            medida: {
+                _chave_percentil(percentil): round(valor, 2)
+                for percentil, valor in zip(PERCENTIS, getattr(linha, medida))
+            }
+            for medida in MEDIDAS
+            if getattr(linha, medida) is not None
+        }
+    return percentis
+
+
+def _grupo_vazio(nome: Optional[str]) -> dict:
+    return {
+        "nome": nome,
+        "quantidade": 0,
+        "somas": dict.fromkeys(MEDIDAS, 0.0),
+        "sexo": {},
+        "faixas_imc": dict.fromkeys(FAIXAS_IMC, 0),
+    }
+
+
+def _montar(somas: list, percentis: dict, dimensao: Optional[str]) -> list[dict]:
+    # Sem dimensão sempre há um grupo (o total), mesmo sem nenhum atleta cadastrado
+    grupos: dict[Any, dict] = {} if dimensao else {None: _grupo_vazio(None)}
+    for linha in somas:
+        grupo = grupos.get(linha.grupo_id)
+        if grupo is None:
+            grupo = grupos[linha.grupo_id] = _grupo_vazio(linha.grupo_nome)
+        quantidade = int(linha.quantidade or 0)
+        if not quantidade:
+            # Grupo sem atletas (LEFT JOIN) ou linha de resumo zerada por exclusões
+            continue
+        grupo["quantidade"] += quantidade
+        for medida in MEDIDAS:
+            grupo["somas"][medida] += getattr(linha, medida)
+        grupo["sexo"][linha.sexo] = grupo["sexo"].get(linha.sexo, 0) + quantidade
+        grupo["faixas_imc"][FAIXAS_IMC[linha.faixa_imc]] += quantidade
+
+    resultado = []
+    for grupo_id, grupo in grupos.items():
+        quantidade = grupo["quantidade"]
+
+        def media(medida: str) -> Optional[float]:
+            return round(grupo["somas"][medida] / quantidade, 2) if quantidade else None
+
+        resultado.append({
+            "nome": grupo["nome"],
+            "quantidade": quantidade,
+            "idade_media": media("idade"),
+            "peso_medio": media("peso"),
+            "altura_media": media("altura"),
+            "imc_medio": media("imc"),
+            "sexo": grupo["sexo"],
+            "faixas_imc": grupo["faixas_imc"],
+            "percentis": percentis.get(grupo_id, {}) if quantidade else {},
+        })
+    return sorted(resultado, key=lambda grupo: grupo["nome"] or "")
+
+
+async def consultar_estatisticas(session: AsyncSession, dimensao: Optional[str], usar_resumo: bool) -> list[dict]:
+    """
+    Estatísticas de atletas por grupo (dimensao=None: um único grupo com todos os atletas).
+
+    Com usar_resumo (Postgres com os gatilhos), lê as tabelas de resumo e o delta ainda não
+    consolidado; sem ele, agrega a tabela de atletas. Percentis só no Postgres.
+    """
+    postgres = session.bind.dialect.name == "postgresql"
+    if usar_resumo and postgres:
+        fonte, colunas = _fonte_resumo()
+        percentis = await _percentis_histograma(session, dimensao)
+    else:
+        fonte, colunas = _fonte_atletas()
+        percentis = await _percentis_atletas(session, dimensao) if postgres else {}
+    return _montar(await _somas(session, fonte, colunas, dimensao), percentis, dimensao)
@@ -0,0 +1,20 @@
+from typing import Annotated, Optional
+
+from pydantic import Field
+from workout_api.contrib.schemas import BaseSchema
+
+class EstatisticasOut(BaseSchema):
+    quantidade: Annotated[int, Field(description='Quantidade de atletas', example=120)] # type: ignore
+    idade_media: Annotated[Optional[float], Field(None, description='Idade média', example=27.4)] # type: ignore
+    peso_medio: Annotated[Optional[float], Field(None, description='Peso médio em kg', example=74.1)] # type: ignore
+    altura_media: Annotated[Optional[float], Field(None, description='Altura média em metros', example=1.74)] # type: ignore
+    imc_medio: Annotated[Optional[float], Field(None, description='Média do IMC (peso / altura²) dos atletas', example=24.3)] # type: ignore
+    sexo: Annotated[dict[str, int], Field(description='Quantidade de atletas por sexo', example={'M': 70, 'F': 50})] # type: ignore
+    faixas_imc: Annotated[dict[str, int], Field(description='Quantidade de atletas por faixa de IMC da OMS')] # type: ignore
+    percentis: Annotated[
+        dict[str, dict[str, float]],
+        Field(description='Percentis (p25, p50, p75, p90) de idade, peso, altura e IMC; vazio fora do Postgres'),
+    ] # type: ignore
+
+class EstatisticasGrupoOut(EstatisticasOut):
+    nome: Annotated[str, Field(description='Nome da categoria ou do centro de treinamento', example='Scale')] # type: ignore
@@ -0,0 +1,157 @@
+import asyncio
+from typing import AsyncIterator, Literal, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from workout_api.configs.settings import settings
+from workout_api.feed.hub import LOTE_EVENTOS, evento_reset, feed_hub
+from workout_api.feed.repository import TABELAS_FEED, evento_existe, evento_para_json, select_eventos
+
+router = APIRouter()
+
+TabelaFeed = Literal["atletas", "categorias", "centros_treinamento"]
+
+DESCRICAO_EVENTOS = (
+    "Cada evento traz seq, tabela, op (insert, update, delete ou reset), id e dados (a entidade "
+    "depois da alteração, no formato do GET; nulo no delete). Um reset pede que o cliente recarregue "
+    "as tabelas: eventos foram perdidos (cursor fora da retenção ou conexão lenta demais). Para "
+    "retomar, envie o último seq recebido em cursor: os eventos posteriores chegam antes dos novos."
+)
+
+
+async def _eventos(
+    cursor: Optional[int], tabelas: Optional[list[str]]
+) -> AsyncIterator[Optional[tuple[int, Optional[str]]]]:
+    """
+    (seq, json) de cada evento; (seq, None) marca a posição sem evento (o cliente guarda o
+    cursor) e None é o keep-alive.
+
+    A assinatura é feita já dentro do stream: um stream nunca iniciado (cliente que desconectou
+    antes) não deixa uma fila esquecida no hub.
+    """
+    assinante, posicao = await feed_hub.assinar(frozenset(tabelas or TABELAS_FEED))
+    try:
+        if cursor is None:
+            yield posicao, None
+        elif cursor and not await evento_existe(cursor):
+            # O evento do cursor já foi apagado pela retenção (ou nunca existiu): eventos perdidos
+            yield posicao, evento_reset(posicao)
+        else:
+            # Retomada: eventos entre o cursor e a posição do hub saem do banco, em lotes
+            lido = enviado = cursor
+            while lido < posicao:
+                eventos = await select_eventos(lido, posicao, LOTE_EVENTOS)
+                if not eventos:
+                    break
+                for evento in eventos:
+                    if evento.tabela in assinante.tabelas:
+                        enviado = evento.seq
+                        yield evento.seq, evento_para_json(evento)
+                lido = eventos[-1].seq
+            if enviado < posicao:
+                # Eventos de outras tabelas (ou nenhum) até a posição: o cursor avança mesmo assim
+                yield posicao, None
+
+        # O cursor pode estar à frente deste worker (o cliente veio de outro): nada repetido,
+        # exceto os resets (evento tardio), que valem mesmo com um seq já enviado
+        enviado = max(posicao, cursor or 0)
+        while True:
+            try:
+                item = await asyncio.wait_for(assinante.fila.get(), settings.FEED_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if item is None:
+                return
+            seq, json, reset = item
+            if seq > enviado or reset:
+                enviado = max(enviado, seq)
+                yield seq, json
+    finally:
+        feed_hub.cancelar(assinante)
+
+
+def _cursor_last_event_id(last_event_id: Optional[str]) -> Optional[int]:
+    if last_event_id is None:
+        return None
+    if not last_event_id.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Last-Event-ID inválido: '{last_event_id}'.",
+        )
+    return int(last_event_id)
+
+
+async def _sse(eventos: AsyncIterator[Optional[tuple[int, Optional[str]]]]) -> AsyncIterator[str]:
+    async for item in eventos:
+        if item is None:
+            yield ": keep-alive\n\n"
+        elif item[1] is None:
+            # Só o id: o EventSource atualiza o Last-Event-ID sem disparar evento
+            yield f"id: {item[0]}\n\n"
+        else:
+            yield f"id: {item[0]}\ndata: {item[1]}\n\n"
+
+
+# Feed de alterações em Server-Sent Events
+@router.get(
+    "/eventos",
+     summary="Acompanhando as alterações de atletas, categorias e centros (Server-Sent Events)",
+     response_class=StreamingResponse,
+     description=(
+        "Stream text/event-stream com as alterações, em vez de consultar GET /atletas de tempos em "
+        f"tempos. {DESCRICAO_EVENTOS} O EventSource do navegador já reenvia o último id no "
+        "cabeçalho Last-Event-ID ao reconectar."
+     ),
+)
+async def stream_eventos(
+    cursor: Optional[int] = Query(None, ge=0, description="Último seq recebido; sem cursor, só as alterações a partir de agora"),
+    tabelas: Optional[list[TabelaFeed]] = Query(None, description="Somente estas tabelas (padrão: todas)"),
+    last_event_id: Optional[str] = Header(None, description="Último id recebido (reconexão do EventSource)"),
+) -> StreamingResponse:
+    reconexao = _cursor_last_event_id(last_event_id)
+    if reconexao is not None:
+        cursor = reconexao
+
+    return StreamingResponse(
+        _sse(_eventos(cursor, tabelas)), # type: ignore
+        media_type="text/event-stream",
+        # Sem cache e sem buffer em proxies (nginx): cada evento sai na hora
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _esperar_desconexao(websocket: WebSocket) -> None:
+    # Mensagens do cliente são ignoradas: o feed só envia
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+# Feed de alterações em WebSocket
+@router.websocket("/ws")
+async def websocket_eventos(
+    websocket: WebSocket,
+    cursor: Optional[int] = Query(None, ge=0),
+    tabelas: Optional[list[TabelaFeed]] = Query(None),
+) -> None:
+    """
+    Mesmos eventos do /feed/eventos, um JSON por mensagem. A primeira mensagem (op "inicio")
+    traz o seq da posição atual, para a retomada.
+    """
+    await websocket.accept()
+    eventos = _eventos(cursor, tabelas) # type: ignore
+    desconexao = asyncio.create_task(_esperar_desconexao(websocket))
+    try:
+        async for item in eventos:
+            # O keep-alive só serve para notar a desconexão: o ping do WebSocket é do servidor
+            if desconexao.done():
+                return
+            if item is None:
+                continue
+            seq, json = item
+            await websocket.send_text(json if json is not None else f'{{"seq":{seq},"op":"inicio"}}')
+    except WebSocketDisconnect:
+        pass
+    finally:
+        desconexao.cancel()
+        await eventos.aclose()
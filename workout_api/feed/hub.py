@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from workout_api.configs.settings import settings
+from workout_api.contrib import metrics
+from workout_api.contrib.changes import ChangeEvent, change_bus
+from workout_api.feed.repository import (
+    TABELAS_FEED,
+    evento_para_json,
+    limpar_eventos,
+    select_eventos,
+    select_seqs_recentes,
+    select_tabelas_em_faixas,
+    ultimo_seq,
+)
+
+logger = logging.getLogger(__name__)
+
+# Distribuição do feed dentro de um worker: um único leitor do outbox, acordado pelo barramento de
+# alterações (o commit neste worker, ou o NOTIFY do único ouvinte LISTEN do worker), busca os
+# eventos novos uma vez e os entrega a todas as conexões (SSE e WebSocket) deste processo. O custo
+# no banco é uma consulta por lote de alterações, qualquer que seja o número de assinantes.
+#
+# O seq é numerado no INSERT, não no commit: duas escritas simultâneas podem confirmar o seq 11
+# antes do 10. Por isso o hub entrega os eventos em sequência, sem pular números: diante de uma
+# lacuna (o 10 ainda não visível) ele espera, e só a pula depois de ESPERA_LACUNA (uma transação
+# desfeita depois de gravar o evento nunca preenche o número). Assim ninguém recebe o 11 e perde
+# o 10, sem serializar os commits das escritas.
+#
+# O tempo até o commit não tem limite (esperas por trava, o merge de uma importação grande): uma
+# lacuna pulada continua sendo conferida por VIGIA_LACUNAS. Se o evento aparecer depois, os
+# assinantes da tabela dele recebem um reset no lugar do evento, que já ficou para trás.
+
+LOTE_EVENTOS = 500
+# Espera por um seq ausente antes de pulá-lo (em geral a lacuna é de uma transação desfeita)
+ESPERA_LACUNA = 2.0
+# Intervalo das novas consultas enquanto há uma lacuna pendente
+INTERVALO_LACUNA = 0.05
+# Por quanto tempo uma lacuna pulada é conferida, no máximo a cada INTERVALO_CONFERENCIA
+VIGIA_LACUNAS = 3600.0
+INTERVALO_CONFERENCIA = 1.0
+# Lacunas conferidas ao mesmo tempo (as mais antigas deixam de ser conferidas)
+MAXIMO_LACUNAS = 1000
+# Limpeza dos eventos mais antigos que a retenção, no máximo uma vez por intervalo, por worker
+INTERVALO_LIMPEZA = 3600.0
+
+DISTRIBUIDOS = metrics.counter(
+    "workout_api_feed_events_total",
+    "Eventos do outbox lidos e distribuídos às conexões deste worker.",
+)
+ATRASADOS = metrics.counter(
+    "workout_api_feed_slow_subscribers_total",
+    "Assinantes com a fila cheia que receberam um reset no lugar dos eventos perdidos.",
+)
+TARDIOS = metrics.counter(
+    "workout_api_feed_late_events_total",
+    "Eventos confirmados depois de a lacuna do seq deles ter sido pulada (viram um reset).",
+)
+
+
+class Assinante:
+    """
+    Fila de eventos (seq, json, reset) de uma conexão, já filtrada pelas tabelas pedidas.
+    reset=True marca um reset, enviado mesmo com um seq que a conexão já passou.
+    """
+
+    def __init__(self, tabelas: frozenset[str], tamanho_fila: int) -> None:
+        self.tabelas = tabelas
+        self.fila: asyncio.Queue[Optional[tuple[int, str, bool]]] = asyncio.Queue(tamanho_fila)
+
+    def entregar(self, seq: int, tabela: str, json: str) -> None:
+        if tabela not in self.tabelas:
+            return
+        if self.fila.full():
+            # Conexão lenta: descarta a fila e pede que o cliente recarregue (reset) a partir daqui
+            ATRASADOS.inc()
+            self.reiniciar(seq)
+            return
+        self.fila.put_nowait((seq, json, False))
+
+    def reiniciar(self, seq: int) -> None:
+        # Reset no fim da fila; com a fila cheia, ele substitui a fila inteira
+        if self.fila.full():
+            while not self.fila.empty():
+                self.fila.get_nowait()
+        self.fila.put_nowait((seq, evento_reset(seq), True))
+
+    def encerrar(self) -> None:
+        # None na fila: o servidor está desligando
+        while self.fila.full():
+            self.fila.get_nowait()
+        self.fila.put_nowait(None)
+
+
+def evento_reset(seq: int) -> str:
+    # Eventos perdidos (retenção ou conexão lenta): o cliente recarrega as tabelas e segue do seq
+    return f'{{"seq":{seq},"tabela":"*","op":"reset","id":null,"dados":null,"criado_em":null}}'
+
+
+class FeedHub:
+    def __init__(self, intervalo_consulta: float, retencao: timedelta, tamanho_fila: int) -> None:
+        self.intervalo_consulta = intervalo_consulta
+        self.retencao = retencao
+        self.tamanho_fila = tamanho_fila
+        self._assinantes: set[Assinante] = set()
+        # Último seq entregue às filas; None enquanto não há assinantes (nenhuma consulta ao banco)
+        self.ultimo_seq: Optional[int] = None
+        self._acordar = asyncio.Event()
+        self._tarefa: Optional[asyncio.Task] = None
+        self._ultima_limpeza = 0.0
+        # Desde quando (time.monotonic) o hub espera o seq seguinte ao último entregue
+        self._lacuna_desde: Optional[float] = None
+        # Lacunas puladas ainda conferidas: (primeiro seq, último seq, pulada em time.monotonic)
+        self._pulados: list[tuple[int, int, float]] = []
+        self._ultima_conferencia = 0.0
+
+    def assinantes(self) -> int:
+        return len(self._assinantes)
+
+    def ao_alterar(self, event: ChangeEvent) -> None:
+        # Ouvinte do barramento: alteração em uma tabela do feed (ou notificações perdidas)
+        if event.table in TABELAS_FEED or event.op == "reset":
+            self._acordar.set()
+
+    async def assinar(self, tabelas: frozenset[str]) -> tuple[Assinante, int]:
+        """
+        Registra uma conexão. Devolve também a posição do hub: todo evento com seq maior que ela
+        chega pela fila, e os anteriores (a retomada de um cursor) saem do banco.
+        """
+        if self.ultimo_seq is None:
+            # Só eventos gravados há mais de ESPERA_LACUNA são definitivos (nenhum seq menor por vir);
+            # os mais recentes chegam pela fila, mesmo para quem assina "a partir de agora"
+            posicao = await ultimo_seq(datetime.utcnow() - timedelta(seconds=ESPERA_LACUNA))
+            # Lacunas logo abaixo da posição inicial podem ser de transações ainda abertas
+            recentes = await select_seqs_recentes(posicao, LOTE_EVENTOS) if posicao else []
+            if self.ultimo_seq is None:
+                self.ultimo_seq = posicao
+                for maior, menor in zip(recentes, recentes[1:]):
+                    if maior - menor > 1:
+                        self._pular(menor + 1, maior - 1)
+        assinante = Assinante(tabelas, self.tamanho_fila)
+        self._assinantes.add(assinante)
+        return assinante, self.ultimo_seq
+
+    def cancelar(self, assinante: Assinante) -> None:
+        self._assinantes.discard(assinante)
+
+    async def start(self) -> None:
+        self._tarefa = asyncio.create_task(self._executar())
+
+    async def stop(self) -> None:
+        for assinante in self._assinantes:
+            assinante.encerrar()
+        self._assinantes.clear()
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def _executar(self) -> None:
+        while True:
+            try:
+                # Consulta de segurança a cada intervalo: cobre um NOTIFY perdido e o barramento local com vários workers
+                espera = INTERVALO_LACUNA if self._lacuna_desde is not None else self.intervalo_consulta
+                await asyncio.wait_for(self._acordar.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+            self._acordar.clear()
+            try:
+                await self._distribuir()
+                await self._limpar_se_preciso()
+            except Exception:
+                logger.exception("Erro ao distribuir os eventos do feed")
+
+    async def _distribuir(self) -> None:
+        if not self._assinantes:
+            # Sem assinantes a posição é esquecida; o próximo a assinar lê a atual
+            self.ultimo_seq, self._lacuna_desde = None, None
+            self._pulados.clear()
+            return
+        await self._conferir_pulados()
+        while self._assinantes and self.ultimo_seq is not None:
+            eventos = await select_eventos(self.ultimo_seq, None, LOTE_EVENTOS)
+            entregues = 0
+            for evento in eventos:
+                # Na posição 0 (outbox vazio) não há número anterior a esperar
+                if self.ultimo_seq and evento.seq != self.ultimo_seq + 1:
+                    if not self._lacuna_vencida():
+                        # Um seq menor ainda não foi confirmado: espera por ele antes de seguir
+                        break
+                    self._pular(self.ultimo_seq + 1, evento.seq - 1)
+                self._lacuna_desde = None
+                # Serializado uma vez por worker, não uma vez por conexão
+                json = evento_para_json(evento)
+                for assinante in self._assinantes:
+                    assinante.entregar(evento.seq, evento.tabela, json)
+                self.ultimo_seq = evento.seq
+                entregues += 1
+            DISTRIBUIDOS.inc(entregues)
+            if entregues < len(eventos) or len(eventos) < LOTE_EVENTOS:
+                return
+
+    def _pular(self, inicio: int, fim: int) -> None:
+        self._pulados.append((inicio, fim, time.monotonic()))
+        del self._pulados[:-MAXIMO_LACUNAS]
+
+    async def _conferir_pulados(self) -> None:
+        # Um evento que apareceu numa lacuna pulada já ficou para trás: reset para quem assina a tabela
+        agora = time.monotonic()
+        if not self._pulados or agora - self._ultima_conferencia < INTERVALO_CONFERENCIA:
+            return
+        self._ultima_conferencia = agora
+        self._pulados = [lacuna for lacuna in self._pulados if agora - lacuna[2] < VIGIA_LACUNAS]
+        if not self._pulados:
+            return
+        tardios = await select_tabelas_em_faixas([(inicio, fim) for inicio, fim, _ in self._pulados])
+        if not tardios or self.ultimo_seq is None:
+            return
+        TARDIOS.inc(len(tardios))
+        for tardio in tardios:
+            # O seq encontrado deixa de ser conferido; o resto da lacuna continua
+            self._pulados = [
+                parte
+                for inicio, fim, desde in self._pulados
+                for parte in (
+                    ((inicio, tardio.seq - 1, desde), (tardio.seq + 1, fim, desde))
+                    if inicio <= tardio.seq <= fim else ((inicio, fim, desde),)
+                )
+                if parte[0] <= parte[1]
+            ]
+        tabelas = {tardio.tabela for tardio in tardios}
+        for assinante in self._assinantes:
+            if not assinante.tabelas.isdisjoint(tabelas):
+                assinante.reiniciar(self.ultimo_seq)
+
+    def _lacuna_vencida(self) -> bool:
+        agora = time.monotonic()
+        if self._lacuna_desde is None:
+            self._lacuna_desde = agora
+        return agora - self._lacuna_desde >= ESPERA_LACUNA
+
+    async def _limpar_se_preciso(self) -> None:
+        if time.monotonic() - self._ultima_limpeza < INTERVALO_LIMPEZA:
+            return
+        self._ultima_limpeza = time.monotonic()
+        await limpar_eventos(datetime.utcnow() - self.retencao)
+
+
+feed_hub = FeedHub(
+    intervalo_consulta=settings.FEED_INTERVALO_CONSULTA,
+    retencao=timedelta(hours=settings.FEED_RETENCAO_HORAS),
+    tamanho_fila=settings.FEED_FILA_ASSINANTE,
+)
+change_bus.subscribe(feed_hub.ao_alterar)
+
+metrics.callback(
+    "workout_api_feed_subscribers",
+    "Conexões (SSE e WebSocket) assinando o feed neste worker.",
+    lambda: [({}, feed_hub.assinantes())],
+)
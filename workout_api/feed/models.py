@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Table, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from workout_api.contrib.models import BaseModel
+
+# Outbox do feed de alterações: cada escrita em atletas, categorias e centros de treinamento grava
+# aqui, na mesma transação, um evento por entidade alterada. O evento só existe se a escrita foi
+# confirmada, e o seq (crescente, numerado no INSERT) é o cursor com que o cliente retoma o feed.
+feed_eventos = Table(
+    'feed_eventos',
+    BaseModel.metadata,
+    # BIGINT no Postgres; no SQLite só INTEGER PRIMARY KEY é autoincremento (rowid)
+    Column('seq', BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True),
+    Column('tabela', String(30), nullable=False),
+    # "insert", "update", "delete" ou "reset" (muitas linhas de uma vez: recarregue a tabela)
+    Column('op', String(10), nullable=False),
+    # ID público da entidade (nulo no reset)
+    Column('entidade_id', PGUUID(as_uuid=True), nullable=True),
+    # Entidade depois da alteração, já em JSON no formato da API (nulo no delete e no reset)
+    Column('dados', Text, nullable=True),
+    Column('criado_em', DateTime, nullable=False),
+    Index('ix_feed_eventos_criado_em', 'criado_em'),
+)
@@ -0,0 +1,98 @@
+import json
+from datetime import datetime
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+from pydantic_core import to_json
+from sqlalchemy import case, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.configs.database import engine
+from workout_api.feed.models import feed_eventos
+
+TABELAS_FEED = ("atletas", "categorias", "centros_treinamento")
+
+
+async def registrar_eventos(
+    session: AsyncSession, tabela: str, op: str, entidades: Iterable[tuple[Optional[UUID], Optional[Any]]]
+) -> None:
+    """
+    Grava no outbox, na transação da escrita, um evento por (id, dados) alterado.
+    Chame logo antes do commit: o seq é numerado no INSERT, e quanto mais perto do commit, menos
+    tempo um seq menor fica invisível enquanto um maior já foi confirmado (veja FeedHub).
+    """
+    agora = datetime.utcnow()
+    linhas = [
+        {
+            "tabela": tabela,
+            "op": op,
+            "entidade_id": entidade_id,
+            "dados": to_json(dados).decode() if dados is not None else None,
+            "criado_em": agora,
+        }
+        for entidade_id, dados in entidades
+    ]
+    if linhas:
+        await session.execute(insert(feed_eventos), linhas)
+
+
+def evento_para_json(evento) -> str:
+    return to_json({
+        "seq": evento.seq,
+        "tabela": evento.tabela,
+        "op": evento.op,
+        "id": evento.entidade_id,
+        "dados": json.loads(evento.dados) if evento.dados is not None else None,
+        "criado_em": evento.criado_em,
+    }).decode()
+
+
+async def ultimo_seq(gravados_antes_de: datetime) -> int:
+    """
+    Maior seq entre os eventos gravados antes do instante. Sem nenhum (outbox vazio ou limpo
+    pela retenção), o seq anterior ao mais antigo, para não esperar por números que não voltam.
+    """
+    stmt = select(
+        func.max(case((feed_eventos.c.criado_em < gravados_antes_de, feed_eventos.c.seq))),
+        func.min(feed_eventos.c.seq),
+    )
+    async with engine.connect() as conexao:
+        anterior, primeiro = (await conexao.execute(stmt)).one()
+    if anterior is not None:
+        return anterior
+    return primeiro - 1 if primeiro is not None else 0
+
+
+async def select_eventos(depois_de: int, ate: Optional[int], limite: int) -> list:
+    """Eventos com seq em (depois_de, ate], em ordem; sem `ate`, até o mais recente."""
+    stmt = select(feed_eventos).where(feed_eventos.c.seq > depois_de).order_by(feed_eventos.c.seq).limit(limite)
+    if ate is not None:
+        stmt = stmt.where(feed_eventos.c.seq <= ate)
+    async with engine.connect() as conexao:
+        return (await conexao.execute(stmt)).all()
+
+
+async def select_tabelas_em_faixas(faixas: list[tuple[int, int]]) -> list:
+    """(seq, tabela) dos eventos com seq em alguma das faixas [inicio, fim]."""
+    stmt = select(feed_eventos.c.seq, feed_eventos.c.tabela).where(
+        or_(*(feed_eventos.c.seq.between(inicio, fim) for inicio, fim in faixas))
+    )
+    async with engine.connect() as conexao:
+        return (await conexao.execute(stmt)).all()
+
+
+async def select_seqs_recentes(ate: int, limite: int) -> list[int]:
+    """Os `limite` maiores seqs até `ate`, em ordem decrescente."""
+    stmt = select(feed_eventos.c.seq).where(feed_eventos.c.seq <= ate).order_by(feed_eventos.c.seq.desc()).limit(limite)
+    async with engine.connect() as conexao:
+        return list((await conexao.execute(stmt)).scalars())
+
+
+async def evento_existe(seq: int) -> bool:
+    async with engine.connect() as conexao:
+        return (await conexao.execute(select(feed_eventos.c.seq).where(feed_eventos.c.seq == seq))).first() is not None
+
+
+async def limpar_eventos(anteriores_a: datetime) -> int:
+    async with engine.begin() as conexao:
+        resultado = await conexao.execute(delete(feed_eventos).where(feed_eventos.c.criado_em < anteriores_a))
+    return resultado.rowcount
@@ -0,0 +1,173 @@
+import os
+import tempfile
+from datetime import datetime
+from typing import Literal, Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from pydantic import UUID4
+from sqlalchemy import tuple_
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+from workout_api.configs.settings import settings
+from workout_api.contrib.dependencies import DatabaseDependency
+from workout_api.importacao.models import ImportacaoErroModel, ImportacaoModel
+from workout_api.importacao.processamento import COLUNAS_CSV, iniciar_processamento
+from workout_api.importacao.schemas import ImportacaoErroOut, ImportacaoOut
+from workout_api.responses.standard_responses import StandardJSONResponse, StandardResponseSuccess, success_response
+
+router = APIRouter()
+
+# Content-Types aceitos quando o formato não é informado na query
+FORMATOS_POR_CONTENT_TYPE = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+async def _salvar_upload(request: Request, formato: str) -> tuple[str, int]:
+    # O corpo vai direto para um arquivo temporário em disco, pedaço por pedaço: o arquivo
+    # inteiro nunca fica na memória. A escrita roda no threadpool para não travar o event loop
+    descritor, caminho = tempfile.mkstemp(prefix="importacao-", suffix=f".{formato}", dir=settings.IMPORTACAO_DIRETORIO)
+    tamanho = 0
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            async for pedaco in request.stream():
+                tamanho += len(pedaco)
+                if tamanho > settings.IMPORTACAO_TAMANHO_MAXIMO:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"O arquivo passa do limite de {settings.IMPORTACAO_TAMANHO_MAXIMO} bytes.",
+                    )
+                if pedaco:
+                    await run_in_threadpool(arquivo.write, pedaco)
+    except BaseException:
+        os.remove(caminho)
+        raise
+    return caminho, tamanho
+
+
+# Recebendo um arquivo de atletas para importação em segundo plano
+@router.post(
+    "/atletas",
+     summary="Importando atletas de um arquivo CSV ou NDJSON",
+     status_code=status.HTTP_202_ACCEPTED,
+     response_model=StandardResponseSuccess[ImportacaoOut],
+     description=(
+        "Envie o arquivo como corpo da requisição (sem multipart). CSV: cabeçalho com as colunas "
+        f"{', '.join(COLUNAS_CSV)}. NDJSON: um objeto por linha no formato de AtletaIn. "
+        "A importação roda em segundo plano: acompanhe o progresso em GET /importacoes/{id} e os "
+        "erros por linha em GET /importacoes/{id}/erros. Linhas inválidas ou com CPF já cadastrado "
+        "(ou repetido no arquivo) são rejeitadas sem impedir a importação das demais."
+     ),
+)
+async def importar_atletas(
+    request: Request,
+    db_session: DatabaseDependency,
+    formato: Optional[Literal["csv", "ndjson"]] = Query(None, description="Formato do arquivo; se omitido, vem do Content-Type"),
+) -> StandardJSONResponse:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    formato = formato or FORMATOS_POR_CONTENT_TYPE.get(content_type) # type: ignore
+    if formato is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Informe o formato (?formato=csv ou ?formato=ndjson) ou envie Content-Type text/csv ou application/x-ndjson.",
+        )
+
+    caminho, tamanho = await _salvar_upload(request, formato)
+    if not tamanho:
+        os.remove(caminho)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O arquivo enviado está vazio.")
+
+    # Registrando o job antes de começar, para o cliente já poder consultar o progresso
+    importacao = ImportacaoModel(id=uuid4(), status="recebida", formato=formato, created_at=datetime.utcnow())
+    try:
+        db_session.add(importacao)
+        await db_session.commit()
+        await db_session.refresh(importacao)
+    except Exception:
+        os.remove(caminho)
+        raise
+
+    iniciar_processamento(importacao.pk_id, caminho, formato)
+
+    return success_response(
+        ImportacaoOut.model_validate(importacao),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/importacoes/{importacao.id}"},
+    )
+
+
+async def _buscar_importacao(db_session, id: UUID4) -> ImportacaoModel:
+    importacao = (await db_session.execute(select(ImportacaoModel).filter_by(id=id))).scalars().first()
+    if not importacao:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Importação não encontrada no identificador: {id}",
+        )
+    return importacao
+
+
+# Consultando o progresso de uma importação
+@router.get(
+    "/{id}",
+     summary="Consultando o progresso de uma importação",
+     status_code=status.HTTP_200_OK,
+     response_model=StandardResponseSuccess[ImportacaoOut],
+)
+async def query_importacao(id: UUID4, db_session: DatabaseDependency) -> StandardJSONResponse:
+    # Lido do primário: uma réplica atrasada mostraria um progresso antigo
+    importacao = await _buscar_importacao(db_session, id)
+    return success_response(ImportacaoOut.model_validate(importacao))
+
+
+# Listando os erros por linha de uma importação
+@router.get(
+    "/{id}/erros",
+     summary="Consultando os erros por linha de uma importação",
+     status_code=status.HTTP_200_OK,
+     response_model=StandardResponseSuccess[list[ImportacaoErroOut]],
+     description="Erros em ordem de linha. Envie o X-Next-Cursor recebido no parâmetro cursor para a próxima página.",
+)
+async def query_importacao_erros(
+    id: UUID4,
+    db_session: DatabaseDependency,
+    limit: int = Query(100, ge=1, le=1000, description="Quantidade máxima de erros na página"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido em X-Next-Cursor pela página anterior"),
+) -> StandardJSONResponse:
+    importacao = await _buscar_importacao(db_session, id)
+
+    stmt = (
+        select(
+            ImportacaoErroModel.pk_id, ImportacaoErroModel.linha, ImportacaoErroModel.cpf,
+            ImportacaoErroModel.campo, ImportacaoErroModel.mensagem,
+        )
+        .where(ImportacaoErroModel.importacao_id == importacao.pk_id)
+        .order_by(ImportacaoErroModel.linha, ImportacaoErroModel.pk_id)
+    )
+    if cursor:
+        # Cursor "linha:pk_id" do último erro da página anterior
+        try:
+            linha, pk_id = (int(parte) for parte in cursor.split(":"))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cursor de paginação inválido: '{cursor}'.",
+            )
+        stmt = stmt.where(tuple_(ImportacaoErroModel.linha, ImportacaoErroModel.pk_id) > (linha, pk_id))
+
+    # Buscando uma linha a mais para saber se existe próxima página
+    erros = (await db_session.execute(stmt.limit(limit + 1))).all()
+
+    headers = {}
+    if len(erros) > limit:
+        erros = erros[:limit]
+        headers["X-Next-Cursor"] = f"{erros[-1].linha}:{erros[-1].pk_id}"
+
+    return success_response(
+        [{"linha": erro.linha, "cpf": erro.cpf, "campo": erro.campo, "mensagem": erro.mensagem} for erro in erros],
+        headers=headers,
+    )
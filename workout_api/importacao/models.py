@@ -0,0 +1,63 @@
+import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from workout_api.contrib.models import BaseModel
+
+class ImportacaoModel(BaseModel):
+    __tablename__ = 'importacoes'
+
+    pk_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # recebida -> processando -> concluida | falhou
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    formato: Mapped[str] = mapped_column(String(10), nullable=False)
+    linhas_lidas: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    linhas_validas: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    linhas_importadas: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    linhas_com_erro: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    mensagem: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+    finalizado_em: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class ImportacaoErroModel(BaseModel):
+    __tablename__ = 'importacao_erros'
+    __table_args__ = (
+        # Relatório de erros paginado por linha do arquivo
+        Index('ix_importacao_erros_importacao_id_linha', 'importacao_id', 'linha'),
+    )
+
+    pk_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    importacao_id: Mapped[int] = mapped_column(ForeignKey('importacoes.pk_id', ondelete='CASCADE'), nullable=False)
+    linha: Mapped[int] = mapped_column(Integer, nullable=False)
+    cpf: Mapped[Optional[str]] = mapped_column(String(11), nullable=True)
+    campo: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    mensagem: Mapped[str] = mapped_column(String(500), nullable=False)
+
+
+class AtletaImportacaoModel(BaseModel):
+    """
+    Área de preparação (staging) das linhas já validadas de uma importação.
+
+    Recebe as linhas via COPY e é mesclada em atletas com um único INSERT ... SELECT.
+    O id de cada linha vira o id do atleta criado. Sem FKs: as referências são resolvidas
+    na validação, e o merge não as confere de novo; uma categoria ou centro excluído no meio
+    da importação faz a FK de atletas recusar o merge, e a importação termina como falha.
+    """
+    __tablename__ = 'atletas_importacao'
+    __table_args__ = (
+        # Deduplicação por CPF dentro da importação (primeira linha vence)
+        Index('ix_atletas_importacao_importacao_id_cpf_linha', 'importacao_id', 'cpf', 'linha'),
+    )
+
+    pk_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    importacao_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    linha: Mapped[int] = mapped_column(Integer, nullable=False)
+    nome: Mapped[str] = mapped_column(String(50), nullable=False)
+    cpf: Mapped[str] = mapped_column(String(11), nullable=False)
+    idade: Mapped[int] = mapped_column(Integer, nullable=False)
+    peso: Mapped[float] = mapped_column(Float, nullable=False)
+    altura: Mapped[float] = mapped_column(Float, nullable=False)
+    sexo: Mapped[str] = mapped_column(String(1), nullable=False)
+    categoria_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    centro_treinamento_id: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,290 @@
+import asyncio
+import contextvars
+import csv
+import io
+import logging
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, Optional
+from uuid import uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import DateTime, String, case, cast, delete, exists, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from starlette.concurrency import run_in_threadpool
+from workout_api.atleta.models import AtletaModel
+from workout_api.atleta.schemas import AtletaIn
+from workout_api.configs.database import async_session
+from workout_api.configs.settings import settings
+from workout_api.contrib.changes import ChangeEvent, commit_and_publish
+from workout_api.contrib.reference_cache import categorias_cache, centros_treinamento_cache
+from workout_api.feed.repository import registrar_eventos
+from workout_api.importacao.models import AtletaImportacaoModel, ImportacaoErroModel, ImportacaoModel
+
+logger = logging.getLogger(__name__)
+
+# Colunas do CSV: os campos de AtletaIn, com categoria e centro de treinamento pelo nome
+COLUNAS_CSV = ("nome", "cpf", "idade", "peso", "altura", "sexo", "categoria", "centro_treinamento")
+
+COLUNAS_STAGING = (
+    "id", "importacao_id", "linha", "nome", "cpf", "idade", "peso", "altura", "sexo",
+    "categoria_id", "centro_treinamento_id",
+)
+
+# Importações rodando neste processo (referência forte para as tasks não serem coletadas)
+_tarefas: set[asyncio.Task] = set()
+
+
+class ArquivoInvalido(ValueError):
+    """O arquivo não pode ser importado (ex: cabeçalho do CSV sem as colunas obrigatórias)."""
+
+
+# --- Leitura e validação (rodam no threadpool, fora do event loop) ---
+
+def _abrir(caminho: str, formato: str) -> tuple[io.TextIOWrapper, Iterator[tuple[int, object]]]:
+    # Retorna o arquivo aberto e um iterador de (linha, registro bruto), lido sob demanda
+    arquivo = open(caminho, encoding="utf-8-sig", newline="")
+    if formato == "csv":
+        leitor = csv.DictReader(arquivo)
+        faltando = [coluna for coluna in COLUNAS_CSV if coluna not in (leitor.fieldnames or [])]
+        if faltando:
+            arquivo.close()
+            raise ArquivoInvalido(f"Coluna(s) obrigatória(s) ausente(s) no cabeçalho do CSV: {', '.join(faltando)}.")
+        return arquivo, enumerate(leitor, start=1)
+    linhas = ((numero, linha) for numero, linha in enumerate(arquivo, start=1) if linha.strip())
+    return arquivo, linhas
+
+
+def _proximo_lote(registros: Iterator[tuple[int, object]], tamanho: int) -> list[tuple[int, object]]:
+    return list(islice(registros, tamanho))
+
+
+def _validar_lote(brutos: list[tuple[int, object]], formato: str) -> tuple[list[tuple[int, AtletaIn]], list[dict]]:
+    validos: list[tuple[int, AtletaIn]] = []
+    erros: list[dict] = []
+    for linha, bruto in brutos:
+        cpf = None
+        try:
+            if formato == "csv":
+                registro: dict = bruto # type: ignore
+                cpf = registro.get("cpf")
+                if None in registro:
+                    raise ValueError("Linha com mais colunas que o cabeçalho.")
+                atleta_in = AtletaIn.model_validate({
+                    **{campo: registro.get(campo) for campo in ("nome", "cpf", "idade", "peso", "altura", "sexo")},
+                    "categoria": {"nome": registro.get("categoria")},
+                    "centro_treinamento": {"nome": registro.get("centro_treinamento")},
+                })
+            else:
+                atleta_in = AtletaIn.model_validate_json(bruto) # type: ignore
+        except ValidationError as e:
+            for erro in e.errors():
+                campo = ".".join(str(parte) for parte in erro["loc"]) or None
+                erros.append({"linha": linha, "cpf": _cpf_curto(cpf), "campo": campo, "mensagem": erro["msg"]})
+            continue
+        except ValueError as e:
+            erros.append({"linha": linha, "cpf": _cpf_curto(cpf), "campo": None, "mensagem": str(e)})
+            continue
+        validos.append((linha, atleta_in))
+    return validos, erros
+
+
+def _cpf_curto(cpf: Optional[str]) -> Optional[str]:
+    # O relatório guarda o CPF informado só se couber na coluna
+    return cpf.strip()[:11] if isinstance(cpf, str) and cpf.strip() else None
+
+
+# --- Banco ---
+
+async def _copiar_para_staging(session: AsyncSession, registros: list[tuple]) -> None:
+    if not registros:
+        return
+    conexao = await session.connection()
+    if conexao.dialect.driver == "asyncpg":
+        # COPY binário pelo asyncpg, na mesma conexão (e transação) da sessão
+        bruta = await conexao.get_raw_connection()
+        await bruta.driver_connection.copy_records_to_table( # type: ignore
+            AtletaImportacaoModel.__tablename__, records=registros, columns=COLUNAS_STAGING
+        )
+    else:
+        await session.execute(
+            insert(AtletaImportacaoModel), [dict(zip(COLUNAS_STAGING, registro)) for registro in registros]
+        )
+
+
+async def _atualizar(session: AsyncSession, importacao_pk: int, **valores) -> None:
+    await session.execute(update(ImportacaoModel).where(ImportacaoModel.pk_id == importacao_pk).values(**valores))
+
+
+async def _gravar_erros(session: AsyncSession, importacao_pk: int, erros: list[dict]) -> None:
+    if erros:
+        await session.execute(
+            insert(ImportacaoErroModel),
+            [{"id": uuid4(), "importacao_id": importacao_pk, **erro} for erro in erros],
+        )
+
+
+def _merge_atletas(dialeto: str, importacao_pk: int, agora: datetime):
+    # INSERT INTO atletas ... SELECT da staging, uma linha por CPF (a primeira do arquivo),
+    # ignorando CPFs que já existem: uma única instrução, sem ida e volta por atleta
+    staging, anterior = AtletaImportacaoModel, aliased(AtletaImportacaoModel)
+    primeira_linha_do_cpf = (
+        select(func.min(anterior.linha))
+        .where(anterior.importacao_id == staging.importacao_id, anterior.cpf == staging.cpf)
+        .scalar_subquery()
+    )
+    origem = select(
+        staging.id, staging.nome, staging.cpf, staging.idade, staging.peso, staging.altura, staging.sexo,
+        literal(agora, DateTime), staging.categoria_id, staging.centro_treinamento_id,
+    ).where(staging.importacao_id == importacao_pk, staging.linha == primeira_linha_do_cpf)
+
+    colunas = ["id", "nome", "cpf", "idade", "peso", "altura", "sexo", "created_at", "categoria_id", "centro_treinamento_id"]
+    insert_dialeto = pg_insert if dialeto == "postgresql" else sqlite_insert
+    return insert_dialeto(AtletaModel).from_select(colunas, origem).on_conflict_do_nothing(index_elements=["cpf"])
+
+
+def _erros_de_cpf(importacao_pk: int):
+    # INSERT INTO importacao_erros ... SELECT das linhas válidas que não viraram atleta (CPF
+    # repetido no arquivo ou já cadastrado), com a mensagem montada no banco: uma reimportação de
+    # um arquivo inteiro rejeitado não passa as linhas pela memória do processo. O id da linha na
+    # staging serve de id do erro (é único e não virou atleta)
+    staging = AtletaImportacaoModel
+    por_cpf = select(
+        staging.id,
+        staging.linha,
+        staging.cpf,
+        func.min(staging.linha).over(partition_by=staging.cpf).label("primeira_linha"),
+    ).where(staging.importacao_id == importacao_pk).subquery()
+    mensagem = case(
+        (
+            por_cpf.c.primeira_linha < por_cpf.c.linha,
+            literal("CPF '") + por_cpf.c.cpf + literal("' repetido no arquivo (já informado na linha ")
+            + cast(por_cpf.c.primeira_linha, String) + literal(")."),
+        ),
+        else_=literal("Já existe um atleta cadastrado com o CPF '") + por_cpf.c.cpf + literal("'."),
+    )
+    origem = select(
+        por_cpf.c.id, literal(importacao_pk), por_cpf.c.linha, por_cpf.c.cpf, literal("cpf"), mensagem,
+    ).where(~exists().where(AtletaModel.id == por_cpf.c.id))
+    return insert(ImportacaoErroModel).from_select(
+        ["id", "importacao_id", "linha", "cpf", "campo", "mensagem"], origem
+    )
+
+
+# --- Job ---
+
+async def processar_importacao(importacao_pk: int, caminho: str, formato: str) -> None:
+    """
+    Valida o arquivo em lotes de IMPORTACAO_TAMANHO_LOTE linhas (no threadpool), copia as
+    linhas válidas para a staging e no fim as mescla em atletas com um INSERT ... SELECT.
+    O progresso e os erros de cada lote são gravados à medida que o arquivo é lido.
+    """
+    arquivo = None
+    try:
+        async with async_session() as session: # type: ignore
+            await _atualizar(session, importacao_pk, status="processando")
+            await session.commit()
+
+        arquivo, registros = await run_in_threadpool(_abrir, caminho, formato)
+        while True:
+            brutos = await run_in_threadpool(_proximo_lote, registros, settings.IMPORTACAO_TAMANHO_LOTE)
+            if not brutos:
+                break
+            validos, erros = await run_in_threadpool(_validar_lote, brutos, formato)
+
+            # Referências resolvidas pelo cache, em uma consulta por lote no pior caso
+            categorias = await categorias_cache.pk_ids_por_nome({a.categoria.nome.strip() for _, a in validos})
+            centros = await centros_treinamento_cache.pk_ids_por_nome(
+                {a.centro_treinamento.nome.strip() for _, a in validos}
+            )
+            registros_staging = []
+            for linha, atleta_in in validos:
+                categoria_nome = atleta_in.categoria.nome.strip()
+                centro_nome = atleta_in.centro_treinamento.nome.strip()
+                if categoria_nome not in categorias:
+                    erros.append({
+                        "linha": linha, "cpf": atleta_in.cpf, "campo": "categoria",
+                        "mensagem": f"A categoria '{categoria_nome}' não foi encontrada.",
+                    })
+                if centro_nome not in centros:
+                    erros.append({
+                        "linha": linha, "cpf": atleta_in.cpf, "campo": "centro_treinamento",
+                        "mensagem": f"O centro de treinamento '{centro_nome}' não foi encontrado.",
+                    })
+                if categoria_nome in categorias and centro_nome in centros:
+                    registros_staging.append((
+                        uuid4(), importacao_pk, linha, atleta_in.nome, atleta_in.cpf, atleta_in.idade,
+                        atleta_in.peso, atleta_in.altura, atleta_in.sexo,
+                        categorias[categoria_nome], centros[centro_nome],
+                    ))
+
+            async with async_session() as session: # type: ignore
+                await _copiar_para_staging(session, registros_staging)
+                await _gravar_erros(session, importacao_pk, erros)
+                await _atualizar(
+                    session,
+                    importacao_pk,
+                    linhas_lidas=ImportacaoModel.linhas_lidas + len(brutos),
+                    linhas_validas=ImportacaoModel.linhas_validas + len(registros_staging),
+                    linhas_com_erro=ImportacaoModel.linhas_com_erro + len({erro["linha"] for erro in erros}),
+                )
+                await session.commit()
+
+        async with async_session() as session: # type: ignore
+            resultado = await session.execute(_merge_atletas(session.bind.dialect.name, importacao_pk, datetime.utcnow()))
+            erros_cpf = await session.execute(_erros_de_cpf(importacao_pk))
+            await session.execute(delete(AtletaImportacaoModel).where(AtletaImportacaoModel.importacao_id == importacao_pk))
+            await _atualizar(
+                session,
+                importacao_pk,
+                status="concluida",
+                linhas_importadas=resultado.rowcount,
+                linhas_com_erro=ImportacaoModel.linhas_com_erro + erros_cpf.rowcount,
+                finalizado_em=datetime.utcnow(),
+            )
+            # Os atletas entram todos de uma vez, e os workers são avisados no commit. No feed, um
+            # evento por atleta importado seria maior que a própria importação: vai um reset
+            await registrar_eventos(session, "atletas", "reset", [(None, None)])
+            await commit_and_publish(session, ChangeEvent(table="atletas", op="insert"))
+    except asyncio.CancelledError:
+        await _marcar_falha(importacao_pk, "Importação interrompida pelo desligamento do servidor.")
+        raise
+    except ArquivoInvalido as e:
+        await _marcar_falha(importacao_pk, str(e))
+    except Exception:
+        # A mensagem fica visível em GET /importacoes/{id}: o detalhe do erro (SQL, constraints) vai só para o log
+        logger.exception("Erro ao processar a importação %s", importacao_pk)
+        await _marcar_falha(importacao_pk, "Erro interno ao processar a importação. Por favor, tente novamente.")
+    finally:
+        if arquivo is not None:
+            arquivo.close()
+        os.remove(caminho)
+
+
+async def _marcar_falha(importacao_pk: int, mensagem: str) -> None:
+    try:
+        async with async_session() as session: # type: ignore
+            await session.execute(delete(AtletaImportacaoModel).where(AtletaImportacaoModel.importacao_id == importacao_pk))
+            await _atualizar(session, importacao_pk, status="falhou", mensagem=mensagem, finalizado_em=datetime.utcnow())
+            await session.commit()
+    except Exception:
+        logger.exception("Erro ao registrar a falha da importação %s", importacao_pk)
+
+
+def iniciar_processamento(importacao_pk: int, caminho: str, formato: str) -> None:
+    """Dispara o job em segundo plano, fora do ciclo de vida da requisição que o criou."""
+    # Contexto vazio: a instrumentação da requisição (Server-Timing, orçamento de consultas) não conta o job
+    tarefa = contextvars.Context().run(asyncio.create_task, processar_importacao(importacao_pk, caminho, formato))
+    _tarefas.add(tarefa)
+    tarefa.add_done_callback(_tarefas.discard)
+
+
+async def encerrar() -> None:
+    """Cancela as importações em andamento (marcadas como falhas) no desligamento."""
+    for tarefa in list(_tarefas):
+        tarefa.cancel()
+    await asyncio.gather(*_tarefas, return_exceptions=True)
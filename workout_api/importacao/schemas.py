@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Annotated, Optional
+
+from pydantic import UUID4, Field
+from workout_api.contrib.schemas import BaseSchema
+
+class ImportacaoOut(BaseSchema):
+    id: Annotated[UUID4, Field(description='ID da importação')] # type: ignore
+    status: Annotated[str, Field(description='recebida, processando, concluida ou falhou', example='processando')] # type: ignore
+    formato: Annotated[str, Field(description='Formato do arquivo (csv ou ndjson)', example='csv')] # type: ignore
+    linhas_lidas: Annotated[int, Field(description='Linhas do arquivo lidas até agora')] # type: ignore
+    linhas_validas: Annotated[int, Field(description='Linhas que passaram na validação')] # type: ignore
+    linhas_importadas: Annotated[int, Field(description='Atletas criados (preenchido ao concluir)')] # type: ignore
+    linhas_com_erro: Annotated[int, Field(description='Linhas rejeitadas (validação ou CPF duplicado)')] # type: ignore
+    mensagem: Annotated[Optional[str], Field(None, description='Motivo da falha, se houver')] # type: ignore
+    created_at: Annotated[datetime, Field(description='Data de recebimento do arquivo')] # type: ignore
+    finalizado_em: Annotated[Optional[datetime], Field(None, description='Data de conclusão ou falha')] # type: ignore
+
+class ImportacaoErroOut(BaseSchema):
+    linha: Annotated[int, Field(description='Linha do arquivo (a partir de 1, sem contar o cabeçalho do CSV)')] # type: ignore
+    cpf: Annotated[Optional[str], Field(None, description='CPF informado na linha, se houver')] # type: ignore
+    campo: Annotated[Optional[str], Field(None, description='Campo com problema, se identificado')] # type: ignore
+    mensagem: Annotated[str, Field(description='Descrição do erro')] # type: ignore
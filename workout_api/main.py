@@ -1,15 +1,145 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Awaitable, Callable
+
 from fastapi import FastAPI, Request, status, HTTPException
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
-from workout_api.routers import api_router
-from workout_api.responses.standard_responses import StandardResponseError
+from workout_api.responses.standard_responses import StandardResponseError, error_content
+from workout_api.contrib import metrics
+from workout_api.configs.database import aquecer_pools, encerrar_engines
+from workout_api.configs.settings import settings
+from workout_api.contrib.admission import ControleDeAdmissaoMiddleware
+from workout_api.contrib.changes import change_bus
+from workout_api.contrib.instrumentation import InstrumentacaoMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+
+async def aquecer() -> None:
+    """
+    Abre as conexões do pool, carrega categorias e centros e cria as partições de séries de
+    treino do mês atual e dos próximos antes da primeira requisição.
+    Uma falha aqui não impede a subida: as requisições tentam de novo sob demanda.
+    """
+    from workout_api.contrib.reference_cache import REFERENCE_CACHES
+    from workout_api.treinos.repository import preparar_particoes
+
+    try:
+        await aquecer_pools(settings.DB_POOL_WARMUP)
+        for cache in REFERENCE_CACHES:
+            await cache.todos()
+        await preparar_particoes(datetime.utcnow().date(), settings.TREINOS_PARTICOES_FUTURAS)
+    except Exception:
+        logger.exception("Aquecimento na inicialização falhou")
 
-# Inicializa a aplicação FastAPI
-app = FastAPI(title="Workout API")
 
-# Inclui o api_router principal na sua aplicação FastAPI
-app.include_router(api_router)
+# Desligamento dos serviços iniciados, na ordem em que são chamados
+_encerramentos: list[Callable[[], Awaitable[None]]] = []
+
+
+async def iniciar_servicos() -> None:
+    """
+    Inicia o distribuidor do feed e aquece pool e caches. Os módulos dos serviços (feed,
+    importações, consolidação das estatísticas, cache de respostas) só são importados aqui:
+    com LAZY_ROUTERS, junto com as rotas na primeira requisição.
+    """
+    from workout_api.contrib.response_cache import response_cache
+    from workout_api.estatisticas.consolidacao import consolidador_estatisticas
+    from workout_api.feed.hub import feed_hub
+    from workout_api.importacao import processamento as importacao
+
+    await feed_hub.start()
+    _encerramentos.extend((
+        importacao.encerrar,
+        consolidador_estatisticas.encerrar,
+        feed_hub.stop,
+        change_bus.stop,
+        response_cache.close,
+    ))
+    await aquecer()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicia o ouvinte de alterações (invalidação de caches entre workers) e os serviços (sem
+    LAZY_ROUTERS). No desligamento (depois de concluídas as requisições em andamento) encerra as
+    importações, a consolidação das estatísticas, o feed, o ouvinte e os caches e fecha as
+    conexões do banco.
+    """
+    await change_bus.start()
+    if not settings.LAZY_ROUTERS:
+        await iniciar_servicos()
+    try:
+        yield
+    finally:
+        for encerrar in _encerramentos:
+            await encerrar()
+        # Com LAZY_ROUTERS e nenhuma requisição atendida, nenhum serviço foi iniciado
+        await change_bus.stop()
+        await encerrar_engines()
+
+class RoutersTardiosMiddleware:
+    """
+    LAZY_ROUTERS: importa os controllers, monta as rotas e inicia os serviços na primeira
+    requisição, não no boot. As requisições que chegam durante a carga esperam por ela no lock:
+    nenhuma vê as rotas pela metade.
+    """
+
+    def __init__(self, app: ASGIApp, carregar: Callable[[], Awaitable[None]]) -> None:
+        self.app = app
+        self._carregar = carregar
+        self._carregado = False
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._carregado and scope["type"] in ("http", "websocket"):
+            async with self._lock:
+                if not self._carregado:
+                    await self._carregar()
+                    self._carregado = True
+        await self.app(scope, receive, send)
+
+
+# Inicializa a aplicação FastAPI (sem a documentação interativa se DOCS_ENABLED=False)
+app = FastAPI(
+    title="Workout API",
+    lifespan=lifespan,
+    docs_url="/docs" if settings.DOCS_ENABLED else None,
+    redoc_url="/redoc" if settings.DOCS_ENABLED else None,
+    openapi_url="/openapi.json" if settings.DOCS_ENABLED else None,
+)
+
+# Limite de requisições simultâneas por classe de rota e de taxa por cliente (503/429 com Retry-After).
+# Adicionado antes da instrumentação, fica dentro dela: o tempo na fila conta na duração da rota
+app.add_middleware(ControleDeAdmissaoMiddleware)
+
+# Comandos SQL, tempo de banco e espera do pool por requisição (Server-Timing e /metrics por rota)
+app.add_middleware(InstrumentacaoMiddleware)
+
+
+def incluir_routers() -> None:
+    """Importa os controllers (routers.py) e inclui o api_router principal na aplicação."""
+    from workout_api.routers import api_router
+
+    app.include_router(api_router)
+
+
+async def carregar_tardio() -> None:
+    incluir_routers()
+    await iniciar_servicos()
+
+
+if settings.LAZY_ROUTERS:
+    app.add_middleware(RoutersTardiosMiddleware, carregar=carregar_tardio)
+else:
+    incluir_routers()
 
 # --- Manipulador de Exceções Personalizado para HTTPException (400, 404, 409, 500) ---
 @app.exception_handler(HTTPException)
@@ -17,14 +147,9 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     """
     Manipula HTTPExceptions para retornar um formato de erro padronizado.
     """
-    error_response = StandardResponseError.create(
-        code=exc.status_code,
-        message=exc.detail,
-        details={} # Você pode adicionar mais detalhes aqui se a HTTPException tiver
-    )
     return JSONResponse(
         status_code=exc.status_code,
-        content=error_response.model_dump(), # Converte o schema Pydantic para dict
+        content=error_content(exc.status_code, exc.detail),
     )
 
 # --- Manipulador de Exceções Personalizado para Erros 422 (Validação de Schema) ---
@@ -52,10 +177,18 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 # --- Rota raiz para redirecionar para a documentação ---
-@app.get("/", include_in_schema=False)
-async def redirect_to_docs():
+if settings.DOCS_ENABLED:
+    @app.get("/", include_in_schema=False)
+    async def redirect_to_docs():
+        """
+        Redireciona a requisição da raiz para a documentação da API (/docs).
+        """
+        return RedirectResponse(url="/docs")
+
+# --- Métricas no formato texto do Prometheus (pool de conexões, caches) ---
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
     """
-    Redireciona a requisição da raiz para a documentação da API (/docs).
+    Exporta as métricas do processo no formato de exposição do Prometheus.
     """
-    return RedirectResponse(url="/docs")
-
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
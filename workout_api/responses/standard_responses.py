@@ -1,5 +1,7 @@
-from typing import Any, Optional, Union, List, TypeVar, Generic
+from typing import Any, Mapping, Optional, Union, List, TypeVar, Generic
 from pydantic import BaseModel, Field
+from pydantic_core import to_json
+from starlette.responses import Response
 
 # Define um TypeVar para o tipo de dado que será retornado no campo 'data'
 # Removido 'bound=BaseModel' para permitir que T seja qualquer tipo, incluindo listas de BaseModel
@@ -28,6 +30,17 @@ class StandardResponseError(BaseModel):
         }
         return cls(error=error_content) # type: ignore
 
+def error_content(status_code: int, detail: Any) -> dict:
+    """
+    Envelope de erro de uma HTTPException. O detail pode trazer detalhes estruturados:
+    detail={"message": ..., "details": {...}}
+    """
+    message, details = detail, {}
+    if isinstance(detail, dict):
+        message = detail.get("message", "")
+        details = detail.get("details", {})
+    return StandardResponseError.create(code=status_code, message=message, details=details).model_dump()
+
 # --- Schema para o formato de Sucesso (Agora Genérico) ---
 # Ordem de herança: BaseModel primeiro, depois Generic[T]
 class StandardResponseSuccess(BaseModel, Generic[T]): 
@@ -41,3 +54,34 @@ class StandardResponseSuccess(BaseModel, Generic[T]):
     def create(cls, data: T) -> "StandardResponseSuccess[T]":
         return cls(data=data) # type: ignore
 
+
+# --- Serialização direta do envelope de sucesso ---
+class StandardJSONResponse(Response):
+    """
+    Resposta JSON gerada direto em bytes pelo pydantic-core.
+
+    Aceita modelos Pydantic, dicts, UUIDs e datetimes sem passar por jsonable_encoder/json.dumps.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def success_response(
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> StandardJSONResponse:
+    """
+    Monta o envelope de sucesso já serializado.
+
+    Como o handler devolve uma Response, o FastAPI não revalida o conteúdo contra o response_model
+    (que continua valendo para a documentação). Use apenas com dados já validados (schemas de saída)
+    ou vindos do banco no formato do schema.
+    """
+    return StandardJSONResponse(
+        {"success": True, "data": data, "error": None},
+        status_code=status_code,
+        headers=headers,
+    )
@@ -1,10 +1,32 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from workout_api.atleta.controller import router as atleta 
 from workout_api.categorias.controller import router as categorias 
 from workout_api.centro_treinamento.controller import router as centro_treinamento
+from workout_api.estatisticas.controller import router as estatisticas
+from workout_api.feed.controller import router as feed
+from workout_api.importacao.controller import router as importacao
+from workout_api.treinos.controller import router as treinos
+from workout_api.configs.settings import settings
+from workout_api.contrib.http_cache import cache_control
 
 api_router = APIRouter() 
-api_router.include_router(atleta, prefix="/atletas", tags=["atletas"]) 
-api_router.include_router(categorias, prefix="/categorias", tags=["categorias"]) 
-api_router.include_router(centro_treinamento, prefix="/centros_treinamento", tags=["centro_treinamento"])
-
+# Antes dos routers de atletas, categorias e centros: as rotas /.../stats não podem cair em /{id}
+api_router.include_router(
+    estatisticas, tags=["estatisticas"],
+    dependencies=[Depends(cache_control(settings.CACHE_CONTROL_REFERENCIAS))],
+)
+api_router.include_router(
+    atleta, prefix="/atletas", tags=["atletas"],
+    dependencies=[Depends(cache_control(settings.CACHE_CONTROL_ATLETAS))],
+) 
+api_router.include_router(
+    categorias, prefix="/categorias", tags=["categorias"],
+    dependencies=[Depends(cache_control(settings.CACHE_CONTROL_REFERENCIAS))],
+) 
+api_router.include_router(
+    centro_treinamento, prefix="/centros_treinamento", tags=["centro_treinamento"],
+    dependencies=[Depends(cache_control(settings.CACHE_CONTROL_REFERENCIAS))],
+)
+api_router.include_router(importacao, prefix="/importacoes", tags=["importacoes"])
+api_router.include_router(treinos, prefix="/treinos", tags=["treinos"])
+api_router.include_router(feed, prefix="/feed", tags=["feed"])
@@ -0,0 +1,187 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Body, HTTPException, Query, status
+from pydantic import UUID4
+from sqlalchemy.future import select
+from workout_api.atleta.models import AtletaModel
+from workout_api.configs.settings import settings
+from workout_api.contrib.dependencies import DatabaseDependency, ReadDatabaseDependency
+from workout_api.responses.standard_responses import StandardJSONResponse, StandardResponseSuccess, success_response
+from workout_api.treinos.models import inicio_do_mes, somar_meses
+from workout_api.treinos.repository import (
+    CursorInvalido,
+    codificar_cursor,
+    garantir_particoes,
+    gravar_series,
+    instante_utc,
+    pk_ids_por_id,
+    select_resumos,
+    select_series,
+)
+from workout_api.treinos.schemas import ResumoTreinoOut, SerieIn, SerieOut, SeriesGravadasOut
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Relógio dos aparelhos adiantado: séries até esse tanto no futuro ainda são aceitas
+TOLERANCIA_FUTURO = timedelta(days=1)
+# Período padrão da consulta de séries quando inicio não é informado
+PERIODO_PADRAO_SERIES = timedelta(days=7)
+# Erros listados na resposta de um lote rejeitado
+MAXIMO_ERROS_LISTADOS = 100
+
+
+# Recebendo um lote de séries dos aparelhos
+@router.post(
+    "/series",
+     summary="Gravando um lote de séries de treino",
+     status_code=status.HTTP_201_CREATED,
+     response_model=StandardResponseSuccess[SeriesGravadasOut],
+     description=(
+        f"Recebe até {settings.TREINOS_TAMANHO_MAXIMO_LOTE} séries de uma vez. O lote é gravado "
+        "inteiro ou rejeitado inteiro (400, com os erros por posição). Séries já recebidas (mesmo "
+        "atleta, instante e exercício) são ignoradas: o aparelho pode reenviar um lote sem duplicar."
+     ),
+)
+async def post_series(
+    db_session: DatabaseDependency,
+    series: list[SerieIn] = Body(...),
+) -> StandardJSONResponse:
+    if len(series) > settings.TREINOS_TAMANHO_MAXIMO_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No máximo {settings.TREINOS_TAMANHO_MAXIMO_LOTE} séries por lote (recebidas {len(series)}).",
+        )
+
+    # Atletas do lote resolvidos em uma única consulta
+    atletas = await pk_ids_por_id(db_session, list({serie.atleta_id for serie in series}))
+
+    agora = datetime.utcnow()
+    # Séries mais antigas que a retenção iriam para uma partição que já foi (ou logo será) apagada
+    limite_passado = (
+        datetime.combine(somar_meses(inicio_do_mes(agora.date()), -(settings.TREINOS_RETENCAO_MESES - 1)), datetime.min.time())
+        if settings.TREINOS_RETENCAO_MESES > 0 else None
+    )
+    registros, erros = [], []
+    for indice, serie in enumerate(series):
+        realizado_em = instante_utc(serie.realizado_em)
+        if serie.atleta_id not in atletas:
+            erros.append({"indice": indice, "campo": "atleta_id", "mensagem": f"Atleta não encontrado: {serie.atleta_id}"})
+        elif realizado_em > agora + TOLERANCIA_FUTURO:
+            erros.append({"indice": indice, "campo": "realizado_em", "mensagem": "Série no futuro."})
+        elif limite_passado and realizado_em < limite_passado:
+            erros.append({
+                "indice": indice, "campo": "realizado_em",
+                "mensagem": f"Série anterior a {limite_passado.date()}, fora da retenção de {settings.TREINOS_RETENCAO_MESES} meses.",
+            })
+        else:
+            registros.append((atletas[serie.atleta_id], realizado_em, serie.exercicio.strip(), serie.repeticoes, serie.carga))
+
+    if erros:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "message": f"{len(erros)} série(s) inválida(s); nenhuma série do lote foi gravada.",
+                "details": {"erros": erros[:MAXIMO_ERROS_LISTADOS]},
+            },
+        )
+
+    # Partições dos meses do lote criadas antes, em uma transação curta
+    await garantir_particoes({realizado_em.date() for _, realizado_em, *_ in registros})
+    try:
+        gravadas = await gravar_series(db_session, registros)
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        logger.exception("Erro ao gravar séries de treino")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Ocorreu um erro interno ao gravar as séries.",
+        )
+
+    return success_response(
+        {"series_recebidas": len(series), "series_gravadas": gravadas},
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+async def _atleta_pk(db_session, id: UUID4) -> int:
+    atleta_pk = (await db_session.execute(select(AtletaModel.pk_id).where(AtletaModel.id == id))).scalar()
+    if atleta_pk is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Atleta não encontrado no identificador: {id}",
+        )
+    return atleta_pk
+
+
+# Séries de um atleta em um período
+@router.get(
+    "/atletas/{id}/series",
+     summary="Consultando as séries de treino de um atleta",
+     status_code=status.HTTP_200_OK,
+     response_model=StandardResponseSuccess[list[SerieOut]],
+     description=(
+        "Séries da mais recente para a mais antiga, em [inicio, fim) (padrão: os últimos 7 dias). "
+        "Envie o X-Next-Cursor recebido no parâmetro cursor para a próxima página."
+     ),
+)
+async def query_series(
+    id: UUID4,
+    db_session: ReadDatabaseDependency,
+    inicio: Optional[datetime] = Query(None, description="Início do período (inclusivo)"),
+    fim: Optional[datetime] = Query(None, description="Fim do período (exclusivo); padrão: agora"),
+    exercicio: Optional[str] = Query(None, max_length=50, description="Somente este exercício"),
+    limit: int = Query(100, ge=1, le=1000, description="Quantidade máxima de séries na página"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido em X-Next-Cursor pela página anterior"),
+) -> StandardJSONResponse:
+    atleta_pk = await _atleta_pk(db_session, id)
+    agora = datetime.utcnow()
+    inicio = instante_utc(inicio) if inicio else (instante_utc(fim) if fim else agora) - PERIODO_PADRAO_SERIES
+    fim = instante_utc(fim) if fim else agora + TOLERANCIA_FUTURO
+
+    try:
+        stmt = select_series(atleta_pk, inicio, fim, exercicio, cursor)
+    except CursorInvalido:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cursor de paginação inválido: '{cursor}'.",
+        )
+
+    # Buscando uma linha a mais para saber se existe próxima página
+    series = (await db_session.execute(stmt.limit(limit + 1))).all()
+    headers = {}
+    if len(series) > limit:
+        series = series[:limit]
+        headers["X-Next-Cursor"] = codificar_cursor(series[-1].realizado_em, series[-1].exercicio)
+
+    return success_response([dict(serie._mapping) for serie in series], headers=headers)
+
+
+# Resumo diário ou semanal de um atleta
+@router.get(
+    "/atletas/{id}/resumo",
+     summary="Consultando o resumo diário ou semanal dos treinos de um atleta",
+     status_code=status.HTTP_200_OK,
+     response_model=StandardResponseSuccess[list[ResumoTreinoOut]],
+     description=(
+        "Séries, repetições, volume e carga máxima por exercício e dia (ou semana, a partir de "
+        "segunda-feira), do período mais recente para o mais antigo. Vem das tabelas de resumo: "
+        "o custo não depende da quantidade de séries, e o histórico continua disponível depois "
+        "que a retenção apaga as séries."
+     ),
+)
+async def query_resumo(
+    id: UUID4,
+    db_session: ReadDatabaseDependency,
+    periodo: Literal["dia", "semana"] = Query("semana", description="Agrupamento do resumo"),
+    inicio: Optional[date] = Query(None, description="Primeiro dia do período (inclusivo)"),
+    fim: Optional[date] = Query(None, description="Último dia do período (inclusivo)"),
+    exercicio: Optional[str] = Query(None, max_length=50, description="Somente este exercício"),
+    limit: int = Query(100, ge=1, le=1000, description="Quantidade máxima de linhas"),
+) -> StandardJSONResponse:
+    atleta_pk = await _atleta_pk(db_session, id)
+    resumos = (await db_session.execute(select_resumos(periodo, atleta_pk, inicio, fim, exercicio).limit(limit))).all()
+    return success_response([dict(resumo._mapping) for resumo in resumos])
@@ -0,0 +1,52 @@
+"""
+Manutenção das séries de treino, para rodar periodicamente (cron, CronJob do Kubernetes).
+
+Cria as partições mensais dos próximos meses e aplica a retenção: no Postgres os meses vencidos
+são partições inteiras removidas com DROP TABLE, sem DELETE nem VACUUM. Os resumos diários e
+semanais são mantidos. Os padrões vêm de Settings (variáveis de ambiente ou .env).
+
+Uso:
+    python -m workout_api.treinos.manutencao [--retencao-meses 24] [--particoes-futuras 2]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from workout_api.configs.database import encerrar_engines
+from workout_api.configs.settings import settings
+from workout_api.treinos.repository import aplicar_retencao, particoes_existentes, preparar_particoes
+
+
+async def manter(retencao_meses: int, particoes_futuras: int) -> None:
+    hoje = datetime.utcnow().date()
+    try:
+        await preparar_particoes(hoje, particoes_futuras)
+        if retencao_meses > 0:
+            removidas = await aplicar_retencao(retencao_meses, hoje)
+            print(f"Retenção de {retencao_meses} meses: {', '.join(removidas) or 'nada a remover'}")
+        particoes = await particoes_existentes()
+        if particoes:
+            print(f"Partições: {particoes[0]:%Y-%m} a {particoes[-1]:%Y-%m} ({len(particoes)})")
+    finally:
+        await encerrar_engines()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m workout_api.treinos.manutencao", description="Manutenção das séries de treino.",
+    )
+    parser.add_argument(
+        "--retencao-meses", type=int, default=settings.TREINOS_RETENCAO_MESES,
+        help="meses de séries mantidos, contando o atual; 0 não apaga nada (TREINOS_RETENCAO_MESES)",
+    )
+    parser.add_argument(
+        "--particoes-futuras", type=int, default=settings.TREINOS_PARTICOES_FUTURAS,
+        help="partições criadas além da do mês atual (TREINOS_PARTICOES_FUTURAS)",
+    )
+    args = parser.parse_args(argv)
+    asyncio.run(manter(args.retencao_meses, args.particoes_futuras))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, Float, ForeignKey, Integer, String, Table
+from workout_api.contrib.models import BaseModel
+
+# Séries de treino enviadas pelos aparelhos das academias (dezenas de milhões de linhas por mês).
+# São tabelas do Core, como as de estatísticas: ninguém consulta uma série pelo id público.
+#
+# No Postgres a tabela de séries é particionada por mês (RANGE em realizado_em): a retenção apaga
+# uma partição inteira com DROP TABLE, sem DELETE nem VACUUM, e as consultas de um período só
+# leem as partições dele. A chave primária (atleta, instante, exercício) começa pelo atleta: o
+# histórico de um atleta é uma faixa contínua do índice em cada partição. Uma série repetida (o
+# aparelho reenviando o lote) cai na mesma chave e é ignorada na gravação.
+treinos_series = Table(
+    'treinos_series',
+    BaseModel.metadata,
+    Column('atleta_id', Integer, ForeignKey('atletas.pk_id', ondelete='CASCADE'), primary_key=True),
+    Column('realizado_em', DateTime, primary_key=True),
+    Column('exercicio', String(50), primary_key=True),
+    Column('repeticoes', Integer, nullable=False),
+    Column('carga', Float, nullable=False),
+    postgresql_partition_by='RANGE (realizado_em)',
+)
+
+# Resumos por atleta, exercício e dia / semana (segunda-feira), somados a cada lote gravado.
+# O histórico de meses sai de algumas centenas de linhas, e continua disponível depois que a
+# retenção apaga as séries brutas.
+_COLUNAS_RESUMO = (
+    ('series', Integer),
+    ('repeticoes', BigInteger),
+    # Soma de repetições * carga (kg)
+    ('volume', Float),
+    ('carga_maxima', Float),
+)
+
+treinos_diarios = Table(
+    'treinos_diarios',
+    BaseModel.metadata,
+    Column('atleta_id', Integer, ForeignKey('atletas.pk_id', ondelete='CASCADE'), primary_key=True),
+    Column('dia', Date, primary_key=True),
+    Column('exercicio', String(50), primary_key=True),
+    *(Column(nome, tipo, nullable=False) for nome, tipo in _COLUNAS_RESUMO),
+)
+
+treinos_semanais = Table(
+    'treinos_semanais',
+    BaseModel.metadata,
+    Column('atleta_id', Integer, ForeignKey('atletas.pk_id', ondelete='CASCADE'), primary_key=True),
+    Column('semana', Date, primary_key=True),
+    Column('exercicio', String(50), primary_key=True),
+    *(Column(nome, tipo, nullable=False) for nome, tipo in _COLUNAS_RESUMO),
+)
+
+
+# --- Partições mensais (Postgres) ---
+
+PREFIXO_PARTICAO = 'treinos_series_p'
+
+
+def inicio_do_mes(dia: date) -> date:
+    return dia.replace(day=1)
+
+
+def somar_meses(mes: date, meses: int) -> date:
+    # Primeiro dia do mês `meses` meses depois (ou antes, se negativo) de `mes`
+    total = mes.year * 12 + mes.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def nome_particao(mes: date) -> str:
+    # treinos_series_p202610: a ordem alfabética é a cronológica
+    return f"{PREFIXO_PARTICAO}{mes:%Y%m}"
+
+
+def mes_da_particao(nome: str) -> date:
+    sufixo = nome.removeprefix(PREFIXO_PARTICAO)
+    return date(int(sufixo[:4]), int(sufixo[4:6]), 1)
+
+
+def sql_criar_particao(mes: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {nome_particao(mes)} PARTITION OF treinos_series "
+        f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{somar_meses(mes, 1).isoformat()}')"
+    )
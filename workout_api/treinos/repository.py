@@ -0,0 +1,290 @@
+import base64
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
+from uuid import UUID
+
+from sqlalchemy import Select, any_, delete, func, literal, select, text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from workout_api.atleta.models import AtletaModel
+from workout_api.configs.database import engine
+from workout_api.treinos.models import (
+    PREFIXO_PARTICAO,
+    inicio_do_mes,
+    mes_da_particao,
+    nome_particao,
+    somar_meses,
+    sql_criar_particao,
+    treinos_diarios,
+    treinos_semanais,
+    treinos_series,
+)
+
+COLUNAS_SERIE = ("atleta_id", "realizado_em", "exercicio", "repeticoes", "carga")
+
+
+# Meses com partição já criada, conhecidos por este processo (evita o DDL a cada lote)
+_particoes: set[date] = set()
+
+
+class CursorInvalido(ValueError):
+    """O cursor de paginação das séries não pôde ser decodificado."""
+
+
+def instante_utc(instante: datetime) -> datetime:
+    # As colunas guardam UTC sem fuso (como created_at); sem fuso, o instante já é UTC
+    if instante.tzinfo is not None:
+        instante = instante.astimezone(timezone.utc).replace(tzinfo=None)
+    return instante
+
+
+def inicio_da_semana(dia: date) -> date:
+    return dia - timedelta(days=dia.weekday())
+
+
+async def pk_ids_por_id(session: AsyncSession, ids: list[UUID]) -> dict[UUID, int]:
+    """pk_id dos atletas pelos ids públicos, em uma consulta (os que não existem ficam de fora)."""
+    if not ids:
+        return {}
+    if session.bind.dialect.name == "postgresql":
+        filtro = AtletaModel.id == any_(literal(ids, ARRAY(AtletaModel.id.type)))
+    else:
+        filtro = AtletaModel.id.in_(ids)
+    return {linha.id: linha.pk_id for linha in await session.execute(select(AtletaModel.id, AtletaModel.pk_id).where(filtro))}
+
+
+# --- Partições ---
+
+async def garantir_particoes(meses: set[date]) -> None:
+    """
+    Cria (no Postgres) as partições mensais que faltam para os meses informados.
+
+    Roda na própria transação, curta, antes da gravação do lote: criar uma partição trava a
+    tabela de séries, e a trava não pode durar o lote inteiro. A trava consultiva serializa
+    workers criando a mesma partição ao mesmo tempo.
+    """
+    faltando = sorted(inicio_do_mes(mes) for mes in meses if inicio_do_mes(mes) not in _particoes)
+    if not faltando or engine.dialect.name != "postgresql":
+        _particoes.update(faltando)
+        return
+    async with engine.begin() as conexao:
+        await conexao.execute(text("SELECT pg_advisory_xact_lock(hashtext('treinos_series_particoes'))"))
+        for mes in faltando:
+            await conexao.execute(text(sql_criar_particao(mes)))
+    _particoes.update(faltando)
+
+
+async def preparar_particoes(hoje: date, futuras: int) -> None:
+    """Partições do mês atual e dos `futuras` meses seguintes: a gravação não cria partição."""
+    mes_atual = inicio_do_mes(hoje)
+    await garantir_particoes({somar_meses(mes_atual, meses) for meses in range(futuras + 1)})
+
+
+async def particoes_existentes() -> list[date]:
+    """Meses das partições da tabela de séries, em ordem (vazio fora do Postgres)."""
+    if engine.dialect.name != "postgresql":
+        return []
+    async with engine.connect() as conexao:
+        nomes = (await conexao.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'treinos_series'::regclass"
+        ))).scalars().all()
+    return sorted(mes_da_particao(nome) for nome in nomes if nome.startswith(PREFIXO_PARTICAO))
+
+
+async def aplicar_retencao(meses: int, hoje: date) -> list[str]:
+    """
+    Apaga as séries anteriores aos últimos `meses` meses (contando o mês atual). No Postgres
+    cada mês vencido é uma partição removida com DROP TABLE, em tempo constante; nos demais
+    bancos vira um DELETE. Os resumos diários e semanais não são apagados.
+
+    Retorna o que foi removido (partições, ou a quantidade de séries apagadas).
+    """
+    corte = somar_meses(inicio_do_mes(hoje), -(meses - 1))
+    if engine.dialect.name != "postgresql":
+        async with engine.begin() as conexao:
+            resultado = await conexao.execute(
+                delete(treinos_series).where(treinos_series.c.realizado_em < datetime.combine(corte, datetime.min.time()))
+            )
+        return [f"{resultado.rowcount} séries"]
+
+    removidas = []
+    for mes in await particoes_existentes():
+        if mes >= corte:
+            break
+        # Uma transação por partição: a trava na tabela de séries dura só o DROP
+        async with engine.begin() as conexao:
+            await conexao.execute(text(f"DROP TABLE IF EXISTS {nome_particao(mes)}"))
+        _particoes.discard(mes)
+        removidas.append(nome_particao(mes))
+    return removidas
+
+
+# --- Gravação ---
+
+def _sql_somar_resumo(tabela: str, periodo: str, expressao_periodo: str) -> str:
+    # Upsert das séries novas (CTE "novas") agregadas por atleta, período e exercício. Em ordem de
+    # chave: lotes simultâneos travam as linhas de resumo na mesma ordem
+    return f"""
+        INSERT INTO {tabela} AS r (atleta_id, {periodo}, exercicio, series, repeticoes, volume, carga_maxima)
+        SELECT atleta_id, {expressao_periodo}, exercicio, count(*), sum(repeticoes), sum(repeticoes * carga), max(carga)
+        FROM novas
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        ON CONFLICT (atleta_id, {periodo}, exercicio) DO UPDATE SET
+            series = r.series + EXCLUDED.series,
+            repeticoes = r.repeticoes + EXCLUDED.repeticoes,
+            volume = r.volume + EXCLUDED.volume,
+            carga_maxima = greatest(r.carga_maxima, EXCLUDED.carga_maxima)
+    """
+
+
+# Séries da tabela temporária para a particionada e, na mesma instrução, as novas (as repetidas
+# ficam de fora do RETURNING) somadas aos resumos diários e semanais (date_trunc: segunda-feira)
+SQL_GRAVAR_LOTE = f"""
+    WITH novas AS (
+        INSERT INTO treinos_series (atleta_id, realizado_em, exercicio, repeticoes, carga)
+        SELECT atleta_id, realizado_em, exercicio, repeticoes, carga FROM treinos_series_lote
+        ON CONFLICT DO NOTHING
+        RETURNING atleta_id, realizado_em, exercicio, repeticoes, carga
+    ),
+    diarios AS ({_sql_somar_resumo("treinos_diarios", "dia", "realizado_em::date")}),
+    semanais AS ({_sql_somar_resumo("treinos_semanais", "semana", "date_trunc('week', realizado_em)::date")})
+    SELECT count(*) FROM novas
+"""
+
+
+async def _gravar_postgres(session: AsyncSession, registros: list[tuple]) -> int:
+    # COPY binário do lote para uma tabela temporária (apagada no commit) e uma única instrução
+    # para gravar as séries e os resumos: três idas ao banco, qualquer que seja o tamanho do lote
+    conexao = await session.connection()
+    await conexao.execute(text(
+        "CREATE TEMP TABLE treinos_series_lote (LIKE treinos_series INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    bruta = await conexao.get_raw_connection()
+    await bruta.driver_connection.copy_records_to_table( # type: ignore
+        "treinos_series_lote", records=registros, columns=COLUNAS_SERIE
+    )
+    return (await conexao.execute(text(SQL_GRAVAR_LOTE))).scalar_one()
+
+
+async def _somar_resumos_sqlite(session: AsyncSession, tabela, periodo: str, resumos: dict[tuple, list]) -> None:
+    if not resumos:
+        return
+    stmt = sqlite_insert(tabela)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["atleta_id", periodo, "exercicio"],
+        set_={
+            "series": tabela.c.series + stmt.excluded.series,
+            "repeticoes": tabela.c.repeticoes + stmt.excluded.repeticoes,
+            "volume": tabela.c.volume + stmt.excluded.volume,
+            "carga_maxima": func.max(tabela.c.carga_maxima, stmt.excluded.carga_maxima),
+        },
+    )
+    await session.execute(stmt, [
+        dict(zip(("atleta_id", periodo, "exercicio", "series", "repeticoes", "volume", "carga_maxima"), (*chave, *valores)))
+        for chave, valores in sorted(resumos.items())
+    ])
+
+
+async def _gravar_sqlite(session: AsyncSession, registros: list[tuple]) -> int:
+    # Testes e desenvolvimento: INSERT com RETURNING das séries novas, agregadas aqui
+    novas = (await session.execute(
+        sqlite_insert(treinos_series).on_conflict_do_nothing().returning(*treinos_series.c),
+        [dict(zip(COLUNAS_SERIE, registro)) for registro in registros],
+    )).all()
+    diarios: dict[tuple, list] = {}
+    semanais: dict[tuple, list] = {}
+    for serie in novas:
+        dia = serie.realizado_em.date()
+        for resumos, periodo in ((diarios, dia), (semanais, inicio_da_semana(dia))):
+            resumo = resumos.setdefault((serie.atleta_id, periodo, serie.exercicio), [0, 0, 0.0, 0.0])
+            resumo[0] += 1
+            resumo[1] += serie.repeticoes
+            resumo[2] += serie.repeticoes * serie.carga
+            resumo[3] = max(resumo[3], serie.carga)
+    await _somar_resumos_sqlite(session, treinos_diarios, "dia", diarios)
+    await _somar_resumos_sqlite(session, treinos_semanais, "semana", semanais)
+    return len(novas)
+
+
+async def gravar_series(session: AsyncSession, registros: list[tuple]) -> int:
+    """
+    Grava um lote de séries (tuplas nas colunas de COLUNAS_SERIE) e soma as novas aos resumos
+    diários e semanais, na transação da sessão (sem commit). Séries já gravadas (mesmo atleta,
+    instante e exercício) são ignoradas e não contam nos resumos. Retorna quantas eram novas.
+
+    As partições dos meses do lote precisam existir (garantir_particoes).
+    """
+    if not registros:
+        return 0
+    if session.bind.dialect.name == "postgresql":
+        return await _gravar_postgres(session, registros)
+    return await _gravar_sqlite(session, registros)
+
+
+# --- Consultas ---
+
+def select_series(
+    atleta_pk: int,
+    inicio: datetime,
+    fim: datetime,
+    exercicio: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> Select:
+    # Da mais recente para a mais antiga, em [inicio, fim): só as partições do período são lidas
+    colunas = treinos_series.c
+    stmt = (
+        select(colunas.realizado_em, colunas.exercicio, colunas.repeticoes, colunas.carga)
+        .where(colunas.atleta_id == atleta_pk, colunas.realizado_em >= inicio, colunas.realizado_em < fim)
+        .order_by(colunas.realizado_em.desc(), colunas.exercicio.desc())
+    )
+    if exercicio:
+        stmt = stmt.where(colunas.exercicio == exercicio.strip())
+    if cursor:
+        realizado_em, exercicio_cursor = decodificar_cursor(cursor)
+        stmt = stmt.where(tuple_(colunas.realizado_em, colunas.exercicio) < (realizado_em, exercicio_cursor))
+    return stmt
+
+
+def select_resumos(
+    periodo: Literal["dia", "semana"],
+    atleta_pk: int,
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    exercicio: Optional[str] = None,
+) -> Select:
+    # Do período mais recente para o mais antigo; inicio e fim inclusivos
+    tabela = treinos_diarios if periodo == "dia" else treinos_semanais
+    coluna = tabela.c[periodo]
+    stmt = (
+        select(
+            coluna.label("inicio"), tabela.c.exercicio, tabela.c.series, tabela.c.repeticoes,
+            tabela.c.volume, tabela.c.carga_maxima,
+        )
+        .where(tabela.c.atleta_id == atleta_pk)
+        .order_by(coluna.desc(), tabela.c.exercicio)
+    )
+    if inicio:
+        stmt = stmt.where(coluna >= (inicio_da_semana(inicio) if periodo == "semana" else inicio))
+    if fim:
+        stmt = stmt.where(coluna <= fim)
+    if exercicio:
+        stmt = stmt.where(tabela.c.exercicio == exercicio.strip())
+    return stmt
+
+
+def codificar_cursor(realizado_em: datetime, exercicio: str) -> str:
+    conteudo = json.dumps([realizado_em.isoformat(), exercicio]).encode()
+    return base64.urlsafe_b64encode(conteudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        conteudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        realizado_em, exercicio = json.loads(conteudo)
+        return datetime.fromisoformat(realizado_em), str(exercicio)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(cursor) from e
@@ -0,0 +1,30 @@
+from datetime import date, datetime
+from typing import Annotated
+
+from pydantic import UUID4, Field, NonNegativeFloat, PositiveInt
+from workout_api.contrib.schemas import BaseSchema
+
+class SerieIn(BaseSchema):
+    atleta_id: Annotated[UUID4, Field(description='ID do atleta')] # type: ignore
+    exercicio: Annotated[str, Field(description='Exercício', example='Agachamento', min_length=1, max_length=50)] # type: ignore
+    repeticoes: Annotated[PositiveInt, Field(description='Repetições da série', example=10)] # type: ignore
+    carga: Annotated[NonNegativeFloat, Field(description='Carga em kg (0 para peso corporal)', example=80.0)] # type: ignore
+    realizado_em: Annotated[datetime, Field(description='Instante da série (sem fuso = UTC)', example='2026-10-18T10:15:00Z')] # type: ignore
+
+class SerieOut(BaseSchema):
+    exercicio: Annotated[str, Field(description='Exercício', example='Agachamento')] # type: ignore
+    repeticoes: Annotated[int, Field(description='Repetições da série', example=10)] # type: ignore
+    carga: Annotated[float, Field(description='Carga em kg', example=80.0)] # type: ignore
+    realizado_em: Annotated[datetime, Field(description='Instante da série (UTC)')] # type: ignore
+
+class SeriesGravadasOut(BaseSchema):
+    series_recebidas: Annotated[int, Field(description='Séries no lote', example=500)] # type: ignore
+    series_gravadas: Annotated[int, Field(description='Séries novas gravadas (as já recebidas antes são ignoradas)', example=500)] # type: ignore
+
+class ResumoTreinoOut(BaseSchema):
+    inicio: Annotated[date, Field(description='Dia, ou segunda-feira da semana, do resumo')] # type: ignore
+    exercicio: Annotated[str, Field(description='Exercício', example='Agachamento')] # type: ignore
+    series: Annotated[int, Field(description='Quantidade de séries', example=12)] # type: ignore
+    repeticoes: Annotated[int, Field(description='Total de repetições', example=120)] # type: ignore
+    volume: Annotated[float, Field(description='Soma de repetições x carga, em kg', example=9600.0)] # type: ignore
+    carga_maxima: Annotated[float, Field(description='Maior carga do período, em kg', example=100.0)] # type: ignore